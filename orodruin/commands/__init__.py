@@ -1,13 +1,18 @@
 from .command import Command
+from .journal import Journal
+from .macro import MacroCommand
 from .nodes import (
     CreateNode,
     DeleteNode,
+    DeleteNodes,
     ExportNode,
     GroupNodes,
     ImportNode,
     RenameNode,
+    UngroupNodes,
 )
 from .ports import (
+    ConnectManyPorts,
     ConnectPorts,
     CreatePort,
     DeletePort,
@@ -16,20 +21,27 @@ from .ports import (
     RenamePort,
     SetPort,
 )
+from .stack import UndoStack
 
 __all__ = [
     "Command",
+    "ConnectManyPorts",
     "ConnectPorts",
     "CreateNode",
     "CreatePort",
     "DeleteNode",
+    "DeleteNodes",
     "DeletePort",
     "DisconnectPorts",
     "ExportNode",
     "GetPort",
     "GroupNodes",
     "ImportNode",
+    "Journal",
+    "MacroCommand",
     "RenameNode",
     "RenamePort",
     "SetPort",
+    "UngroupNodes",
+    "UndoStack",
 ]
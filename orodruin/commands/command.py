@@ -19,3 +19,12 @@ class Command(Generic[T], metaclass=ABCMeta):
     def redo(self) -> None:
         """Redo the command, after an undo."""
         self.do()
+
+    def merge(self, command: "Command") -> bool:
+        """Merge a command done right after this one into this one.
+
+        Return True if the command was merged, its undo is then part
+        of this command's undo, see `orodruin.commands.UndoStack`.
+        """
+        # pylint: disable = unused-argument
+        return False
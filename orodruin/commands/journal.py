@@ -0,0 +1,636 @@
+"""Append-only journal of the done commands, to recover from crashes.
+
+Each command is appended to the journal as a JSON line of its name and
+parameters. The nodes, ports and graphs it refers to are recorded by handle,
+small integers defined by the path of the object the first time
+it is referenced, or by the command that created it.
+Handles stay valid when the objects are renamed or moved afterwards.
+
+Replaying the journal on the last save of the node restores the edits
+made since, see `recover`.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+from pathlib import Path, PurePosixPath
+from typing import IO, TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional
+
+import attr
+
+from orodruin.core.compression import read_text
+from orodruin.core.library import Library, LibraryManager
+from orodruin.core.port import PortDirection, PortTypes
+from orodruin.exceptions import JournalError, LibraryDoesNotExistError
+
+from .command import Command
+from .macro import MacroCommand
+from .nodes import (
+    CreateNode,
+    DeleteNode,
+    DeleteNodes,
+    ExportNode,
+    GroupNodes,
+    ImportNode,
+    RenameNode,
+    UngroupNodes,
+)
+from .ports import (
+    ConnectManyPorts,
+    ConnectPorts,
+    CreatePort,
+    DeletePort,
+    DisconnectPorts,
+    GetPort,
+    RenamePort,
+    SetPort,
+)
+
+if TYPE_CHECKING:
+    from orodruin.core import Graph, Node, Port, State
+
+    from .stack import UndoStack
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_SUFFIX = ".journal"
+
+# Commands that don't edit the state, they aren't journaled.
+_READ_ONLY_COMMANDS = (ExportNode, GetPort)
+
+
+def journal_path(path: Path) -> Path:
+    """Return the path of the journal of a saved file."""
+    return path.with_name(f"{path.name}{JOURNAL_SUFFIX}")
+
+
+@attr.s
+class Journal:
+    """Append the done commands of a state to a journal file.
+
+    The records are written by batches of `batch_size`, and the file
+    is synced to the disk at most every `sync_interval` seconds.
+    A crash loses at most the records of the last batch or interval.
+
+    Use `run` to do a command and journal it, or give the journal
+    to an `UndoStack` which also journals the undos and redos.
+    Call `checkpoint` once the node is saved to start a new journal,
+    through `UndoStack.checkpoint` when journaling an undo stack.
+    """
+
+    state: State = attr.ib()
+    path: Path = attr.ib()
+    batch_size: int = attr.ib(default=64)
+    sync_interval: float = attr.ib(default=1.0)
+
+    _handle: Optional[IO[str]] = attr.ib(init=False, default=None)
+    _pending: List[str] = attr.ib(init=False, factory=list)
+    _last_sync: float = attr.ib(init=False, factory=time.monotonic)
+    _handles: Dict[Any, int] = attr.ib(init=False, factory=dict)
+    # Records of the macro command being done, written once it succeeds.
+    _macro_records: Optional[List[Dict[str, Any]]] = attr.ib(init=False, default=None)
+
+    def run(self, command: Command) -> Any:
+        """Do a command and append it to the journal, return its result.
+
+        The command is encoded before it is done, the handles it refers to
+        are defined by the paths of the objects before the command changes them.
+
+        Raises:
+            JournalError: when the command can't be journaled.
+        """
+        if isinstance(command, _READ_ONLY_COMMANDS):
+            return command.do()
+
+        if isinstance(command, MacroCommand):
+            return self._run_macro(command)
+
+        record = self._encode(command)
+        result = command.do()
+
+        if isinstance(command, (CreateNode, GroupNodes)):
+            # Internal nodes are given a new type when created.
+            record["args"]["type"] = result.type()
+
+        result_handle = self._result_handle(result)
+        if result_handle is not None:
+            record["result"] = result_handle
+
+        self._write(record)
+
+        return result
+
+    def _run_macro(self, macro: MacroCommand) -> Any:
+        """Journal the commands of a macro command once it succeeded.
+
+        The records of a failed macro command are dropped with the handles
+        it defined, as its commands were undone. The records of a nested
+        macro command are part of the enclosing one.
+        """
+        outer_records = self._macro_records
+        handle_count = len(self._handles)
+        self._macro_records = []
+
+        macro.set_runner(self.run)
+        try:
+            result = macro.do()
+        except Exception:
+            for key in list(self._handles)[handle_count:]:
+                del self._handles[key]
+            raise
+        else:
+            records = self._macro_records
+        finally:
+            macro.set_runner(None)
+            self._macro_records = outer_records
+
+        if outer_records is not None:
+            outer_records.extend(records)
+        else:
+            self._write({"op": "begin"})
+            for record in records:
+                self._write(record)
+            self._write({"op": "end"})
+
+        return result
+
+    def record_undo(self) -> None:
+        """Append the undo of the last command to the journal."""
+        self._write({"op": "undo"})
+
+    def record_redo(self) -> None:
+        """Append the redo of the last undone command to the journal."""
+        self._write({"op": "redo"})
+
+    def record_seal(self) -> None:
+        """Append the seal of an undo stack, see `UndoStack.seal`."""
+        self._write({"op": "seal"})
+
+    def flush(self, sync: bool = False) -> None:
+        """Write the pending records, and sync the file if asked or due."""
+        if self._pending:
+            handle = self._open()
+            handle.write("".join(self._pending))
+            handle.flush()
+            self._pending.clear()
+
+        now = time.monotonic()
+        if self._handle and (sync or now - self._last_sync >= self.sync_interval):
+            os.fsync(self._handle.fileno())
+            self._last_sync = now
+
+    def checkpoint(self) -> None:
+        """Empty the journal, once the node it journals was saved."""
+        self._pending.clear()
+        self._handles.clear()
+        self.close()
+        self.path.write_text("", encoding="utf-8")
+
+    def close(self) -> None:
+        """Write the pending records and close the journal file."""
+        self.flush(sync=True)
+        if self._handle:
+            self._handle.close()
+            self._handle = None
+
+    def _open(self) -> IO[str]:
+        if self._handle is None:
+            self._handle = self.path.open("a", encoding="utf-8")
+        return self._handle
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        if self._macro_records is not None:
+            self._macro_records.append(record)
+            return
+
+        self._pending.append(
+            json.dumps(record, separators=(",", ":"), default=str) + "\n"
+        )
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+        elif time.monotonic() - self._last_sync >= self.sync_interval:
+            self.flush()
+
+    def _encode(self, command: Command) -> Dict[str, Any]:
+        encoder = _ENCODERS.get(type(command))
+        if encoder is None:
+            raise JournalError(f"Command {type(command).__name__} can't be journaled.")
+
+        return {"op": type(command).__name__, "args": encoder(self, command)}
+
+    def node(self, node: Node) -> int:
+        """Return the handle of a node, defining it by its path if needed."""
+        return self._define(node.uuid(), "node", str(node.path()))
+
+    def port(self, port: Port) -> int:
+        """Return the handle of a port, defining it by its path if needed."""
+        return self._define(port.uuid(), "port", [str(port.node().path()), port.name()])
+
+    def graph(self, graph: Graph) -> int:
+        """Return the handle of a graph, defining it by its node path if needed."""
+        parent_node = graph.parent_node()
+        return self._define(
+            graph.uuid(), "graph", str(parent_node.path()) if parent_node else None
+        )
+
+    def _define(self, key: Any, kind: str, path: Any) -> int:
+        handle = self._handles.get(key)
+        if handle is None:
+            handle = len(self._handles)
+            self._handles[key] = handle
+            self._write({"op": "define", "handle": handle, kind: path})
+        return handle
+
+    def _result_handle(self, result: Any) -> Optional[int]:
+        """Give a handle to the node or port created by a command."""
+        uuid_getter = getattr(result, "uuid", None)
+        if uuid_getter is None or not callable(getattr(result, "name", None)):
+            return None
+
+        handle = len(self._handles)
+        self._handles[uuid_getter()] = handle
+        return handle
+
+
+_Encoder = Callable[[Journal, Any], Dict[str, Any]]
+
+
+def _create_node(journal: Journal, command: CreateNode) -> Dict[str, Any]:
+    state = command.state
+    graph = state.get_graph(command.graph) if command.graph else state.root_graph()
+    return {
+        "name": command.name,
+        "type": command.type,
+        "library": command.library.name() if command.library else None,
+        "graph": journal.graph(graph),
+    }
+
+
+def _create_port(journal: Journal, command: CreatePort) -> Dict[str, Any]:
+    state = command.state
+    return {
+        "node": journal.node(state.get_node(command.node)),
+        "name": command.name,
+        "direction": command.direction.name,
+        "type": command.type.__name__,
+        "parent_port": journal.port(state.get_port(command.parent_port))
+        if command.parent_port
+        else None,
+    }
+
+
+def _connection(journal: Journal, command: Any, **extra: Any) -> Dict[str, Any]:
+    state = command.state
+    return {
+        "graph": journal.graph(state.get_graph(command.graph)),
+        "source": journal.port(state.get_port(command.source)),
+        "target": journal.port(state.get_port(command.target)),
+        **extra,
+    }
+
+
+def _set_port(journal: Journal, command: SetPort) -> Dict[str, Any]:
+    value = command.value
+    return {
+        "port": journal.port(command.port),
+        "value": getattr(value, "value", value),
+    }
+
+
+_ENCODERS: Dict[type, _Encoder] = {
+    CreateNode: _create_node,
+    DeleteNode: lambda journal, command: {
+        "node": journal.node(command.state.get_node(command.node))
+    },
+    DeleteNodes: lambda journal, command: {
+        "nodes": [journal.node(command.state.get_node(node)) for node in command.nodes]
+    },
+    RenameNode: lambda journal, command: {
+        "node": journal.node(command.state.get_node(command.node)),
+        "name": command.name,
+    },
+    GroupNodes: lambda journal, command: {
+        "graph": journal.graph(command.state.get_graph(command.graph)),
+        "nodes": [journal.node(command.state.get_node(node)) for node in command.nodes],
+    },
+    UngroupNodes: lambda journal, command: {
+        "node": journal.node(command.state.get_node(command.node))
+    },
+    ImportNode: lambda journal, command: {
+        "graph": journal.graph(command.state.get_graph(command.graph)),
+        "node_type": command.node_type,
+        "library_name": command.library_name,
+        "target_name": command.target_name,
+        "shared": command.shared,
+    },
+    CreatePort: _create_port,
+    DeletePort: lambda journal, command: {
+        "port": journal.port(command.state.get_port(command.port))
+    },
+    RenamePort: lambda journal, command: {
+        "port": journal.port(command.state.get_port(command.port)),
+        "name": command.name,
+    },
+    SetPort: _set_port,
+    ConnectPorts: lambda journal, command: _connection(
+        journal, command, force=command.force
+    ),
+    ConnectManyPorts: lambda journal, command: {
+        "graph": journal.graph(command.state.get_graph(command.graph)),
+        "pairs": [
+            [
+                journal.port(command.state.get_port(source)),
+                journal.port(command.state.get_port(target)),
+            ]
+            for source, target in command.pairs
+        ],
+        "force": command.force,
+    },
+    DisconnectPorts: _connection,
+}
+
+
+@attr.s
+class _Replayer:
+    """Resolve the handles of the records and rebuild their commands."""
+
+    state: State = attr.ib()
+    _objects: Dict[int, Any] = attr.ib(init=False, factory=dict)
+
+    def define(self, record: Dict[str, Any]) -> None:
+        """Resolve the object of a handle from its path."""
+        if "node" in record:
+            obj: Any = self._node(record["node"])
+        elif "port" in record:
+            node_path, port_name = record["port"]
+            obj = self._node(node_path).port(port_name)
+        elif record["graph"] is None:
+            obj = self.state.root_graph()
+        else:
+            obj = self._node(record["graph"]).graph()
+
+        self._objects[record["handle"]] = obj
+
+    def _node(self, path: str) -> Node:
+        graph = self.state.root_graph()
+        node = None
+        for name in PurePosixPath(path).parts[1:]:
+            node = next(
+                (child for child in graph.nodes() if child.name() == name), None
+            )
+            if node is None:
+                raise JournalError(f"Found no node {path} to replay the journal.")
+            graph = node.graph()
+
+        if node is None:
+            raise JournalError(f"Invalid node path {path} in the journal.")
+        return node
+
+    def get(self, handle: Optional[int]) -> Any:
+        """Return the object of a handle."""
+        if handle is None:
+            return None
+        try:
+            return self._objects[handle]
+        except KeyError as error:
+            raise JournalError(f"Undefined handle {handle} in the journal.") from error
+
+    def command(self, record: Dict[str, Any]) -> Command:
+        """Rebuild the command of a record.
+
+        Raises:
+            JournalError: when the command of the record is unknown.
+        """
+        command = self._node_command(record["op"], record["args"])
+        if command is None:
+            command = self._port_command(record["op"], record["args"])
+        if command is None:
+            raise JournalError(f"Unknown command {record['op']} in the journal.")
+        return command
+
+    def _node_command(self, op: str, args: Dict[str, Any]) -> Optional[Command]:
+        # pylint: disable = too-many-return-statements
+        state = self.state
+
+        if op == "CreateNode":
+            return CreateNode(
+                state,
+                args["name"],
+                args["type"],
+                _find_library(args["library"]),
+                self.get(args["graph"]),
+            )
+        if op == "DeleteNode":
+            return DeleteNode(state, self.get(args["node"]))
+        if op == "DeleteNodes":
+            return DeleteNodes(state, [self.get(node) for node in args["nodes"]])
+        if op == "RenameNode":
+            return RenameNode(state, self.get(args["node"]), args["name"])
+        if op == "GroupNodes":
+            return GroupNodes(
+                state,
+                self.get(args["graph"]),
+                [self.get(node) for node in args["nodes"]],
+                args.get("type"),
+            )
+        if op == "UngroupNodes":
+            return UngroupNodes(state, self.get(args["node"]))
+        if op == "ImportNode":
+            return ImportNode(
+                state,
+                self.get(args["graph"]),
+                args["node_type"],
+                args["library_name"],
+                args["target_name"],
+                args["shared"],
+            )
+        return None
+
+    def _port_command(self, op: str, args: Dict[str, Any]) -> Optional[Command]:
+        # pylint: disable = too-many-return-statements
+        state = self.state
+
+        if op == "CreatePort":
+            return CreatePort(
+                state,
+                self.get(args["node"]),
+                args["name"],
+                PortDirection[args["direction"]],
+                PortTypes[args["type"]].value,
+                self.get(args["parent_port"]),
+            )
+        if op == "DeletePort":
+            return DeletePort(state, self.get(args["port"]))
+        if op == "RenamePort":
+            return RenamePort(state, self.get(args["port"]), args["name"])
+        if op == "SetPort":
+            return SetPort(self.get(args["port"]), args["value"])
+        if op == "ConnectPorts":
+            return ConnectPorts(
+                state,
+                self.get(args["graph"]),
+                self.get(args["source"]),
+                self.get(args["target"]),
+                args["force"],
+            )
+        if op == "ConnectManyPorts":
+            return ConnectManyPorts(
+                state,
+                self.get(args["graph"]),
+                [
+                    (self.get(source), self.get(target))
+                    for source, target in args["pairs"]
+                ],
+                args["force"],
+            )
+        if op == "DisconnectPorts":
+            return DisconnectPorts(
+                state,
+                self.get(args["graph"]),
+                self.get(args["source"]),
+                self.get(args["target"]),
+            )
+        return None
+
+    def set_result(self, record: Dict[str, Any], result: Any) -> None:
+        """Give the handle of a record's result to the created object."""
+        if "result" in record:
+            self._objects[record["result"]] = result
+
+
+def _find_library(name: Optional[str]) -> Optional[Library]:
+    if name is None:
+        return None
+
+    library = LibraryManager.find_library(name)
+    if library is None:
+        raise LibraryDoesNotExistError(f"Found no registered library called {name}")
+    return library
+
+
+def read_records(path: Path) -> Iterator[Dict[str, Any]]:
+    """Read the records of a journal.
+
+    An incomplete last record, written while the application crashed,
+    is skipped.
+    """
+    with path.open("r", encoding="utf-8") as handle:
+        for line in handle:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                if line.endswith("\n"):
+                    raise
+                logger.warning("Skipped the incomplete last record of %s.", path)
+
+
+def replay(state: State, path: Path, stack: Optional[UndoStack] = None) -> int:
+    """Replay the commands of a journal on the state, return their number.
+
+    The commands are done in a single batch of the state, see `State.batch`,
+    through the given undo stack so the replayed edits can be undone.
+    A macro command left open by a crash is dropped.
+
+    Raises:
+        JournalError: when an undo or redo has no command to undo or redo,
+            like the undo of a command done before the journal was started.
+    """
+    # Imported here as the stack journals its commands.
+    from .stack import UndoStack  # pylint: disable = import-outside-toplevel
+
+    if stack is None:
+        stack = UndoStack()
+
+    replayer = _Replayer(state)
+    count = 0
+    # Records of the commands of the macro command being replayed.
+    macro_records: Optional[List[Dict[str, Any]]] = None
+
+    with state.batch():
+        for record in read_records(path):
+            op = record["op"]
+
+            if op == "begin":
+                if macro_records is not None:
+                    logger.warning("Dropped an unterminated macro of %s.", path)
+                macro_records = []
+            elif op == "end":
+                if macro_records is not None:
+                    stack.push(
+                        MacroCommand(
+                            state,
+                            function=_macro_function(replayer, macro_records),
+                        )
+                    )
+                macro_records = None
+            elif macro_records is not None:
+                macro_records.append(record)
+            else:
+                _replay_record(replayer, stack, record, path)
+            count += 1
+
+    if macro_records is not None:
+        logger.warning("Dropped the unterminated last macro of %s.", path)
+
+    logger.debug("Replayed %s journal records from %s.", count, path)
+
+    return count
+
+
+def _replay_record(
+    replayer: _Replayer, stack: UndoStack, record: Dict[str, Any], path: Path
+) -> None:
+    """Replay a record out of a macro command."""
+    op = record["op"]
+
+    if op == "define":
+        replayer.define(record)
+    elif op == "seal":
+        stack.seal()
+    elif op in ("undo", "redo"):
+        if not getattr(stack, op)():
+            raise JournalError(f"Found no command to {op} in {path}.")
+    else:
+        replayer.set_result(record, stack.push(replayer.command(record)))
+
+
+def _macro_function(
+    replayer: _Replayer, records: List[Dict[str, Any]]
+) -> Callable[[MacroCommand], None]:
+    def function(macro: MacroCommand) -> None:
+        for record in records:
+            if record["op"] == "define":
+                replayer.define(record)
+            else:
+                replayer.set_result(record, macro.run(replayer.command(record)))
+
+    return function
+
+
+def recover(state: State, path: Path, graph: Optional[Graph] = None) -> Node:
+    """Load a saved node and replay its journal, if any.
+
+    The save is trusted, see `State.deserialize`.
+    """
+    with read_text(path) as handle:
+        data = json.load(handle)
+
+    node = state.deserialize(data, graph or state.root_graph(), trusted=True)
+
+    journal = journal_path(path)
+    if journal.exists():
+        replay(state, journal)
+
+    return node
+
+
+__all__ = [
+    "JOURNAL_SUFFIX",
+    "Journal",
+    "journal_path",
+    "read_records",
+    "recover",
+    "replay",
+]
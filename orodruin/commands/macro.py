@@ -0,0 +1,90 @@
+"""Macro command."""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Callable, List, Optional
+
+import attr
+
+from orodruin.core.signal import deferred_count, drop_deferred
+
+from .command import Command
+
+if TYPE_CHECKING:
+    from orodruin.core import State
+
+
+@attr.s
+class MacroCommand(Command):
+    """Group many commands into a single command.
+
+    The commands are done in a batch of the state, see `State.batch`:
+    the signals are emitted once all of them are done and the unique names
+    are found from an index of the names instead of walking the siblings.
+    Undo and redo also run in a batch, and undo all the commands at once.
+
+    The commands are either given upfront, or run by a function taking
+    the macro command, whose result is returned by `do`::
+
+        def build(macro: MacroCommand) -> Node:
+            node = macro.run(CreateNode(state, "joint"))
+            macro.run(CreatePort(state, node, "input", PortDirection.input, int))
+            return node
+
+        node = UndoStack().push(MacroCommand(state, function=build))
+
+    When a command fails, the commands already done are undone
+    and none of their signals are emitted.
+    """
+
+    state: State = attr.ib()
+    commands: List[Command] = attr.ib(factory=list)
+    function: Optional[Callable[[MacroCommand], Any]] = attr.ib(default=None)
+
+    _done: List[Command] = attr.ib(init=False, factory=list)
+    _runner: Optional[Callable[[Command], Any]] = attr.ib(init=False, default=None)
+
+    def do(self) -> Any:
+        self._done = []
+        result = None
+
+        with self.state.batch():
+            # The signals deferred before this command by an outer batch are kept.
+            signal_count = deferred_count()
+            try:
+                for command in self.commands:
+                    self.run(command)
+                if self.function is not None:
+                    result = self.function(self)
+            except Exception:
+                self._undo()
+                drop_deferred(signal_count)
+                raise
+
+        return result
+
+    def run(self, command: Command) -> Any:
+        """Do a command as part of this one, return the command's result."""
+        result = self._runner(command) if self._runner else command.do()
+        self._done.append(command)
+        return result
+
+    def set_runner(self, runner: Optional[Callable[[Command], Any]]) -> None:
+        """Set the function doing the commands run by this one, like a journal."""
+        self._runner = runner
+
+    def undo(self) -> None:
+        with self.state.batch():
+            self._undo()
+
+    def redo(self) -> None:
+        with self.state.batch():
+            for command in self._done:
+                command.redo()
+
+    def _undo(self) -> None:
+        for command in reversed(self._done):
+            command.undo()
+
+    def done_commands(self) -> List[Command]:
+        """Return the commands done by this command, in order."""
+        return list(self._done)
@@ -1,15 +1,19 @@
 from .create_node import CreateNode
 from .delete_node import DeleteNode
+from .delete_nodes import DeleteNodes
 from .export_node import ExportNode
 from .group_nodes import GroupNodes
 from .import_node import ImportNode
 from .rename_node import RenameNode
+from .ungroup_nodes import UngroupNodes
 
 __all__ = [
     "CreateNode",
     "DeleteNode",
+    "DeleteNodes",
     "ExportNode",
     "GroupNodes",
     "ImportNode",
     "RenameNode",
+    "UngroupNodes",
 ]
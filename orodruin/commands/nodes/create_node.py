@@ -25,6 +25,7 @@ class CreateNode(Command):
 
     _graph: Graph = attr.ib(init=False)
     _created_node: Node = attr.ib(init=False)
+    _created_graph: Graph = attr.ib(init=False)
 
     def __attrs_post_init__(self) -> None:
         if self.graph:
@@ -44,8 +45,16 @@ class CreateNode(Command):
 
         self._graph.register_node(node)
         self._created_node = node
+        self._created_graph = node.graph()
 
         return self._created_node
 
     def undo(self) -> None:
-        raise NotImplementedError
+        self._graph.unregister_node(self._created_node)
+        self.state.delete_node(self._created_node)
+        self.state.delete_graph(self._created_graph)
+
+    def redo(self) -> None:
+        self.state.restore_graph(self._created_graph)
+        self.state.restore_node(self._created_node)
+        self._graph.register_node(self._created_node)
@@ -6,7 +6,7 @@ from typing import TYPE_CHECKING
 import attr
 
 from ..command import Command
-from ..ports import DeletePort, DisconnectPorts
+from .delete_nodes import DeleteNodes
 
 if TYPE_CHECKING:
     from orodruin.core import Graph, Node, NodeLike, State
@@ -14,13 +14,17 @@ if TYPE_CHECKING:
 
 @attr.s
 class DeleteNode(Command):
-    """Delete Node command."""
+    """Delete Node command.
+
+    See `DeleteNodes` to delete many nodes at once.
+    """
 
     state: State = attr.ib()
     node: NodeLike = attr.ib()
 
     _node: Node = attr.ib(init=False)
     _graph: Graph = attr.ib(init=False)
+    _deletion: DeleteNodes = attr.ib(init=False)
 
     def __attrs_post_init__(self) -> None:
         self._node = self.state.get_node(self.node)
@@ -30,25 +34,13 @@ class DeleteNode(Command):
             raise TypeError("Cannot create a Port on a node with no graph.")
 
         self._graph = parent_graph
+        self._deletion = DeleteNodes(self.state, [self._node])
 
     def do(self) -> None:
-        for node in self._node.graph().nodes():
-            DeleteNode(self.state, node).do()
-
-        for port in self._node.ports():
-            for connection in port.connections():
-                DisconnectPorts(
-                    self.state,
-                    self._graph,
-                    connection.source(),
-                    connection.target(),
-                ).do()
-
-        for port in self._node.ports():
-            DeletePort(self.state, port).do()
-
-        self._graph.unregister_node(self._node)
-        self.state.delete_node(self._node)
+        self._deletion.do()
 
     def undo(self) -> None:
-        raise NotImplementedError
+        self._deletion.undo()
+
+    def redo(self) -> None:
+        self._deletion.redo()
@@ -0,0 +1,188 @@
+"""Delete Nodes command."""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, List, Set, Tuple
+from uuid import UUID
+
+import attr
+
+from orodruin.core.traversal import ancestor_nodes, descendant_nodes
+from orodruin.core.utils import notify_downstream_ports
+
+from ..command import Command
+
+if TYPE_CHECKING:
+    from orodruin.core import Connection, Graph, Node, NodeLike, Port, State
+    from orodruin.core.ids import IndexedIds
+
+_GraphRecord = Tuple["Graph", "IndexedIds", "IndexedIds", "IndexedIds"]
+"""A remaining graph and the nodes, ports and connections removed from it."""
+
+_PortRecord = Tuple["Port", "IndexedIds", "IndexedIds"]
+"""A remaining port and the upstream and downstream connections removed from it."""
+
+
+@attr.s
+class DeleteNodes(Command):
+    """Delete many nodes with their child nodes, ports, connections and graphs.
+
+    Everything to delete is gathered once, on the first do, then removed
+    from the state and from the graphs and ports that remain in a single pass
+    each. Redoing the command removes the same objects without gathering them.
+    The signals are emitted once the deletion is done, see `State.batch`.
+    """
+
+    state: State = attr.ib()
+    nodes: List[NodeLike] = attr.ib()
+
+    _nodes: List[Node] = attr.ib(init=False)
+
+    # Deleted objects, the outermost nodes first.
+    _deleted_graphs: List[Graph] = attr.ib(init=False, factory=list)
+    _deleted_nodes: List[Node] = attr.ib(init=False, factory=list)
+    _deleted_ports: List[Port] = attr.ib(init=False, factory=list)
+    _deleted_connections: List[Connection] = attr.ib(init=False, factory=list)
+
+    _graph_records: List[_GraphRecord] = attr.ib(init=False, factory=list)
+    _port_records: List[_PortRecord] = attr.ib(init=False, factory=list)
+
+    def __attrs_post_init__(self) -> None:
+        self._nodes = [self.state.get_node(node) for node in self.nodes]
+
+        for node in self._nodes:
+            if not node.parent_graph():
+                raise TypeError(f"Cannot delete node {node.name()} with no graph.")
+
+    def do(self) -> None:
+        self._gather()
+        self._apply()
+
+    def redo(self) -> None:
+        self._apply()
+
+    def undo(self) -> None:
+        with self.state.batch():
+            for graph in self._deleted_graphs:
+                self.state.restore_graph(graph)
+            for node in self._deleted_nodes:
+                self.state.restore_node(node)
+            for port in self._deleted_ports:
+                self.state.restore_port(port)
+            for connection in self._deleted_connections:
+                self.state.restore_connection(connection)
+
+            for graph, nodes, ports, connections in self._graph_records:
+                graph.register_nodes(nodes)
+                graph.register_ports(ports)
+                graph.register_connections(connections)
+
+            for port, upstream, downstream in self._port_records:
+                port.register_connections(upstream, downstream)
+
+            notify_downstream_ports(
+                (port for port, upstream, _ in self._port_records if upstream),
+                created=True,
+            )
+
+    def deleted_nodes(self) -> List[Node]:
+        """Return the deleted nodes and their child nodes, parents first."""
+        return list(self._deleted_nodes)
+
+    def _apply(self) -> None:
+        with self.state.batch():
+            self._unregister()
+
+            for connection in self._deleted_connections:
+                self.state.delete_connection(connection)
+            for port in reversed(self._deleted_ports):
+                self.state.delete_port(port)
+            for node in reversed(self._deleted_nodes):
+                self.state.delete_node(node)
+            for graph in reversed(self._deleted_graphs):
+                self.state.delete_graph(graph)
+
+            notify_downstream_ports(
+                (port for port, upstream, _ in self._port_records if upstream),
+                created=False,
+            )
+
+    def _gather(self) -> None:
+        """Gather the nodes, ports, connections and graphs to delete."""
+        selected_ids = {node.uuid() for node in self._nodes}
+        # The nodes given twice or inside another given node are deleted once.
+        top_nodes = {
+            node.uuid(): node
+            for node in self._nodes
+            if not any(
+                ancestor.uuid() in selected_ids for ancestor in ancestor_nodes(node)
+            )
+        }
+        nodes = []
+        for node in top_nodes.values():
+            nodes.append(node)
+            nodes.extend(descendant_nodes(node))
+
+        graphs = [node.graph() for node in nodes]
+
+        ports = [port for node in nodes for port in node.ports()]
+
+        connections: Dict[UUID, Connection] = {}
+        for port in ports:
+            for connection in port.connections(load=False):
+                connections[connection.uuid()] = connection
+
+        self._deleted_graphs = graphs
+        self._deleted_nodes = nodes
+        self._deleted_ports = ports
+        self._deleted_connections = list(connections.values())
+
+    def _unregister(self) -> None:
+        """Remove the deleted objects from the graphs and ports that remain."""
+        graph_ids = {graph.uuid() for graph in self._deleted_graphs}
+        port_ids = {port.uuid() for port in self._deleted_ports}
+
+        graphs: Dict[UUID, Graph] = {}
+        graph_nodes: Dict[UUID, List[Node]] = {}
+        graph_ports: Dict[UUID, List[Port]] = {}
+        graph_connections: Dict[UUID, List[Connection]] = {}
+
+        def add(objects: Dict[UUID, List], graph: Graph, obj: object) -> None:
+            graphs[graph.uuid()] = graph
+            objects.setdefault(graph.uuid(), []).append(obj)
+
+        for node in self._deleted_nodes:
+            parent_graph = node.parent_graph()
+            if parent_graph and parent_graph.uuid() not in graph_ids:
+                add(graph_nodes, parent_graph, node)
+
+        for port in self._deleted_ports:
+            if port.graph().uuid() not in graph_ids:
+                add(graph_ports, port.graph(), port)
+
+        ports: Dict[UUID, Port] = {}
+        port_connection_ids: Dict[UUID, Set[UUID]] = {}
+
+        for connection in self._deleted_connections:
+            if connection.graph().uuid() not in graph_ids:
+                add(graph_connections, connection.graph(), connection)
+
+            for port in (connection.source(), connection.target()):
+                if port.uuid() not in port_ids:
+                    ports[port.uuid()] = port
+                    port_connection_ids.setdefault(port.uuid(), set()).add(
+                        connection.uuid()
+                    )
+
+        self._graph_records = [
+            (
+                graph,
+                graph.unregister_nodes(graph_nodes.get(graph_id, [])),
+                graph.unregister_ports(graph_ports.get(graph_id, [])),
+                graph.unregister_connections(graph_connections.get(graph_id, [])),
+            )
+            for graph_id, graph in graphs.items()
+        ]
+        self._port_records = [
+            (port, *port.unregister_connections(port_connection_ids[port_id]))
+            for port_id, port in ports.items()
+        ]
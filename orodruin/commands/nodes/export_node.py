@@ -1,14 +1,15 @@
 """Export Node command"""
 from __future__ import annotations
 
-import json
-import re
 from pathlib import Path
 from typing import TYPE_CHECKING, Optional
 
 import attr
 
+from orodruin.core.compression import CODECS, get_codec, write_text
 from orodruin.core.library import LibraryManager
+from orodruin.core.serialization.index import index_path, write_indexed
+from orodruin.core.serialization.writer import write_json
 from orodruin.exceptions import LibraryDoesNotExistError
 
 from ..command import Command
@@ -19,13 +20,21 @@ if TYPE_CHECKING:
 
 @attr.s
 class ExportNode(Command):
-    """Export Node command"""
+    """Export Node command
+
+    When a codec is given, the node file is compressed with it,
+    see `orodruin.core.compression`. Otherwise a side index is written
+    next to it to read its nodes one by one,
+    see `orodruin.core.serialization.index`.
+    The files exported for the node with another codec are removed.
+    """
 
     state: State = attr.ib()
     node: Node = attr.ib()
     library_name: str = attr.ib()
     target_name: str = attr.ib(default="orodruin")
     node_name: Optional[str] = attr.ib(default=None)
+    codec: Optional[str] = attr.ib(default=None)
 
     _exported_path: Path = attr.ib(init=False)
 
@@ -40,22 +49,26 @@ class ExportNode(Command):
         if not self.node_name:
             self.node_name = self.node.name()
 
-        self._exported_path = (
-            library.path() / self.target_name / f"{self.node_name}.json"
-        )
+        plain_path = library.path() / self.target_name / f"{self.node_name}.json"
+        suffix = get_codec(self.codec).suffix if self.codec else ""
+        self._exported_path = plain_path.with_name(f"{plain_path.name}{suffix}")
 
         self.node.set_library(library)
 
-        data = self.state.serialize(self.node)
+        data = self.state.serialize(self.node, lazy=True)
 
-        with self._exported_path.open("w") as f:
-            content = json.dumps(
-                data,
-                indent=2,
-                separators=(",", ": "),
-            )
-            content = re.sub(r"\n\s+(\]|\-?\d)", r" \1", content)
-            f.write(content)
+        if self.codec:
+            with write_text(self._exported_path, self.codec) as f:
+                write_json(data, f)
+        else:
+            write_indexed(data, self._exported_path)
+
+        for other_suffix in [""] + [codec.suffix for codec in CODECS.values()]:
+            if other_suffix != suffix:
+                other_path = plain_path.with_name(f"{plain_path.name}{other_suffix}")
+                for path in (other_path, index_path(other_path)):
+                    if path.exists():
+                        path.unlink()
 
         return self._exported_path
 
@@ -1,17 +1,19 @@
-"""Create Node command."""
+"""Group Nodes command."""
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Dict, List
+from typing import TYPE_CHECKING, Dict, List, Optional, Set
 from uuid import UUID
 
 import attr
 
-from orodruin.commands.ports.disconnect_ports import DisconnectPorts
 from orodruin.core.port.port import PortDirection
+from orodruin.core.traversal import descendant_ports
 
 from ..command import Command
-from ..ports import ConnectPorts, CreatePort
+from ..ports import CreatePort
 from .create_node import CreateNode
+from .delete_nodes import DeleteNodes
+from .move_nodes import ConnectionPlan, MoveNodes, check_parent_graph
 
 if TYPE_CHECKING:
     from orodruin.core import Connection, Graph, GraphLike, Node, NodeLike, Port, State
@@ -19,97 +21,119 @@ if TYPE_CHECKING:
 
 @attr.s
 class GroupNodes(Command):
-    """Create Node command."""
+    """Move nodes of a graph into the graph of a new node.
+
+    The connections between the grouped nodes and the rest of the graph
+    go through ports created on the new node: an input port for each outside
+    source port and an output port for each grouped port connected outside.
+
+    The boundary connections are found in a single pass over the ports of the
+    grouped nodes and rewired at once, see `MoveNodes`.
+
+    The new node is given a new type unless `type` is given, see `CreateNode`.
+
+    Raises:
+        NodeError: when one of the nodes isn't in the graph.
+    """
 
     state: State = attr.ib()
     graph: GraphLike = attr.ib()
     nodes: List[NodeLike] = attr.ib()
+    type: Optional[str] = attr.ib(default=None)
 
     _nodes: List[Node] = attr.ib(init=False)
     _graph: Graph = attr.ib(init=False)
     _created_node: Node = attr.ib(init=False)
 
     _created_ports: Dict[UUID, Port] = attr.ib(init=False, factory=dict)
+    _move: MoveNodes = attr.ib(init=False)
+    # Deletes the created node and its ports at once on undo.
+    _deletion: Optional[DeleteNodes] = attr.ib(init=False, default=None)
 
     def __attrs_post_init__(self) -> None:
         self._nodes = [self.state.get_node(node) for node in self.nodes]
         self._graph = self.state.get_graph(self.graph)
+        check_parent_graph(self._nodes, self._graph)
 
     def do(self) -> Node:
+        self._created_ports = {}
 
-        self._created_node = CreateNode(self.state, "NewNode", graph=self._graph).do()
-
-        ingoing_connections: Dict[UUID, List[Connection]] = {}
-
-        for node in self._nodes:
-            self._graph.unregister_node(node.uuid())
-            self._created_node.graph().register_node(node)
-
-            for port in node.ports():
-                self._graph.unregister_port(port.uuid())
-                self._created_node.graph().register_port(port)
-                port.set_graph(self._created_node.graph())
-
-                for connection in port.connections():
-                    if (
-                        connection.source().node() in self._nodes
-                        and connection.target().node() in self._nodes
-                    ):
-                        if connection.graph() == self._graph:
-                            self._graph.unregister_connection(connection)
-                            self._created_node.graph().register_connection(connection)
-                    else:
-                        if port.direction() is PortDirection.input:
-                            source = connection.source()
-                            _connections = ingoing_connections.get(source.uuid(), [])
-                            _connections.append(connection)
-                            ingoing_connections[source.uuid()] = _connections
-                        else:
-                            target = connection.target()
-                            new_port = self._create_or_get_port(
-                                port, PortDirection.output
-                            )
-                            ConnectPorts(
-                                self.state,
-                                self._graph,
-                                new_port,
-                                target,
-                                force=True,
-                            ).do()
-                            ConnectPorts(
-                                self.state,
-                                self._created_node.graph(),
-                                port,
-                                new_port,
-                                force=True,
-                            ).do()
-
-        for source_id, connections in ingoing_connections.items():
-            source_port = self.state.get_port(source_id)
-            new_port = self._create_or_get_port(source_port, PortDirection.input)
-            ConnectPorts(
+        with self.state.batch():
+            self._created_node = CreateNode(
+                self.state, "NewNode", self.type, graph=self._graph
+            ).do()
+            group_graph = self._created_node.graph()
+
+            node_ids = {node.uuid() for node in self._nodes}
+            deleted_connections: List[Connection] = []
+            created_connections: List[ConnectionPlan] = []
+            # Boundary ports already connected to the port they were created for.
+            connected_ids: Set[UUID] = set()
+
+            for connection in self._boundary_connections(node_ids):
+                source = connection.source()
+                target = connection.target()
+                deleted_connections.append(connection)
+
+                if target.node().uuid() in node_ids:
+                    new_port = self._create_or_get_port(source, PortDirection.input)
+                    if new_port.uuid() not in connected_ids:
+                        connected_ids.add(new_port.uuid())
+                        created_connections.append((self._graph, source, new_port))
+                    created_connections.append((group_graph, new_port, target))
+                else:
+                    new_port = self._create_or_get_port(source, PortDirection.output)
+                    if new_port.uuid() not in connected_ids:
+                        connected_ids.add(new_port.uuid())
+                        created_connections.append((group_graph, source, new_port))
+                    created_connections.append((self._graph, new_port, target))
+
+            self._move = MoveNodes(
                 self.state,
+                self._nodes,
                 self._graph,
-                source_port,
-                new_port,
-                force=True,
-            ).do()
-            for connection in connections:
-                DisconnectPorts(
-                    self.state, self._graph, connection.source(), connection.target()
-                ).do()
-                ConnectPorts(
-                    self.state,
-                    self._created_node.graph(),
-                    new_port,
-                    connection.target(),
-                    force=True,
-                ).do()
+                group_graph,
+                deleted_connections,
+                created_connections,
+            )
+            self._move.do()
 
         return self._created_node
 
     def undo(self) -> None:
-        raise NotImplementedError
+        with self.state.batch():
+            self._move.undo()
+            if self._deletion is None:
+                self._deletion = DeleteNodes(self.state, [self._created_node])
+                self._deletion.do()
+            else:
+                self._deletion.redo()
+
+    def redo(self) -> None:
+        if self._deletion is None:
+            return
+
+        with self.state.batch():
+            self._deletion.undo()
+            self._move.redo()
+
+    def _boundary_connections(self, node_ids: Set[UUID]) -> List[Connection]:
+        """Return the connections between the grouped nodes and the graph."""
+        connections: Dict[UUID, Connection] = {}
+
+        for node in self._nodes:
+            for port in node.ports():
+                for connection in port.connections(load=False):
+                    # Skip the connections inside the node's own graph.
+                    if connection.graph().uuid() != self._graph.uuid():
+                        continue
+
+                    source_inside = connection.source().node().uuid() in node_ids
+                    target_inside = connection.target().node().uuid() in node_ids
+                    if source_inside != target_inside:
+                        connections[connection.uuid()] = connection
+
+        return list(connections.values())
 
     def _create_or_get_port(self, origin_port: Port, direction: PortDirection) -> Port:
         """
@@ -129,13 +153,15 @@ class GroupNodes(Command):
                 break
             top_most_parent = parent_port
 
-        new_port = self._create_port(top_most_parent, direction)
+        self._create_port(top_most_parent, direction)
+        for port in descendant_ports(top_most_parent):
+            self._create_port(port, direction)
 
-        return new_port
+        return self._created_ports[origin_port.uuid()]
 
     def _create_port(self, origin_port: Port, direction: PortDirection) -> Port:
         """
-        Recursively creates a port and all its children on the command's created node
+        Creates a port on the command's created node, its parent port must exist
         """
         origin_parent_port = origin_port.parent_port()
         if origin_parent_port:
@@ -154,7 +180,4 @@ class GroupNodes(Command):
 
         self._created_ports[origin_port.uuid()] = new_port
 
-        for port in origin_port.child_ports():
-            self._create_port(port, direction)
-
         return new_port
@@ -1,34 +1,85 @@
 """Import Node command."""
 from __future__ import annotations
 
-import json
-from typing import TYPE_CHECKING
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+from uuid import UUID
 
 import attr
 
 from orodruin.core.library import LibraryManager
+from orodruin.core.resolver import DependencyResolver
+from orodruin.core.serialization.types import CrossingConnections
 from orodruin.exceptions import LibraryDoesNotExistError, NodeNotFoundError
 
 from ..command import Command
+from ..ports import CreatePort
+from .create_node import CreateNode
+from .delete_node import DeleteNode
 
 if TYPE_CHECKING:
-    from orodruin.core import Graph, GraphLike, Node, State
+    from orodruin.core import Graph, GraphLike, Library, Node, Port, State
 
 
 @attr.s
 class ImportNode(Command):
-    """Import Node command."""
+    """Import Node command.
+
+    When `shared` is True, the imported node shares the graph of a read only
+    prototype of the definition, only its own ports are created.
+    Its graph is materialized on the first edit made to it, when its ports
+    are renamed or deleted, and when the connections of its ports
+    to the graph are listed, see `Port.connections`.
+    The shared content itself is read only and always deserialized in full,
+    `lazy` doesn't apply to shared imports and `paths` and
+    `crossing_connections` can't be given with `shared`.
+
+    When `prefetch` is True, the library nodes the imported node depends on
+    are loaded concurrently before it is deserialized. It is off by default
+    as the nodes with few dependencies would pay for the thread or process
+    pool, enable it for nodes with many or deep dependencies.
+    When `processes` is also True, their files are parsed in a process pool
+    instead of threads, see `DependencyResolver`.
+
+    When `lazy` is True, the nested graphs of the imported node are
+    deserialized the first time they are needed.
+
+    When `trusted` is True, the content of the node file isn't validated,
+    see `State.deserialize`.
+
+    When `paths` are given, only the nodes at these absolute paths
+    and their parents are deserialized, see `State.deserialize`.
+    """
 
     state: State = attr.ib()
     graph: GraphLike = attr.ib()
     node_type: str = attr.ib()
     library_name: str = attr.ib()
     target_name: str = attr.ib(default="orodruin")
+    shared: bool = attr.ib(default=False)
+    prefetch: bool = attr.ib(default=False)
+    processes: bool = attr.ib(default=False)
+    lazy: bool = attr.ib(default=False)
+    trusted: bool = attr.ib(default=False)
+    paths: Optional[List[str]] = attr.ib(default=None)
+    crossing_connections: CrossingConnections = attr.ib(
+        default=CrossingConnections.drop
+    )
 
     _graph: Graph = attr.ib(init=False)
     _imported_node: Node = attr.ib(init=False)
+    _deletion: Optional[DeleteNode] = attr.ib(init=False, default=None)
 
     def __attrs_post_init__(self) -> None:
+        if self.shared and (
+            self.paths is not None
+            or self.crossing_connections != CrossingConnections.drop
+        ):
+            raise ValueError(
+                "Shared imports are deserialized in full, "
+                "paths and crossing_connections can't be given."
+            )
+
         self._graph = self.state.get_graph(self.graph)
 
     def do(self) -> Node:
@@ -47,12 +98,79 @@ class ImportNode(Command):
                 f"for target '{self.target_name}'"
             )
 
-        with open(node_path, "r", encoding="utf-8") as handle:
-            data = json.load(handle)
-
-        self._imported_node = self.state.deserialize(data, self._graph)
+        if self.shared:
+            # A file rewritten since gets a new prototype, the nodes sharing
+            # the previous one keep it. The watchers drop the prototypes
+            # by path, see `LibraryWatcher.watch_state`.
+            stat = node_path.stat()
+            key = f"{node_path}:{stat.st_mtime_ns}:{stat.st_size}"
+            prototype = self.state.prototype(key)
+            if prototype is None:
+                data = self._read_node(library, node_path)
+                prototype = self.state.create_prototype(key, data, self.trusted)
+
+            self._imported_node = self._instantiate(prototype)
+        else:
+            data = self._read_node(library, node_path)
+            self._imported_node = self.state.deserialize(
+                data,
+                self._graph,
+                self.lazy,
+                trusted=self.trusted,
+                paths=self.paths,
+                crossing_connections=self.crossing_connections,
+            )
 
         return self._imported_node
 
+    def _read_node(self, library: Library, node_path: Path) -> Dict[str, Any]:
+        """Read the node data, and prefetch its dependencies if needed."""
+        data = library.read_node(node_path)
+
+        if self.prefetch:
+            DependencyResolver(self.target_name, processes=self.processes).prefetch(
+                data
+            )
+
+        return data
+
+    def _instantiate(self, prototype: Node) -> Node:
+        """Create a node sharing the graph of the given prototype."""
+        node = CreateNode(
+            self.state,
+            prototype.name(),
+            prototype.type(),
+            prototype.library(),
+            self._graph,
+        ).do()
+
+        created_ports: Dict[UUID, Port] = {}
+        for prototype_port in prototype.ports():
+            parent_port = prototype_port.parent_port()
+            port = CreatePort(
+                self.state,
+                node,
+                prototype_port.name(),
+                prototype_port.direction(),
+                prototype_port.type(),
+                created_ports[parent_port.uuid()] if parent_port else None,
+            ).do()
+            port.set(prototype_port.get())
+            created_ports[prototype_port.uuid()] = port
+
+        node.graph().set_shared_graph(prototype.graph())
+
+        return node
+
     def undo(self) -> None:
-        """Command is not undoable."""
+        if self._deletion is None:
+            self._deletion = DeleteNode(self.state, self._imported_node)
+            self._deletion.do()
+        else:
+            self._deletion.redo()
+
+    def redo(self) -> None:
+        if self._deletion is None:
+            return
+        # Restore the same objects rather than reading and deserializing again.
+        self._deletion.undo()
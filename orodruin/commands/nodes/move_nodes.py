@@ -0,0 +1,181 @@
+"""Move Nodes command."""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, List, Tuple
+from uuid import UUID
+
+import attr
+
+from orodruin.core.utils import (
+    DetachedConnections,
+    detach_connections,
+    get_unique_node_name,
+    notify_downstream_ports,
+    reattach_connections,
+)
+from orodruin.exceptions import NodeError
+
+from ..command import Command
+
+if TYPE_CHECKING:
+    from orodruin.core import Connection, Graph, Node, Port, State
+    from orodruin.core.ids import IndexedIds
+
+ConnectionPlan = Tuple["Graph", "Port", "Port"]
+"""The graph, source and target port of a connection to create."""
+
+
+@attr.s
+class MoveNodes(Command):
+    """Move nodes with their ports to another graph, rewiring their connections.
+
+    The connections between the moved nodes move with them,
+    the given connections are deleted and the planned ones are created,
+    each in a single pass. The moved nodes are renamed if their name
+    is already taken in the target graph.
+
+    Used by `GroupNodes` and `UngroupNodes` to rewire their boundary connections.
+
+    Raises:
+        NodeError: when one of the nodes isn't in the source graph.
+    """
+
+    state: State = attr.ib()
+    nodes: List[Node] = attr.ib()
+    source: Graph = attr.ib()
+    target: Graph = attr.ib()
+    deleted_connections: List[Connection] = attr.ib(factory=list)
+    created_connections: List[ConnectionPlan] = attr.ib(factory=list)
+
+    _ports: List[Port] = attr.ib(init=False, factory=list)
+    _inner_connections: List[Connection] = attr.ib(init=False, factory=list)
+    _created: List[Connection] = attr.ib(init=False, factory=list)
+    _old_names: Dict[UUID, str] = attr.ib(init=False, factory=dict)
+
+    _deletion: DetachedConnections = attr.ib(init=False, factory=lambda: ([], [], []))
+    _node_record: IndexedIds = attr.ib(init=False, factory=list)
+    _port_record: IndexedIds = attr.ib(init=False, factory=list)
+    _inner_record: IndexedIds = attr.ib(init=False, factory=list)
+
+    def __attrs_post_init__(self) -> None:
+        check_parent_graph(self.nodes, self.source)
+
+    def do(self) -> List[Node]:
+        node_ids = {node.uuid() for node in self.nodes}
+        self._ports = [port for node in self.nodes for port in node.ports()]
+
+        inner_connections: Dict[UUID, Connection] = {}
+        for port in self._ports:
+            for connection in port.connections(source=False, target=True, load=False):
+                if (
+                    connection.graph().uuid() == self.source.uuid()
+                    and connection.target().node().uuid() in node_ids
+                ):
+                    inner_connections[connection.uuid()] = connection
+        self._inner_connections = list(inner_connections.values())
+
+        self._created = []
+        self._apply()
+
+        return self.nodes
+
+    def undo(self) -> None:
+        with self.state.batch():
+            detach_connections(self._created)
+            for connection in self._created:
+                self.state.delete_connection(connection)
+
+            self.target.unregister_connections(self._inner_connections)
+            self.source.register_connections(self._inner_record)
+            for connection in self._inner_connections:
+                connection.set_graph(self.source)
+
+            self.target.unregister_ports(self._ports)
+            self.source.register_ports(self._port_record)
+            for port in self._ports:
+                port.set_graph(self.source)
+
+            self.target.unregister_nodes(self.nodes)
+            self.source.register_nodes(self._node_record)
+            for node in self.nodes:
+                old_name = self._old_names.get(node.uuid())
+                if old_name is not None:
+                    node.set_name(old_name)
+
+            deleted_connections = self._deletion[0]
+            for connection in deleted_connections:
+                self.state.restore_connection(connection)
+            reattach_connections(self._deletion)
+
+            notify_downstream_ports(
+                [connection.target() for connection in self._created], created=False
+            )
+            notify_downstream_ports(
+                [connection.target() for connection in deleted_connections],
+                created=True,
+            )
+
+    def redo(self) -> None:
+        self._apply()
+
+    def _apply(self) -> None:
+        with self.state.batch():
+            self._deletion = detach_connections(self.deleted_connections)
+            for connection in self.deleted_connections:
+                self.state.delete_connection(connection)
+
+            self._old_names = {}
+            self._node_record = self.source.unregister_nodes(self.nodes)
+            for node in self.nodes:
+                name = get_unique_node_name(self.target, node.name())
+                if name != node.name():
+                    self._old_names[node.uuid()] = node.name()
+                    node.set_name(name)
+                self.target.register_node(node)
+
+            self._port_record = self.source.unregister_ports(self._ports)
+            for port in self._ports:
+                port.set_graph(self.target)
+                self.target.register_port(port)
+
+            self._inner_record = self.source.unregister_connections(
+                self._inner_connections
+            )
+            for connection in self._inner_connections:
+                connection.set_graph(self.target)
+                self.target.register_connection(connection)
+
+            if self._created:
+                for connection in self._created:
+                    self.state.restore_connection(connection)
+                    self._register(connection)
+            else:
+                for graph, source, target in self.created_connections:
+                    connection = self.state.create_connection(graph, source, target)
+                    self._register(connection)
+                    self._created.append(connection)
+
+            notify_downstream_ports(
+                [connection.target() for connection in self.deleted_connections],
+                created=False,
+            )
+            notify_downstream_ports(
+                [connection.target() for connection in self._created], created=True
+            )
+
+    def _register(self, connection: Connection) -> None:
+        connection.graph().register_connection(connection)
+        connection.source().register_downstream_connection(connection)
+        connection.target().register_upstream_connection(connection)
+
+
+def check_parent_graph(nodes: List[Node], graph: Graph) -> None:
+    """Check that the nodes are all in the given graph.
+
+    Raises:
+        NodeError: when one of the nodes isn't in the graph.
+    """
+    for node in nodes:
+        parent_graph = node.parent_graph()
+        if parent_graph is None or parent_graph.uuid() != graph.uuid():
+            raise NodeError(f"Node {node.path()} is not in the given graph.")
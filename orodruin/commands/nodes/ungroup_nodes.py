@@ -0,0 +1,112 @@
+"""Ungroup Nodes command."""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, List
+
+import attr
+
+from ..command import Command
+from .delete_nodes import DeleteNodes
+from .move_nodes import ConnectionPlan, MoveNodes
+
+if TYPE_CHECKING:
+    from orodruin.core import Connection, Graph, Node, NodeLike, Port, State
+
+
+@attr.s
+class UngroupNodes(Command):
+    """Move the child nodes of a node to its parent graph and delete the node.
+
+    The inverse of `GroupNodes`: the connections going through the ports
+    of the node are replaced by direct connections between the outside ports
+    and the child nodes' ports, found in a single pass over the node's graph.
+    """
+
+    state: State = attr.ib()
+    node: NodeLike = attr.ib()
+
+    _node: Node = attr.ib(init=False)
+    _graph: Graph = attr.ib(init=False)
+    # Sub-commands, undone in reverse order.
+    _commands: List[Command] = attr.ib(init=False, factory=list)
+
+    def __attrs_post_init__(self) -> None:
+        self._node = self.state.get_node(self.node)
+        parent_graph = self._node.parent_graph()
+
+        if not parent_graph:
+            raise TypeError(f"Cannot ungroup node {self._node.name()} with no graph.")
+
+        self._graph = parent_graph
+
+    def do(self) -> List[Node]:
+        self._commands = []
+
+        with self.state.batch():
+            node_graph = self._node.graph()
+            nodes = node_graph.nodes()
+            node_id = self._node.uuid()
+
+            deleted_connections: List[Connection] = []
+            created_connections: List[ConnectionPlan] = []
+
+            for connection in node_graph.connections():
+                source = connection.source()
+                target = connection.target()
+                source_outside = source.node().uuid() == node_id
+                target_outside = target.node().uuid() == node_id
+                if not (source_outside or target_outside):
+                    continue
+
+                deleted_connections.append(connection)
+
+                sources = self._outside_sources(source) if source_outside else [source]
+                targets = self._outside_targets(target) if target_outside else [target]
+                created_connections.extend(
+                    (self._graph, outside_source, outside_target)
+                    for outside_source in sources
+                    for outside_target in targets
+                )
+
+            move = MoveNodes(
+                self.state,
+                nodes,
+                node_graph,
+                self._graph,
+                deleted_connections,
+                created_connections,
+            )
+            move.do()
+            self._commands.append(move)
+
+            deletion = DeleteNodes(self.state, [self._node])
+            deletion.do()
+            self._commands.append(deletion)
+
+        return nodes
+
+    def undo(self) -> None:
+        with self.state.batch():
+            for command in reversed(self._commands):
+                command.undo()
+
+    def redo(self) -> None:
+        with self.state.batch():
+            for command in self._commands:
+                command.redo()
+
+    def _outside_sources(self, port: Port) -> List[Port]:
+        """Return the ports connected to a port of the node from its parent graph."""
+        return [
+            connection.source()
+            for connection in port.connections(source=True, target=False, load=False)
+            if connection.graph().uuid() == self._graph.uuid()
+        ]
+
+    def _outside_targets(self, port: Port) -> List[Port]:
+        """Return the ports a port of the node is connected to in its parent graph."""
+        return [
+            connection.target()
+            for connection in port.connections(source=False, target=True, load=False)
+            if connection.graph().uuid() == self._graph.uuid()
+        ]
@@ -1,3 +1,4 @@
+from .connect_many_ports import ConnectManyPorts
 from .connect_ports import ConnectPorts
 from .create_port import CreatePort
 from .delete_port import DeletePort
@@ -7,6 +8,7 @@ from .rename_port import RenamePort
 from .set_port import SetPort
 
 __all__ = [
+    "ConnectManyPorts",
     "ConnectPorts",
     "CreatePort",
     "DeletePort",
@@ -0,0 +1,151 @@
+"""Connect Many Ports command."""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, List, Set, Tuple
+from uuid import UUID
+
+import attr
+
+from orodruin.core.utils import (
+    DetachedConnections,
+    detach_connections,
+    notify_downstream_ports,
+    reattach_connections,
+)
+from orodruin.exceptions import PortAlreadyConnectedError
+
+from ..command import Command
+from .validation import ConnectionValidator
+
+if TYPE_CHECKING:
+    from orodruin.core import Connection, Graph, GraphLike, Port, PortLike, State
+
+
+@attr.s
+class ConnectManyPorts(Command):
+    """Connect many pairs of ports of the same graph at once.
+
+    Every pair is validated before anything is connected, sharing the cached
+    node scopes and type compatibilities, see `ConnectionValidator`.
+    The connections are then created in a single pass and the downstream
+    ports are notified once, instead of once per connection.
+
+    When `force` is True, the existing upstream connections of the targets
+    are deleted, a target can still only be connected once by the command.
+    """
+
+    state: State = attr.ib()
+    graph: GraphLike = attr.ib()
+    pairs: List[Tuple[PortLike, PortLike]] = attr.ib()
+    force: bool = attr.ib(default=False)
+    trusted: bool = attr.ib(default=False)
+
+    _graph: Graph = attr.ib(init=False)
+    _pairs: List[Tuple[Port, Port]] = attr.ib(init=False)
+    _created_connections: List[Connection] = attr.ib(init=False, factory=list)
+    _deleted_connections: List[Connection] = attr.ib(init=False, factory=list)
+    _deletion: DetachedConnections = attr.ib(init=False, factory=lambda: ([], [], []))
+
+    def __attrs_post_init__(self) -> None:
+        self._graph = self.state.get_graph(self.graph)
+        self._pairs = [
+            (self.state.get_port(source), self.state.get_port(target))
+            for source, target in self.pairs
+        ]
+
+    def do(self) -> List[Connection]:
+        """Connect each source port to its target port.
+
+        Raises:
+            PortAlreadyConnectedError: when connecting to an already connected port
+                and the force argument is False, or when connecting a target twice.
+            See `ConnectPorts.do` for the validation errors.
+        """
+        self._graph.ensure_editable()
+        self._validate()
+
+        self._deleted_connections = [
+            connection
+            for _, target in self._pairs
+            for connection in target.connections(source=True, target=False)
+        ]
+
+        self._created_connections = []
+        with self.state.batch():
+            self._delete_existing_connections()
+
+            for source, target in self._pairs:
+                connection = self.state.create_connection(self._graph, source, target)
+                self._register(connection)
+                self._created_connections.append(connection)
+
+            notify_downstream_ports(
+                [connection.target() for connection in self._created_connections],
+                created=True,
+            )
+
+        return self._created_connections
+
+    def undo(self) -> None:
+        """Delete the created connections and restore the forced disconnections."""
+        with self.state.batch():
+            detach_connections(self._created_connections)
+            for connection in self._created_connections:
+                self.state.delete_connection(connection)
+
+            for connection in self._deleted_connections:
+                self.state.restore_connection(connection)
+            reattach_connections(self._deletion)
+
+            notify_downstream_ports(
+                [connection.target() for connection in self._created_connections],
+                created=False,
+            )
+            notify_downstream_ports(
+                [connection.target() for connection in self._deleted_connections],
+                created=True,
+            )
+
+    def redo(self) -> None:
+        """Connect the ports again with the same connections."""
+        with self.state.batch():
+            self._delete_existing_connections()
+
+            for connection in self._created_connections:
+                self.state.restore_connection(connection)
+                self._register(connection)
+
+            notify_downstream_ports(
+                [connection.target() for connection in self._created_connections],
+                created=True,
+            )
+
+    def _validate(self) -> None:
+        validator = ConnectionValidator()
+        target_ids: Set[UUID] = set()
+
+        for source, target in self._pairs:
+            if not self.trusted:
+                validator.validate(self._graph, source, target)
+
+            already_connected = target.uuid() in target_ids or (
+                not self.force and target.connections(source=True, target=False)
+            )
+            if already_connected:
+                raise PortAlreadyConnectedError(
+                    f"Port {source.path()} "
+                    f"cannot be connected to {target.path()}. "
+                    f"port {target.path()} is already connected "
+                    "use `force=True` to connect regardless."
+                )
+            target_ids.add(target.uuid())
+
+    def _delete_existing_connections(self) -> None:
+        self._deletion = detach_connections(self._deleted_connections)
+        for connection in self._deleted_connections:
+            self.state.delete_connection(connection)
+
+    def _register(self, connection: Connection) -> None:
+        self._graph.register_connection(connection)
+        connection.source().register_downstream_connection(connection)
+        connection.target().register_upstream_connection(connection)
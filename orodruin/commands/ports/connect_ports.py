@@ -1,19 +1,15 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, List, Optional
 
 import attr
 
 from orodruin.commands.ports.disconnect_ports import DisconnectPorts
-from orodruin.exceptions import (
-    ConnectionOnSameNodeError,
-    ConnectionToDifferentDirectionError,
-    ConnectionToSameDirectionError,
-    OutOfScopeConnectionError,
-    PortAlreadyConnectedError,
-)
+from orodruin.core.utils import notify_downstream_ports
+from orodruin.exceptions import PortAlreadyConnectedError
 
 from ..command import Command
+from .validation import ConnectionValidator
 
 if TYPE_CHECKING:
     from orodruin.core import Connection, Graph, GraphLike, Port, PortLike, State
@@ -21,18 +17,24 @@ if TYPE_CHECKING:
 
 @attr.s
 class ConnectPorts(Command):
-    """Connect two ports of the same graph."""
+    """Connect two ports of the same graph.
+
+    When `trusted` is True, the scope, direction and type checks are skipped,
+    for connections known to be valid like the ones of a saved file.
+    """
 
     state: State = attr.ib()
     graph: GraphLike = attr.ib()
     source: PortLike = attr.ib()
     target: PortLike = attr.ib()
     force: bool = attr.ib(default=False)
+    trusted: bool = attr.ib(default=False)
 
     _source: Port = attr.ib(init=False)
     _target: Port = attr.ib(init=False)
     _graph: Graph = attr.ib(init=False)
     _created_connection: Optional[Connection] = attr.ib(init=False, default=None)
+    _disconnections: List[DisconnectPorts] = attr.ib(init=False, factory=list)
 
     def __attrs_post_init__(self) -> None:
         self._source = self.state.get_port(self.source)
@@ -55,80 +57,25 @@ class ConnectPorts(Command):
                 different graphs.
             PortAlreadyConnectedError: when connecting to an already connected port
                 and the force argument is False
+            ReadOnlyGraphError: when the graph is read only.
         """
-        if not (
-            self._graph
-            in [
-                self._source.node().graph(),
-                self._source.node().parent_graph(),
-            ]
-            and self._graph
-            in [
-                self._target.node().graph(),
-                self._target.node().parent_graph(),
-            ]
-        ):
-            raise OutOfScopeConnectionError(
-                f"Port {self._source.name()} "
-                f"cannot be connected to {self._target.name()}. "
-                f"Ports don't exist in the same scope"
-            )
-
-        if self._target.node() is self._source.node():
-            raise ConnectionOnSameNodeError(
-                f"Port {self._source.name()} "
-                f"cannot be connected to {self._target.name()}. "
-                "Both ports exist on the same node."
-            )
-
-        try:
-            self._target.type()(self._source.get())
-        except TypeError as e:
-            raise TypeError(
-                f"Port {self._source.name()} "
-                f"cannot be connected to {self._target.name()}. "
-                f"Impossible to cast {self._source.type().__name__} to "
-                f"{self._target.type().__name__}."
-            ) from e
-
-        same_scope_connection = (
-            self._source.node().parent_graph() is not None
-            and self._target.node().parent_graph() is not None
-            and (
-                self._source.node().parent_graph() == self._target.node().parent_graph()
-            )
-        )
-        connection_with_parent = (
-            self._source.node().parent_node() == self._target.node()
-            or self._source.node() == self._target.node().parent_node()
-        )
-        if same_scope_connection:
-            if self._source.direction() == self._target.direction():
-                raise ConnectionToSameDirectionError(
-                    f"Port {self._source.name()} "
-                    f"cannot be connected to {self._target.name()}. "
-                    f"Both ports are {self._source.direction()} ports."
-                )
-        elif connection_with_parent:
-            if self._source.direction() != self._target.direction():
-                raise ConnectionToDifferentDirectionError(
-                    f"Port {self._source.name()} "
-                    f"cannot be connected to {self._target.name()}. "
-                    "Both ports are of different direction. "
-                    "Connection with the parent node "
-                    "can only be of the same direction."
-                )
+        self._graph.ensure_editable()
+
+        if not self.trusted:
+            ConnectionValidator().validate(self._graph, self._source, self._target)
 
         existing_connections = self._target.connections(source=True, target=False)
         if existing_connections:
             if self.force:
                 for connection in existing_connections:
-                    DisconnectPorts(
+                    disconnection = DisconnectPorts(
                         self.state,
                         connection.graph(),
                         connection.source(),
                         connection.target(),
-                    ).do()
+                    )
+                    disconnection.do()
+                    self._disconnections.append(disconnection)
             else:
                 raise PortAlreadyConnectedError(
                     f"Port {self._source.path()} "
@@ -140,20 +87,40 @@ class ConnectPorts(Command):
         self._created_connection = self.state.create_connection(
             self._graph, self._source, self._target
         )
-        self._graph.register_connection(self._created_connection)
-
-        self._source.register_downstream_connection(self._created_connection)
-        self._target.register_upstream_connection(self._created_connection)
-
-        self._notify_downstream_ports(self._target)
+        self._register(self._created_connection)
 
         return self._created_connection
 
     def undo(self) -> None:
-        raise NotImplementedError
+        """Delete the created connection and restore the forced disconnections."""
+        if self._created_connection is None:
+            return
+
+        self._graph.unregister_connection(self._created_connection)
+        self._source.unregister_downstream_connection(self._created_connection)
+        self._target.unregister_upstream_connection(self._created_connection)
+        self.state.delete_connection(self._created_connection)
+
+        notify_downstream_ports([self._target], created=False)
+
+        for disconnection in reversed(self._disconnections):
+            disconnection.undo()
+
+    def redo(self) -> None:
+        """Connect the ports again with the same connection."""
+        if self._created_connection is None:
+            return
+
+        for disconnection in self._disconnections:
+            disconnection.do()
+
+        self.state.restore_connection(self._created_connection)
+        self._register(self._created_connection)
+
+    def _register(self, connection: Connection) -> None:
+        self._graph.register_connection(connection)
+
+        self._source.register_downstream_connection(connection)
+        self._target.register_upstream_connection(connection)
 
-    def _notify_downstream_ports(self, port: Port) -> None:
-        """Recursively notify the downstream ports that a connection was created."""
-        port.upstream_connection_created.emit(port)
-        for connection in port.connections(source=False, target=True):
-            self._notify_downstream_ports(connection.target())
+        notify_downstream_ports([self._target], created=True)
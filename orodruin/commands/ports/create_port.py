@@ -70,4 +70,15 @@ class CreatePort(Command):
         return self._created_port
 
     def undo(self) -> None:
-        raise NotImplementedError
+        self._node.unregister_port(self._created_port)
+        self._graph.unregister_port(self._created_port)
+        if self._parent_port:
+            self._parent_port.remove_child_port(self._created_port)
+        self.state.delete_port(self._created_port)
+
+    def redo(self) -> None:
+        self.state.restore_port(self._created_port)
+        if self._parent_port:
+            self._parent_port.add_child_port(self._created_port)
+        self._graph.register_port(self._created_port)
+        self._node.register_port(self._created_port)
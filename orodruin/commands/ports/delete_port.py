@@ -1,11 +1,14 @@
 """Delete Port command."""
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, List, Optional
 
 import attr
 
+from orodruin.core.traversal import descendant_ports
+
 from ..command import Command
+from .disconnect_ports import DisconnectPorts
 
 if TYPE_CHECKING:
     from orodruin.core import Graph, Node, Port, PortLike, State
@@ -13,7 +16,10 @@ if TYPE_CHECKING:
 
 @attr.s
 class DeletePort(Command):
-    """Delete Port command."""
+    """Delete Port command.
+
+    The child ports and the connections of the port are deleted with it.
+    """
 
     state: State = attr.ib()
     port: PortLike = attr.ib()
@@ -21,17 +27,53 @@ class DeletePort(Command):
     _port: Port = attr.ib(init=False)
     _graph: Graph = attr.ib(init=False)
     _node: Node = attr.ib(init=False)
+    _parent_port: Optional[Port] = attr.ib(init=False, default=None)
+    _node_index: int = attr.ib(init=False, default=0)
+    _graph_index: int = attr.ib(init=False, default=0)
+    _parent_index: int = attr.ib(init=False, default=0)
+    # Commands deleting the child ports and connections, undone in reverse order.
+    _commands: List[Command] = attr.ib(init=False, factory=list)
 
     def __attrs_post_init__(self) -> None:
         self._port = self.state.get_port(self.port)
         self._graph = self._port.graph()
         self._node = self._port.node()
+        self._parent_port = self._port.parent_port()
 
     def do(self) -> None:
-        # TODO: Delete all the connections from/to this node
-        self._node.unregister_port(self.port)
-        self._graph.unregister_port(self.port)
-        self.state.delete_port(self.port)
+        self._port.ensure_editable()
+        self._commands = []
+
+        # The deepest ports first, each one is deleted once its children are.
+        for child_port in reversed(list(descendant_ports(self._port))):
+            self._do(DeletePort(self.state, child_port))
+
+        for connection in self._port.connections():
+            self._do(
+                DisconnectPorts(
+                    self.state,
+                    connection.graph(),
+                    connection.source(),
+                    connection.target(),
+                )
+            )
+
+        if self._parent_port:
+            self._parent_index = self._parent_port.remove_child_port(self._port)
+        self._node_index = self._node.unregister_port(self._port)
+        self._graph_index = self._graph.unregister_port(self._port)
+        self.state.delete_port(self._port)
 
     def undo(self) -> None:
-        raise NotImplementedError
+        self.state.restore_port(self._port)
+        self._graph.register_port(self._port, self._graph_index)
+        self._node.register_port(self._port, self._node_index)
+        if self._parent_port:
+            self._parent_port.add_child_port(self._port, self._parent_index)
+
+        for command in reversed(self._commands):
+            command.undo()
+
+    def _do(self, command: Command) -> None:
+        command.do()
+        self._commands.append(command)
@@ -4,7 +4,7 @@ from typing import TYPE_CHECKING, Optional
 
 import attr
 
-from orodruin.core.utils import find_connection
+from orodruin.core.utils import find_connection, notify_downstream_ports
 
 from ..command import Command
 
@@ -25,6 +25,7 @@ class DisconnectPorts(Command):
     _target: Port = attr.ib(init=False)
     _graph: Graph = attr.ib(init=False)
     _deleted_connection: Optional[Connection] = attr.ib(init=False, default=None)
+    _index: int = attr.ib(init=False, default=0)
 
     def __attrs_post_init__(self) -> None:
         self._source = self.state.get_port(self.source)
@@ -32,25 +33,32 @@ class DisconnectPorts(Command):
         self._graph = self.state.get_graph(self.graph)
 
     def do(self) -> None:
-        """Disconnect the source port from the target port."""
+        """Disconnect the source port from the target port.
+
+        Raises:
+            ReadOnlyGraphError: when the graph is read only.
+        """
+        self._graph.ensure_editable()
+
         self._deleted_connection = find_connection(
             self._graph,
             self._source,
             self._target,
         )
         if self._deleted_connection:
-            self._graph.unregister_connection(self._deleted_connection)
+            self._index = self._graph.unregister_connection(self._deleted_connection)
             self._source.unregister_downstream_connection(self._deleted_connection)
             self._target.unregister_upstream_connection(self._deleted_connection)
             self.state.delete_connection(self._deleted_connection)
 
-        self._notify_downstream_ports(self._target)
+        notify_downstream_ports([self._target], created=False)
 
     def undo(self) -> None:
-        raise NotImplementedError
+        """Restore the deleted connection."""
+        if self._deleted_connection:
+            self.state.restore_connection(self._deleted_connection)
+            self._graph.register_connection(self._deleted_connection, self._index)
+            self._source.register_downstream_connection(self._deleted_connection)
+            self._target.register_upstream_connection(self._deleted_connection)
 
-    def _notify_downstream_ports(self, port: Port) -> None:
-        """Recursively notify the downstream ports that a connection was deleted."""
-        port.upstream_connection_deleted.emit(port)
-        for connection in port.connections(source=False, target=True):
-            self._notify_downstream_ports(connection.target())
+        notify_downstream_ports([self._target], created=True)
@@ -29,6 +29,7 @@ class RenamePort(Command):
         self._port = self.state.get_port(self.port)
 
     def do(self) -> str:
+        self._port.ensure_editable()
         self._old_name = self._port.name()
 
         if self.name == self._old_name:
@@ -23,8 +23,19 @@ class SetPort(Command[PortType]):
     _previous_value: PortType = attr.ib(init=False)
 
     def do(self) -> None:
+        self.port.ensure_editable(content=False)
         self._previous_value = self.port.get()
         self.port.set(self.value)
 
     def undo(self) -> None:
         self.port.set(self._previous_value)
+
+    def merge(self, command: Command) -> bool:
+        """Merge the consecutive edits of the same port, like dragging a slider."""
+        if not isinstance(command, SetPort):
+            return False
+        if command.port.uuid() != self.port.uuid():
+            return False
+
+        self.value = command.value
+        return True
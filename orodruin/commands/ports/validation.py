@@ -0,0 +1,116 @@
+"""Validation of the connections between ports."""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, Optional
+from uuid import UUID
+
+import attr
+
+from orodruin.core.port import PortTypes
+from orodruin.exceptions import (
+    ConnectionOnSameNodeError,
+    ConnectionToDifferentDirectionError,
+    ConnectionToSameDirectionError,
+    OutOfScopeConnectionError,
+)
+
+if TYPE_CHECKING:
+    from orodruin.core import Graph, Node, Port
+
+
+@attr.s(frozen=True, slots=True)
+class NodeScope:
+    """The graphs and parent of a node deciding what its ports connect to."""
+
+    graph_id: UUID = attr.ib()
+    parent_graph_id: Optional[UUID] = attr.ib()
+    parent_node_id: Optional[UUID] = attr.ib()
+
+
+@attr.s
+class ConnectionValidator:
+    """Check that ports can be connected, see `ConnectPorts.do`.
+
+    The scopes of the nodes are cached, validating many connections
+    between the same nodes doesn't walk their graphs again.
+    """
+
+    _scopes: Dict[UUID, NodeScope] = attr.ib(factory=dict)
+
+    def scope(self, node: Node) -> NodeScope:
+        """Return the scope of a node."""
+        scope = self._scopes.get(node.uuid())
+        if scope is None:
+            parent_graph = node.parent_graph()
+            parent_node = parent_graph.parent_node() if parent_graph else None
+            scope = NodeScope(
+                node.graph().uuid(),
+                parent_graph.uuid() if parent_graph else None,
+                parent_node.uuid() if parent_node else None,
+            )
+            self._scopes[node.uuid()] = scope
+        return scope
+
+    def validate(self, graph: Graph, source: Port, target: Port) -> None:
+        """Raise if the source port can't be connected to the target port."""
+        source_node_id = source.node().uuid()
+        target_node_id = target.node().uuid()
+        source_scope = self.scope(source.node())
+        target_scope = self.scope(target.node())
+        graph_id = graph.uuid()
+
+        if not (
+            graph_id in (source_scope.graph_id, source_scope.parent_graph_id)
+            and graph_id in (target_scope.graph_id, target_scope.parent_graph_id)
+        ):
+            raise OutOfScopeConnectionError(
+                f"Port {source.name()} "
+                f"cannot be connected to {target.name()}. "
+                f"Ports don't exist in the same scope"
+            )
+
+        if target_node_id == source_node_id:
+            raise ConnectionOnSameNodeError(
+                f"Port {source.name()} "
+                f"cannot be connected to {target.name()}. "
+                "Both ports exist on the same node."
+            )
+
+        if not PortTypes.conversion(source.type(), target.type()).compatible:
+            raise TypeError(
+                f"Port {source.name()} "
+                f"cannot be connected to {target.name()}. "
+                f"Impossible to cast {source.type().__name__} to "
+                f"{target.type().__name__}."
+            )
+
+        same_scope_connection = (
+            source_scope.parent_graph_id is not None
+            and source_scope.parent_graph_id == target_scope.parent_graph_id
+        )
+        connection_with_parent = (
+            source_scope.parent_node_id == target_node_id
+            or source_node_id == target_scope.parent_node_id
+        )
+        if same_scope_connection:
+            if source.direction() == target.direction():
+                raise ConnectionToSameDirectionError(
+                    f"Port {source.name()} "
+                    f"cannot be connected to {target.name()}. "
+                    f"Both ports are {source.direction()} ports."
+                )
+        elif connection_with_parent:
+            if source.direction() != target.direction():
+                raise ConnectionToDifferentDirectionError(
+                    f"Port {source.name()} "
+                    f"cannot be connected to {target.name()}. "
+                    "Both ports are of different direction. "
+                    "Connection with the parent node "
+                    "can only be of the same direction."
+                )
+
+
+__all__ = [
+    "ConnectionValidator",
+    "NodeScope",
+]
@@ -0,0 +1,233 @@
+"""Undo stack of commands."""
+from __future__ import annotations
+
+import logging
+import sys
+from collections import deque
+from enum import Enum
+from typing import TYPE_CHECKING, Any, Deque, List, Optional, Tuple
+
+import attr
+
+from orodruin.exceptions import JournalError
+
+from .command import Command
+
+if TYPE_CHECKING:
+    from .journal import Journal
+
+logger = logging.getLogger(__name__)
+
+_Entry = Tuple[Command, int]
+"""A command of the stack and its estimated size in bytes."""
+
+
+def command_size(command: Command) -> int:
+    """Estimate the memory held by a command and its records, in bytes.
+
+    The commands, containers and state objects it holds are walked,
+    as a command keeps the objects it deleted alive. The state objects
+    refer to each other by uuid, so only their own attributes are counted.
+    The state, libraries, types and enums they refer to are shared,
+    they aren't counted.
+    """
+    # Imported here as the core package depends on the commands.
+    # pylint: disable = import-outside-toplevel
+    from orodruin.core.library import Library
+    from orodruin.core.state import State
+
+    shared_types = (State, Library, type, Enum)
+
+    size = 0
+    seen = set()
+    values: List[Any] = [command]
+
+    while values:
+        value = values.pop()
+        if id(value) in seen or isinstance(value, shared_types):
+            continue
+        seen.add(id(value))
+
+        size += sys.getsizeof(value)
+
+        if isinstance(value, Command) or attr.has(type(value)):
+            attributes = getattr(value, "__dict__", None)
+            if attributes is not None:
+                size += sys.getsizeof(attributes)
+                values.extend(attributes.values())
+        elif isinstance(value, (list, tuple, set, deque)):
+            values.extend(value)
+        elif isinstance(value, dict):
+            values.extend(value.keys())
+            values.extend(value.values())
+
+    return size
+
+
+@attr.s
+class UndoStack:
+    """Stack of the done commands to undo and redo them.
+
+    The commands keep compact records of their changes, like the objects they
+    deleted and their indices, so undoing or redoing a command costs about
+    as much as doing it.
+
+    The history is capped by a memory budget, the oldest commands are dropped
+    once the estimated size of the stack exceeds it, see `command_size`.
+    The size of each command is estimated once, when it is pushed.
+
+    Consecutive commands are merged when the previous one accepts it,
+    see `Command.merge`, like the edits of a port while dragging a slider.
+    Call `seal` to start a new undo step, like when the slider is released.
+
+    When given a journal, the commands, undos and redos are appended to it,
+    see `orodruin.commands.journal`. Call `checkpoint` once the state is saved,
+    the commands done before can't be undone anymore as the journal
+    couldn't replay their undo.
+    """
+
+    memory_budget: int = attr.ib(default=64 * 1024 * 1024)
+    journal: Optional[Journal] = attr.ib(default=None)
+
+    _undo_entries: Deque[_Entry] = attr.ib(init=False, factory=deque)
+    _redo_entries: List[_Entry] = attr.ib(init=False, factory=list)
+    _memory: int = attr.ib(init=False, default=0)
+    _sealed: bool = attr.ib(init=False, default=True)
+    # Number of the oldest commands done before the last checkpoint.
+    _checkpointed: int = attr.ib(init=False, default=0)
+
+    def push(self, command: Command) -> Any:
+        """Do a command and push it on the stack, return the command's result."""
+        if self.journal:
+            result = self.journal.run(command)
+        else:
+            result = command.do()
+
+        self._clear_redo()
+
+        if not self._sealed and self._undo_entries:
+            previous, size = self._undo_entries[-1]
+            if previous.merge(command):
+                # Only the merged command is walked, the previous one replaces
+                # its records with the merged ones rather than adding to them,
+                # like `SetPort`.
+                new_size = max(size, command_size(command))
+                self._undo_entries[-1] = (previous, new_size)
+                self._memory += new_size - size
+                return result
+
+        size = command_size(command)
+        self._undo_entries.append((command, size))
+        self._memory += size
+        self._sealed = False
+
+        self._trim()
+
+        return result
+
+    def undo(self) -> bool:
+        """Undo the last done command, return False if there is none.
+
+        Raises:
+            JournalError: when the command was done before the last checkpoint.
+        """
+        if not self._undo_entries:
+            return False
+        if len(self._undo_entries) <= self._checkpointed:
+            raise JournalError(
+                "Cannot undo a command done before the last checkpoint "
+                "of the journal."
+            )
+
+        entry = self._undo_entries.pop()
+        entry[0].undo()
+        if self.journal:
+            self.journal.record_undo()
+        self._redo_entries.append(entry)
+        self._sealed = True
+
+        return True
+
+    def redo(self) -> bool:
+        """Redo the last undone command, return False if there is none."""
+        if not self._redo_entries:
+            return False
+
+        entry = self._redo_entries.pop()
+        entry[0].redo()
+        if self.journal:
+            self.journal.record_redo()
+        self._undo_entries.append(entry)
+        self._sealed = True
+
+        return True
+
+    def can_undo(self) -> bool:
+        """Return True if there is a command to undo."""
+        return len(self._undo_entries) > self._checkpointed
+
+    def can_redo(self) -> bool:
+        """Return True if there is a command to redo."""
+        return bool(self._redo_entries)
+
+    def undo_count(self) -> int:
+        """Return the number of commands that can be undone."""
+        return len(self._undo_entries) - self._checkpointed
+
+    def redo_count(self) -> int:
+        """Return the number of commands that can be redone."""
+        return len(self._redo_entries)
+
+    def memory(self) -> int:
+        """Return the estimated size of the stack in bytes."""
+        return self._memory
+
+    def seal(self) -> None:
+        """Prevent the next pushed command from merging into the last one."""
+        self._sealed = True
+        if self.journal:
+            self.journal.record_seal()
+
+    def checkpoint(self) -> None:
+        """Empty the journal once the state is saved, see `Journal.checkpoint`.
+
+        The commands done so far can't be undone anymore
+        and the undone ones are dropped, the journal couldn't replay them.
+        """
+        if not self.journal:
+            return
+
+        self.journal.checkpoint()
+        self._clear_redo()
+        self._checkpointed = len(self._undo_entries)
+        self._sealed = True
+
+    def clear(self) -> None:
+        """Drop all the commands of the stack."""
+        self._undo_entries.clear()
+        self._redo_entries.clear()
+        self._memory = 0
+        self._sealed = True
+        self._checkpointed = 0
+
+    def _clear_redo(self) -> None:
+        for _, size in self._redo_entries:
+            self._memory -= size
+        self._redo_entries.clear()
+
+    def _trim(self) -> None:
+        """Drop the oldest commands until the stack fits the memory budget.
+
+        The last command is always kept.
+        """
+        while self._memory > self.memory_budget and len(self._undo_entries) > 1:
+            _, size = self._undo_entries.popleft()
+            self._memory -= size
+            self._checkpointed = max(self._checkpointed - 1, 0)
+            logger.debug("Dropped the oldest undo step, %s bytes.", size)
+
+
+__all__ = [
+    "UndoStack",
+    "command_size",
+]
@@ -3,15 +3,27 @@ from .connection import Connection, ConnectionLike
 from .graph import Graph, GraphLike
 from .library import Library, LibraryManager
 from .node import Node, NodeLike
+from .parallel import parse_files
 from .port import Port, PortDirection, PortLike, PortType, PortTypes
+from .resolver import DependencyResolver
 from .serialization.deserializer import Deserializer
 from .serialization.serializer import SerializationType, Serializer
 from .signal import Signal
 from .state import State
+from .traversal import (
+    ancestor_nodes,
+    descendant_nodes,
+    descendant_ports,
+    downstream_ports,
+    upstream_ports,
+    value_connections,
+)
+from .watcher import LibraryChange, LibraryWatcher
 
 __all__ = [
     "Connection",
     "ConnectionLike",
+    "DependencyResolver",
     "Deserializer",
     "Serializer",
     "SerializationType",
@@ -20,7 +32,9 @@ __all__ = [
     "Graph",
     "GraphLike",
     "Library",
+    "LibraryChange",
     "LibraryManager",
+    "LibraryWatcher",
     "Port",
     "PortDirection",
     "PortLike",
@@ -28,4 +42,11 @@ __all__ = [
     "PortTypes",
     "Signal",
     "State",
+    "ancestor_nodes",
+    "descendant_nodes",
+    "descendant_ports",
+    "downstream_ports",
+    "parse_files",
+    "upstream_ports",
+    "value_connections",
 ]
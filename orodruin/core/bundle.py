@@ -0,0 +1,252 @@
+"""Packed library bundles.
+
+A bundle packs all the node files of a library target in a single file,
+next to the target directory: `<library>/<target>.bundle`.
+
+The file starts with a fixed size preamble (magic, format version and
+header size), followed by a JSON header indexing every node file
+by name to its payload offset, length, hash and codec,
+followed by the payloads themselves.
+
+Bundles are memory mapped so a single node can be read without
+reading the rest of the file.
+
+Pack and unpack library targets from the command line with:
+`orodruin-bundle {pack,unpack} <library path> [target]`
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import logging
+import mmap
+import struct
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import attr
+
+from orodruin.exceptions import BundleError
+
+from .compression import CODECS, decompress
+
+logger = logging.getLogger(__name__)
+
+BUNDLE_SUFFIX = ".bundle"
+# Suffixes of the node files, JSON files and the compressed ones.
+NODE_SUFFIXES = (".json", *(codec.suffix for codec in CODECS.values()))
+
+_MAGIC = b"ORDB"
+_VERSION = 1
+_PREAMBLE = struct.Struct("<4sHI")
+
+
+@attr.s
+class BundleEntry:
+    """Location and description of a payload in a bundle."""
+
+    offset: int = attr.ib()
+    length: int = attr.ib()
+    hash: str = attr.ib()
+    codec: str = attr.ib()
+
+
+@attr.s
+class Bundle:
+    """Read only access to a bundle file."""
+
+    _path: Path = attr.ib()
+
+    _mtime: int = attr.ib(init=False)
+    _entries: Dict[str, BundleEntry] = attr.ib(init=False, factory=dict)
+    _payload_offset: int = attr.ib(init=False, default=0)
+    _buffer: Optional[mmap.mmap] = attr.ib(init=False, default=None)
+
+    def __attrs_post_init__(self) -> None:
+        with self._path.open("rb") as handle:
+            self._mtime = self._path.stat().st_mtime_ns
+
+            preamble = handle.read(_PREAMBLE.size)
+            if len(preamble) != _PREAMBLE.size:
+                raise BundleError(f"{self._path} is not a bundle.")
+
+            magic, version, header_size = _PREAMBLE.unpack(preamble)
+            if magic != _MAGIC:
+                raise BundleError(f"{self._path} is not a bundle.")
+            if version != _VERSION:
+                raise BundleError(
+                    f"Bundle {self._path} has unsupported version {version}."
+                )
+
+            header = json.loads(handle.read(header_size).decode("utf-8"))
+            self._entries = {
+                name: BundleEntry(*entry) for name, entry in header["nodes"].items()
+            }
+            self._payload_offset = _PREAMBLE.size + header_size
+
+            if self._entries:
+                self._buffer = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def path(self) -> Path:
+        """Path of the bundle file."""
+        return self._path
+
+    def mtime(self) -> int:
+        """Modification time of the bundle file when it was opened."""
+        return self._mtime
+
+    def names(self) -> List[str]:
+        """Return the names of the files packed in this bundle."""
+        return list(self._entries)
+
+    def hashes(self) -> Dict[str, str]:
+        """Return the hashes of the packed files, by name."""
+        return {name: entry.hash for name, entry in self._entries.items()}
+
+    def entry(self, name: str) -> Optional[BundleEntry]:
+        """Return the entry of a packed file, if any."""
+        return self._entries.get(name)
+
+    def read(self, name: str) -> bytes:
+        """Return the content of a packed file.
+
+        Raises:
+            KeyError: when no file with the given name is packed.
+            BundleError: when the content doesn't match its hash.
+        """
+        entry = self._entries[name]
+        if self._buffer is None:
+            raise BundleError(f"Bundle {self._path} is closed.")
+
+        start = self._payload_offset + entry.offset
+        payload = self._buffer[start : start + entry.length]
+
+        if entry.codec == "zlib":
+            payload = zlib.decompress(payload)
+
+        if hashlib.sha1(payload).hexdigest() != entry.hash:
+            raise BundleError(f"Corrupted entry {name} in bundle {self._path}.")
+
+        return payload
+
+    def load(self, name: str) -> Dict[str, Any]:
+        """Return the deserialized content of a packed JSON file.
+
+        Packed files compressed with a codec are decompressed,
+        see `orodruin.core.compression`.
+        """
+        return json.loads(decompress(self.read(name)).decode("utf-8"))
+
+    def close(self) -> None:
+        """Release the memory map of the bundle."""
+        if self._buffer is not None:
+            self._buffer.close()
+            self._buffer = None
+
+
+def write_bundle(path: Path, files: Dict[str, bytes], compress: bool = True) -> None:
+    """Write the given file contents to a bundle."""
+    entries = {}
+    payloads = []
+    offset = 0
+
+    for name, content in files.items():
+        payload = zlib.compress(content) if compress else content
+        entries[name] = [
+            offset,
+            len(payload),
+            hashlib.sha1(content).hexdigest(),
+            "zlib" if compress else "none",
+        ]
+        payloads.append(payload)
+        offset += len(payload)
+
+    header = json.dumps({"nodes": entries}).encode("utf-8")
+
+    temporary_path = path.with_name(f"{path.name}.tmp")
+    with temporary_path.open("wb") as handle:
+        handle.write(_PREAMBLE.pack(_MAGIC, _VERSION, len(header)))
+        handle.write(header)
+        for payload in payloads:
+            handle.write(payload)
+    temporary_path.replace(path)
+
+    logger.debug("Wrote bundle %s with %s files.", path, len(files))
+
+
+def is_node_file(file_name: str) -> bool:
+    """Return True for node files, plain or compressed JSON files.
+
+    The side files of a target directory, like indexes, deltas, journals
+    and temporary files, are not node files.
+    """
+    return file_name.endswith(NODE_SUFFIXES)
+
+
+def pack(
+    library_path: Path, target_name: str = "orodruin", compress: bool = True
+) -> Path:
+    """Pack the node files of a library target directory in a bundle."""
+    target_path = library_path / target_name
+    files = {
+        node_path.name: node_path.read_bytes()
+        for node_path in sorted(target_path.iterdir())
+        if is_node_file(node_path.name) and node_path.is_file()
+    }
+
+    bundle_path = library_path / f"{target_name}{BUNDLE_SUFFIX}"
+    write_bundle(bundle_path, files, compress)
+
+    return bundle_path
+
+
+def unpack(library_path: Path, target_name: str = "orodruin") -> List[Path]:
+    """Unpack the bundle of a library target to the target directory."""
+    bundle = Bundle(library_path / f"{target_name}{BUNDLE_SUFFIX}")
+
+    target_path = library_path / target_name
+    target_path.mkdir(exist_ok=True)
+
+    paths = []
+    try:
+        for name in bundle.names():
+            node_path = target_path / name
+            node_path.write_bytes(bundle.read(name))
+            paths.append(node_path)
+    finally:
+        bundle.close()
+
+    return paths
+
+
+def main(args: Optional[Sequence[str]] = None) -> None:
+    """Pack or unpack library targets from the command line."""
+    parser = argparse.ArgumentParser(description="Pack or unpack library targets.")
+    parser.add_argument("action", choices=["pack", "unpack"])
+    parser.add_argument("library", type=Path, help="Path of the library.")
+    parser.add_argument("target", nargs="?", default="orodruin")
+    parser.add_argument(
+        "--no-compress",
+        action="store_true",
+        help="Store the packed files uncompressed.",
+    )
+    parsed = parser.parse_args(args)
+
+    if parsed.action == "pack":
+        print(pack(parsed.library, parsed.target, not parsed.no_compress))
+    else:
+        for path in unpack(parsed.library, parsed.target):
+            print(path)
+
+
+__all__ = [
+    "BUNDLE_SUFFIX",
+    "NODE_SUFFIXES",
+    "Bundle",
+    "BundleEntry",
+    "pack",
+    "unpack",
+    "write_bundle",
+]
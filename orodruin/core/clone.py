@@ -0,0 +1,192 @@
+"""Copy nodes and graphs directly, without serializing them."""
+from __future__ import annotations
+
+import copy
+import logging
+from typing import TYPE_CHECKING, Dict, List, Set, Tuple
+from uuid import UUID
+
+import attr
+
+from orodruin.exceptions import NodeError, ParentToSelfError
+
+from .traversal import ancestor_nodes
+from .utils import get_unique_node_name
+
+if TYPE_CHECKING:
+    from .graph import Graph
+    from .node import Node
+    from .port import Port
+    from .state import State
+
+logger = logging.getLogger(__name__)
+
+
+@attr.s
+class Cloner:
+    """Copy nodes with their ports, values, nested graphs and connections.
+
+    The copies get new UUIDs, the ports of the copied nodes are mapped
+    to their copies to copy the connections between them.
+    The nested graphs are walked iteratively, so deep hierarchies
+    don't hit the recursion limit.
+
+    Call within a batch of the state, see `State.batch`.
+    """
+
+    state: State = attr.ib()
+
+    # Copies of the ports, by the UUID of the copied port.
+    _ports: Dict[UUID, Port] = attr.ib(init=False, factory=dict)
+    # Graphs whose content is still to copy, and the graph to copy it to.
+    _graphs: List[Tuple[Graph, Graph]] = attr.ib(init=False, factory=list)
+
+    def map_port(self, port: Port, copied_port: Port) -> None:
+        """Use an existing port as the copy of a port."""
+        self._ports[port.uuid()] = copied_port
+
+    def copied_port(self, port: Port) -> Port:
+        """Return the copy of a port."""
+        return self._ports[port.uuid()]
+
+    def clone_nodes(
+        self, nodes: List[Node], graph: Graph, keep_input_connections: bool = False
+    ) -> List[Node]:
+        """Copy nodes of the same graph to a graph, return the copies.
+
+        The copies are renamed if their name is already taken in the graph.
+        When keeping the input connections and copying to the same graph,
+        the connections from other nodes to the copied nodes are copied too.
+
+        Raises:
+            NodeError: when the nodes aren't in the same graph.
+            ParentToSelfError: when the graph is inside one of the nodes.
+        """
+        if not nodes:
+            return []
+
+        source_graph = nodes[0].parent_graph()
+        for node in nodes[1:]:
+            parent_graph = node.parent_graph()
+            if (parent_graph and parent_graph.uuid()) != (
+                source_graph and source_graph.uuid()
+            ):
+                raise NodeError(
+                    f"Cannot copy {node.name()} with {nodes[0].name()}, "
+                    "they are not in the same graph."
+                )
+
+        node_ids = {node.uuid() for node in nodes}
+        owner = graph.parent_node()
+        if owner is not None and (
+            owner.uuid() in node_ids
+            or any(ancestor.uuid() in node_ids for ancestor in ancestor_nodes(owner))
+        ):
+            raise ParentToSelfError(
+                f"Cannot copy nodes inside themselves, to the graph of {owner.name()}."
+            )
+        clones = [
+            self._clone_node(node, graph, get_unique_node_name(graph, node.name()))
+            for node in nodes
+        ]
+        self._clone_graphs()
+
+        keep_input_connections = keep_input_connections and (
+            source_graph is not None and source_graph.uuid() == graph.uuid()
+        )
+        seen: Set[UUID] = set()
+        for node in nodes:
+            for port in node.ports():
+                for connection in port.connections(load=False):
+                    if (
+                        connection.uuid() in seen
+                        or source_graph is None
+                        or connection.graph().uuid() != source_graph.uuid()
+                    ):
+                        continue
+                    seen.add(connection.uuid())
+
+                    source = self._ports.get(connection.source().uuid())
+                    target = self._ports.get(connection.target().uuid())
+                    if target is None:
+                        continue
+                    if source is None and keep_input_connections:
+                        source = connection.source()
+                    if source is not None:
+                        self._connect(graph, source, target)
+
+        return clones
+
+    def clone_graph(self, graph: Graph, target_graph: Graph) -> None:
+        """Copy the content of a graph to another, empty, graph.
+
+        The ports of the graph's parent node must be mapped to their copies,
+        see `map_port`.
+        """
+        self._graphs.append((graph, target_graph))
+        self._clone_graphs()
+
+    def _clone_node(self, node: Node, graph: Graph, name: str) -> Node:
+        clone = self.state.create_node(
+            name, node.type(), node.library(), parent_graph_id=graph.uuid()
+        )
+        graph.register_node(clone)
+
+        for port in node.ports():
+            parent_port = port.parent_port()
+            copied_port = self.state.create_port(
+                port.name(),
+                port.direction(),
+                port.type(),
+                clone,
+                graph,
+                self._ports[parent_port.uuid()] if parent_port else None,
+            )
+            graph.register_port(copied_port)
+            clone.register_port(copied_port)
+
+            value = port.get()
+            copied_port.set(copy.deepcopy(getattr(value, "value", value)))
+
+            self._ports[port.uuid()] = copied_port
+
+        self._graphs.append((node.graph(), clone.graph()))
+
+        return clone
+
+    def _clone_graphs(self) -> None:
+        """Copy the content of the graphs to copy, and of their nested graphs."""
+        copied_graphs = []
+
+        while self._graphs:
+            graph, target_graph = self._graphs.pop()
+
+            shared_graph = graph.shared_graph()
+            if shared_graph:
+                target_graph.set_shared_graph(shared_graph)
+            elif not graph.is_loaded():
+                target_graph.set_pending_data(graph.pending_data())
+            else:
+                for node in graph.nodes():
+                    self._clone_node(node, target_graph, node.name())
+                copied_graphs.append((graph, target_graph))
+
+        # The connections are copied once all the ports are.
+        for graph, target_graph in copied_graphs:
+            for connection in graph.connections():
+                self._connect(
+                    target_graph,
+                    self._ports[connection.source().uuid()],
+                    self._ports[connection.target().uuid()],
+                )
+
+    def _connect(self, graph: Graph, source: Port, target: Port) -> None:
+        connection = self.state.create_connection(graph, source, target)
+        graph.register_connection(connection)
+        source.register_downstream_connection(connection)
+        target.register_upstream_connection(connection)
+
+
+__all__ = [
+    "Cloner",
+]
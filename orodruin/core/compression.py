@@ -0,0 +1,183 @@
+"""Compression codecs for serialized files.
+
+Files are compressed with gzip, lzma or zlib from the standard library,
+streamed on read and write. The codec of a file is detected from its header,
+compressed and plain files are read the same way.
+"""
+from __future__ import annotations
+
+import gzip
+import io
+import lzma
+import zlib
+from pathlib import Path
+from typing import IO, Callable, Dict, Optional
+
+import attr
+
+CHUNK_SIZE = 65536
+
+
+class _ZlibReader(io.RawIOBase):
+    """Decompress a zlib stream while it is read."""
+
+    def __init__(self, handle: IO[bytes]) -> None:
+        super().__init__()
+        self._handle = handle
+        self._decompressor = zlib.decompressobj()
+        self._buffer = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: bytearray) -> int:  # type: ignore[override]
+        while not self._buffer and not self._decompressor.eof:
+            chunk = self._handle.read(CHUNK_SIZE)
+            if not chunk:
+                self._buffer = self._decompressor.flush()
+                break
+            self._buffer = self._decompressor.decompress(chunk)
+
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+    def close(self) -> None:
+        if not self.closed:
+            self._handle.close()
+        super().close()
+
+
+class _ZlibWriter(io.RawIOBase):
+    """Compress a zlib stream while it is written."""
+
+    def __init__(self, handle: IO[bytes]) -> None:
+        super().__init__()
+        self._handle = handle
+        self._compressor = zlib.compressobj()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, buffer: bytes) -> int:  # type: ignore[override]
+        self._handle.write(self._compressor.compress(buffer))
+        return len(buffer)
+
+    def close(self) -> None:
+        if not self.closed:
+            self._handle.write(self._compressor.flush())
+            self._handle.close()
+        super().close()
+
+
+def _open_zlib(path: Path, mode: str) -> IO[bytes]:
+    if mode == "rb":
+        return io.BufferedReader(_ZlibReader(path.open("rb")))  # type: ignore[type-var]
+    return io.BufferedWriter(_ZlibWriter(path.open("wb")))  # type: ignore[type-var]
+
+
+@attr.s(frozen=True)
+class Codec:
+    """A compression codec, its file suffix and header magic bytes."""
+
+    name: str = attr.ib()
+    suffix: str = attr.ib()
+    magic: bytes = attr.ib()
+    opener: Callable[[Path, str], IO[bytes]] = attr.ib()
+    decompressor: Callable[[bytes], bytes] = attr.ib()
+
+
+CODECS: Dict[str, Codec] = {
+    codec.name: codec
+    for codec in (
+        Codec(
+            "gzip", ".gz", b"\x1f\x8b", gzip.open, gzip.decompress  # type: ignore[arg-type]
+        ),
+        Codec(
+            "lzma", ".xz", b"\xfd7zXZ\x00", lzma.open, lzma.decompress  # type: ignore[arg-type]
+        ),
+        Codec("zlib", ".zz", b"\x78", _open_zlib, zlib.decompress),
+    )
+}
+
+# Longest magic bytes of the codecs.
+HEADER_SIZE = max(len(codec.magic) for codec in CODECS.values())
+
+
+def detect_codec(header: bytes) -> Optional[Codec]:
+    """Return the codec of a file from its first bytes, None if not compressed."""
+    for codec in CODECS.values():
+        if header.startswith(codec.magic):
+            if codec.name == "zlib" and not _is_zlib_header(header):
+                continue
+            return codec
+    return None
+
+
+def _is_zlib_header(header: bytes) -> bool:
+    """zlib has a single magic byte, check the header checksum too."""
+    return len(header) >= 2 and (header[0] * 256 + header[1]) % 31 == 0
+
+
+def get_codec(name: str) -> Codec:
+    """Return a codec from its name.
+
+    Raises:
+        ValueError: when no codec has this name.
+    """
+    try:
+        return CODECS[name]
+    except KeyError as error:
+        raise ValueError(
+            f"Unknown codec {name}, available codecs are {', '.join(CODECS)}."
+        ) from error
+
+
+def open_read(path: Path) -> IO[bytes]:
+    """Open a file for reading, decompressing it if needed."""
+    with path.open("rb") as handle:
+        header = handle.read(HEADER_SIZE)
+
+    codec = detect_codec(header)
+    if codec is None:
+        return path.open("rb")
+    return codec.opener(path, "rb")
+
+
+def decompress(content: bytes) -> bytes:
+    """Return the decompressed content of a file read in memory, if compressed."""
+    codec = detect_codec(content[:HEADER_SIZE])
+    if codec is None:
+        return content
+    return codec.decompressor(content)
+
+
+def open_write(path: Path, codec: Optional[str] = None) -> IO[bytes]:
+    """Open a file for writing, compressing it with the given codec if any."""
+    if codec is None:
+        return path.open("wb")
+    return get_codec(codec).opener(path, "wb")
+
+
+def read_text(path: Path) -> IO[str]:
+    """Open a text file for reading, decompressing it if needed."""
+    return io.TextIOWrapper(open_read(path), encoding="utf-8")
+
+
+def write_text(path: Path, codec: Optional[str] = None) -> IO[str]:
+    """Open a text file for writing, compressing it with the given codec if any."""
+    return io.TextIOWrapper(open_write(path, codec), encoding="utf-8")
+
+
+__all__ = [
+    "CODECS",
+    "Codec",
+    "decompress",
+    "detect_codec",
+    "get_codec",
+    "open_read",
+    "open_write",
+    "read_text",
+    "write_text",
+]
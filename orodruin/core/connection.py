@@ -6,7 +6,7 @@ from uuid import UUID, uuid4
 import attr
 
 if TYPE_CHECKING:
-    from .graph import Graph
+    from .graph import Graph, GraphLike
     from .port import Port
     from .state import State
 
@@ -30,6 +30,11 @@ class Connection:
         """Return the graph this connection exists in."""
         return self._state.get_graph(self._graph_id)
 
+    def set_graph(self, graph: GraphLike) -> None:
+        """Set the graph this connection exists in."""
+        graph = self._state.get_graph(graph)
+        self._graph_id = graph.uuid()
+
     def source(self) -> Port:
         """Return the source port of this connection."""
         return self._state.get_port(self._source_id)
@@ -1,11 +1,15 @@
 from __future__ import annotations
 
 import logging
-from typing import TYPE_CHECKING, List, Optional, Union
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Union
 from uuid import UUID, uuid4
 
 import attr
 
+from orodruin.exceptions import ReadOnlyGraphError
+
+from .ids import IndexedIds, insert_ids, remove_ids
+from .pathed_object import LazyPath
 from .signal import Signal
 
 if TYPE_CHECKING:
@@ -33,6 +37,17 @@ class Graph:
     _port_ids: List[UUID] = attr.ib(init=False, factory=list)
     _connections_ids: List[UUID] = attr.ib(init=False, factory=list)
 
+    _shared_graph_id: Optional[UUID] = attr.ib(init=False, default=None)
+    _read_only: bool = attr.ib(init=False, default=False)
+    # Data of the parent node whose graph content isn't deserialized yet.
+    _pending_data: Optional[Dict[str, Any]] = attr.ib(
+        init=False, default=None, eq=False, repr=False
+    )
+    # Data of the connections to nodes skipped by a partial load.
+    _stub_connections: List[Dict[str, Any]] = attr.ib(
+        init=False, factory=list, eq=False, repr=False
+    )
+
     # Signals
     node_registered: Signal[Node] = attr.ib(init=False, factory=Signal)
     node_unregistered: Signal[Node] = attr.ib(init=False, factory=Signal)
@@ -49,8 +64,98 @@ class Graph:
         """UUID of this node."""
         return self._uuid
 
+    def shared_graph(self) -> Optional[Graph]:
+        """Return the graph this graph shares its content with, if any."""
+        if self._shared_graph_id:
+            return self._state.get_graph(self._shared_graph_id)
+        return None
+
+    def set_shared_graph(self, graph: Optional[GraphLike]) -> None:
+        """Share the content of another graph until this graph is edited.
+
+        While shared, the nodes, ports and connections of the other graph
+        are returned by this graph's queries.
+        The first edit made to this graph materializes its own copy of the content.
+        """
+        if graph:
+            graph = self._state.get_graph(graph)
+            self._shared_graph_id = graph.uuid()
+            self._state.track_sharing_graph(self)
+        else:
+            self._shared_graph_id = None
+
+    def is_read_only(self) -> bool:
+        """Return True if this graph can't be edited."""
+        return self._read_only
+
+    def set_read_only(self, value: bool) -> None:
+        """Set whether this graph can be edited."""
+        self._read_only = value
+
+    def is_loaded(self) -> bool:
+        """Return False if the content of this graph isn't deserialized yet."""
+        return self._pending_data is None
+
+    def pending_data(self) -> Optional[Dict[str, Any]]:
+        """Return the data the content of this graph will be deserialized from."""
+        return self._pending_data
+
+    def set_pending_data(self, data: Optional[Dict[str, Any]]) -> None:
+        """Defer the deserialization of this graph's content.
+
+        The data is the serialized data of the parent node,
+        its graph is deserialized the first time the content of this graph
+        is queried or edited.
+        """
+        self._pending_data = data
+
+    def load(self) -> None:
+        """Deserialize the pending content of this graph, if any."""
+        if self._pending_data is not None:
+            self._state.load_graph(self)
+
+    def stub_connections(self) -> List[Dict[str, Any]]:
+        """Return the data of the connections to nodes skipped by a partial load.
+
+        Stubs are kept for inspection only, they aren't serialized.
+        """
+        return list(self._stub_connections)
+
+    def add_stub_connection(self, data: Dict[str, Any]) -> None:
+        """Keep the data of a connection to a node skipped by a partial load."""
+        self._stub_connections.append(data)
+
+    def ensure_editable(self) -> None:
+        """Raise if the graph is read only, load it and materialize it if shared.
+
+        Raises:
+            ReadOnlyGraphError: when the graph is read only.
+        """
+        if self._read_only:
+            raise ReadOnlyGraphError(f"Graph {self.uuid()} is read only.")
+
+        self.ensure_content()
+
+    def ensure_content(self) -> None:
+        """Give this graph its own content, if pending or shared.
+
+        The pending content is deserialized, see `set_pending_data`,
+        and the shared content copied, except for read only graphs
+        which keep sharing it, see `set_shared_graph`.
+        """
+        self.load()
+
+        if self._shared_graph_id and not self._read_only:
+            self._state.materialize_graph(self)
+
     def nodes(self) -> List[Node]:
         """Return the nodes registered to this graph."""
+        self.load()
+
+        shared_graph = self.shared_graph()
+        if shared_graph:
+            return shared_graph.nodes()
+
         nodes = []
 
         for node_id in self._node_ids:
@@ -61,6 +166,12 @@ class Graph:
 
     def ports(self) -> List[Port]:
         """Return the ports registered to this graph."""
+        self.load()
+
+        shared_graph = self.shared_graph()
+        if shared_graph:
+            return shared_graph.ports()
+
         ports = []
 
         for port_id in self._port_ids:
@@ -71,6 +182,12 @@ class Graph:
 
     def connections(self) -> List[Connection]:
         """Return the connections registered to this graph."""
+        self.load()
+
+        shared_graph = self.shared_graph()
+        if shared_graph:
+            return shared_graph.connections()
+
         connections = []
 
         for connection_id in self._connections_ids:
@@ -85,61 +202,149 @@ class Graph:
             return self._state.get_node(self._parent_node_id)
         return None
 
-    def register_node(self, node: NodeLike) -> None:
-        """Register an existing node to this graph."""
+    def register_node(self, node: NodeLike, index: Optional[int] = None) -> None:
+        """Register an existing node to this graph, at the given index if any."""
+        self.ensure_editable()
+
         node = self._state.get_node(node)
 
-        self._node_ids.append(node.uuid())
+        if index is None:
+            self._node_ids.append(node.uuid())
+        else:
+            self._node_ids.insert(index, node.uuid())
         node.set_parent_graph(self.uuid())
+        self._state.update_name_index(self.uuid(), None, node.name())
 
         logger.debug(
             "Registered node %s to graph %s",
-            node.path(),
+            LazyPath(node),
             self.uuid(),
         )
 
         self.node_registered.emit(node)
 
-    def unregister_node(self, node: NodeLike) -> None:
-        """Remove a registered node from this graph."""
+    def unregister_node(self, node: NodeLike) -> int:
+        """Remove a registered node from this graph and return its index."""
+        self.ensure_editable()
+
         node = self._state.get_node(node)
 
-        self._node_ids.remove(node.uuid())
+        index = self._node_ids.index(node.uuid())
+        del self._node_ids[index]
         node.set_parent_graph(None)
+        self._state.update_name_index(self.uuid(), node.name(), None)
 
         logger.debug(
             "Unregistered node %s from graph %s",
-            node.path(),
+            LazyPath(node),
             self.uuid(),
         )
 
         self.node_unregistered.emit(node)
 
-    def register_port(self, port: PortLike) -> None:
-        """Register an existing port to this graph."""
+        return index
+
+    def unregister_nodes(self, nodes: Iterable[NodeLike]) -> IndexedIds:
+        """Remove many registered nodes from this graph in a single pass.
+
+        Return the removed nodes' UUIDs and indices, see `register_nodes`.
+        """
+        self.ensure_editable()
+
+        removed_nodes = [self._state.get_node(node) for node in nodes]
+        removed = remove_ids(self._node_ids, {node.uuid() for node in removed_nodes})
+
+        for node in removed_nodes:
+            node.set_parent_graph(None)
+            self._state.update_name_index(self.uuid(), node.name(), None)
+            self.node_unregistered.emit(node)
+
+        logger.debug(
+            "Unregistered %s nodes from graph %s", len(removed_nodes), self.uuid()
+        )
+
+        return removed
+
+    def register_nodes(self, nodes: IndexedIds) -> None:
+        """Register nodes back at their indices, see `unregister_nodes`."""
+        self.ensure_editable()
+
+        insert_ids(self._node_ids, nodes)
+
+        for _, node_id in nodes:
+            node = self._state.get_node(node_id)
+            node.set_parent_graph(self.uuid())
+            self._state.update_name_index(self.uuid(), None, node.name())
+            self.node_registered.emit(node)
+
+        logger.debug("Registered %s nodes to graph %s", len(nodes), self.uuid())
+
+    def register_port(self, port: PortLike, index: Optional[int] = None) -> None:
+        """Register an existing port to this graph, at the given index if any."""
+        self.ensure_editable()
+
         port = self._state.get_port(port)
 
-        self._port_ids.append(port.uuid())
+        if index is None:
+            self._port_ids.append(port.uuid())
+        else:
+            self._port_ids.insert(index, port.uuid())
 
-        logger.debug("Registered port %s to graph %s", port.path(), self.uuid())
+        logger.debug("Registered port %s to graph %s", LazyPath(port), self.uuid())
 
         self.port_registered.emit(port)
 
-    def unregister_port(self, port: PortLike) -> None:
-        """Remove a registered port from this graph."""
+    def unregister_port(self, port: PortLike) -> int:
+        """Remove a registered port from this graph and return its index."""
+        self.ensure_editable()
+
         port = self._state.get_port(port)
 
-        self._port_ids.remove(port.uuid())
+        index = self._port_ids.index(port.uuid())
+        del self._port_ids[index]
 
-        logger.debug("Unregistered port %s from graph %s", port.path(), self.uuid())
+        logger.debug("Unregistered port %s from graph %s", LazyPath(port), self.uuid())
 
         self.port_unregistered.emit(port)
 
-    def register_connection(self, connection: ConnectionLike) -> None:
-        """Register an existing connection to this graph."""
+        return index
+
+    def unregister_ports(self, ports: Iterable[PortLike]) -> IndexedIds:
+        """Remove many registered ports from this graph in a single pass.
+
+        Return the removed ports' UUIDs and indices, see `register_ports`.
+        """
+        self.ensure_editable()
+
+        removed_ports = [self._state.get_port(port) for port in ports]
+        removed = remove_ids(self._port_ids, {port.uuid() for port in removed_ports})
+
+        for port in removed_ports:
+            self.port_unregistered.emit(port)
+
+        return removed
+
+    def register_ports(self, ports: IndexedIds) -> None:
+        """Register ports back at their indices, see `unregister_ports`."""
+        self.ensure_editable()
+
+        insert_ids(self._port_ids, ports)
+
+        for _, port_id in ports:
+            self.port_registered.emit(self._state.get_port(port_id))
+
+    def register_connection(
+        self, connection: ConnectionLike, index: Optional[int] = None
+    ) -> None:
+        """Register an existing connection to this graph, at the given index if any."""
+        self.ensure_editable()
+
         connection = self._state.get_connection(connection)
 
-        self._connections_ids.append(connection.uuid())
+        if index is None:
+            self._connections_ids.append(connection.uuid())
+        else:
+            self._connections_ids.insert(index, connection.uuid())
 
         logger.debug(
             "Registered connection %s to graph %s",
@@ -149,11 +354,14 @@ class Graph:
 
         self.connection_registered.emit(connection)
 
-    def unregister_connection(self, connection: ConnectionLike) -> None:
-        """Remove a registered connection from this graph."""
+    def unregister_connection(self, connection: ConnectionLike) -> int:
+        """Remove a registered connection from this graph and return its index."""
+        self.ensure_editable()
+
         connection = self._state.get_connection(connection)
 
-        self._connections_ids.remove(connection.uuid())
+        index = self._connections_ids.index(connection.uuid())
+        del self._connections_ids[index]
 
         logger.debug(
             "Unregistered connection %s from graph %s",
@@ -163,6 +371,40 @@ class Graph:
 
         self.connection_unregistered.emit(connection)
 
+        return index
+
+    def unregister_connections(
+        self, connections: Iterable[ConnectionLike]
+    ) -> IndexedIds:
+        """Remove many registered connections from this graph in a single pass.
+
+        Return the removed connections' UUIDs and indices,
+        see `register_connections`.
+        """
+        self.ensure_editable()
+
+        removed_connections = [
+            self._state.get_connection(connection) for connection in connections
+        ]
+        removed = remove_ids(
+            self._connections_ids,
+            {connection.uuid() for connection in removed_connections},
+        )
+
+        for connection in removed_connections:
+            self.connection_unregistered.emit(connection)
+
+        return removed
+
+    def register_connections(self, connections: IndexedIds) -> None:
+        """Register connections back at their indices, see `unregister_connections`."""
+        self.ensure_editable()
+
+        insert_ids(self._connections_ids, connections)
+
+        for _, connection_id in connections:
+            self.connection_registered.emit(self._state.get_connection(connection_id))
+
 
 GraphLike = Union[Graph, UUID]
 
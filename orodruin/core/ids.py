@@ -0,0 +1,52 @@
+"""Bulk edits of the ordered lists of UUIDs held by graphs, nodes and ports."""
+from __future__ import annotations
+
+from typing import AbstractSet, List, Tuple
+from uuid import UUID
+
+IndexedIds = List[Tuple[int, UUID]]
+"""UUIDs removed from a list and the indices they were at, in ascending order."""
+
+
+def remove_ids(ids: List[UUID], removed: AbstractSet[UUID]) -> IndexedIds:
+    """Remove the given UUIDs from the list in a single pass.
+
+    Return the removed UUIDs and their indices, to insert them back
+    with `insert_ids`.
+    """
+    removed_ids: IndexedIds = []
+    kept_ids: List[UUID] = []
+
+    for index, uuid in enumerate(ids):
+        if uuid in removed:
+            removed_ids.append((index, uuid))
+        else:
+            kept_ids.append(uuid)
+
+    ids[:] = kept_ids
+
+    return removed_ids
+
+
+def insert_ids(ids: List[UUID], inserted: IndexedIds) -> None:
+    """Insert UUIDs back at their indices in a single pass, see `remove_ids`."""
+    if not inserted:
+        return
+
+    merged_ids: List[UUID] = []
+    remaining = iter(ids)
+
+    for index, uuid in inserted:
+        while len(merged_ids) < index:
+            merged_ids.append(next(remaining))
+        merged_ids.append(uuid)
+
+    merged_ids.extend(remaining)
+    ids[:] = merged_ids
+
+
+__all__ = [
+    "IndexedIds",
+    "insert_ids",
+    "remove_ids",
+]
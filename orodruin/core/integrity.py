@@ -0,0 +1,119 @@
+"""Verify the consistency of nodes, ports and connections.
+
+Trusted deserialization creates objects without the checks the commands run,
+`verify_node` checks the result in a single pass instead.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, List, Set
+
+from orodruin.exceptions import IntegrityError
+
+if TYPE_CHECKING:
+    from .graph import Graph
+    from .node import Node
+
+
+def integrity_errors(node: Node) -> List[str]:
+    """Return the descriptions of the problems found in a node and its content.
+
+    Only the loaded graphs are checked, shared graphs are checked with their
+    prototype.
+    """
+    errors: List[str] = []
+
+    nodes = [node]
+    while nodes:
+        node = nodes.pop()
+        errors.extend(_port_errors(node))
+
+        node_graph = node.graph()
+        if not node_graph.is_loaded() or node_graph.shared_graph():
+            continue
+
+        errors.extend(_graph_errors(node, node_graph))
+        nodes.extend(node_graph.nodes())
+
+    return errors
+
+
+def verify_node(node: Node) -> None:
+    """Verify the consistency of a node and its content.
+
+    Raises:
+        IntegrityError: when any problem is found.
+    """
+    errors = integrity_errors(node)
+    if errors:
+        raise IntegrityError("\n".join(errors))
+
+
+def _port_errors(node: Node) -> List[str]:
+    errors = []
+
+    names: Set[str] = set()
+    for port in node.ports():
+        if port.name() in names:
+            errors.append(f"Node {node.path()} has several ports named {port.name()}.")
+        names.add(port.name())
+
+        if port.graph() is not node.parent_graph():
+            errors.append(f"Port {port.path()} is not in the graph of its node.")
+
+        if not isinstance(port.get(), port.type()):
+            errors.append(f"Port {port.path()} value is not a {port.type().__name__}.")
+
+    return errors
+
+
+def _graph_errors(node: Node, graph: Graph) -> List[str]:
+    errors = []
+
+    names: Set[str] = set()
+    for child in graph.nodes():
+        if child.name() in names:
+            errors.append(f"Node {node.path()} has several nodes named {child.name()}.")
+        names.add(child.name())
+
+        if child.parent_graph() is not graph:
+            errors.append(f"Node {child.path()} is not parented to {node.path()}.")
+
+    for connection in graph.connections():
+        try:
+            source = connection.source()
+            target = connection.target()
+        except KeyError:
+            errors.append(f"Connection {connection.uuid()} has a deleted port.")
+            continue
+
+        for port in (source, target):
+            port_node = port.node()
+            if graph not in (port_node.graph(), port_node.parent_graph()):
+                errors.append(
+                    f"Connection {connection.uuid()} port {port.path()} "
+                    f"is out of the scope of {node.path()}."
+                )
+
+        downstream_ids = [
+            c.uuid() for c in source.connections(source=False, load=False)
+        ]
+        if connection.uuid() not in downstream_ids:
+            errors.append(
+                f"Connection {connection.uuid()} is not registered "
+                f"on its source {source.path()}."
+            )
+
+        upstream_ids = [c.uuid() for c in target.connections(target=False, load=False)]
+        if upstream_ids != [connection.uuid()]:
+            errors.append(
+                f"Connection {connection.uuid()} is not the only connection "
+                f"registered on its target {target.path()}."
+            )
+
+    return errors
+
+
+__all__ = [
+    "integrity_errors",
+    "verify_node",
+]
@@ -1,13 +1,30 @@
 """Orodruin Library Management."""
 
+import hashlib
+import json
+import logging
 import os
+import tempfile
+import threading
+import time
+from contextlib import suppress
 from pathlib import Path
-from typing import List, Optional
+from stat import S_ISDIR, S_ISREG
+from typing import Any, Dict, List, Optional, Tuple
 
 import attr
 
 from orodruin.exceptions import NoRegisteredLibraryError, TargetDoesNotExistError
 
+from .bundle import BUNDLE_SUFFIX, Bundle, is_node_file
+from .compression import CODECS, read_text
+
+logger = logging.getLogger(__name__)
+
+# Files modified this close to an index update may be modified again
+# within the resolution of their modification time, they are hashed again.
+_RACY_NS = 2_000_000_000
+
 
 @attr.s
 class Library:
@@ -18,10 +35,34 @@ class Library:
     of the nodes for the library.
     The generic Nodes are saved in the "orodruin" target.
     Any DCC Specific Node should be defined in the appropriate target folder.
+
+    A target can also be packed in a `<target>.bundle` file next to the folders,
+    see `orodruin.core.bundle`. Nodes of a bundle are found under
+    `<library>/<target>.bundle/<node file>` paths.
+    The files of a target folder take precedence over the packed ones.
+
+    Node files can be compressed, see `orodruin.core.compression`,
+    `<node>.json.gz` is found when looking for `<node>.json`.
     """
 
     _path: Path = attr.ib()
 
+    # target name -> {"mtime": directory mtime, "scanned": time of the update,
+    #                 "nodes": {file name: entry}}
+    _index: Dict[str, Dict[str, Any]] = attr.ib(init=False, factory=dict)
+    _index_loaded: bool = attr.ib(init=False, default=False)
+    # node path -> (file mtime, deserialized data)
+    _definitions: Dict[Path, Tuple[int, Dict[str, Any]]] = attr.ib(
+        init=False, factory=dict
+    )
+    _bundles: Dict[str, Bundle] = attr.ib(init=False, factory=dict)
+    # Guards the index, definitions and bundles, as the nodes are looked up
+    # from several threads and the libraries are watched from another one.
+    _lock: threading.RLock = attr.ib(init=False, factory=threading.RLock)
+
+    cache_env_var = "ORODRUIN_CACHE"
+    index_version = 1
+
     def name(self) -> str:
         """Name of the Library."""
         return self._path.name
@@ -30,30 +71,75 @@ class Library:
         """Path of the Library"""
         return self._path
 
+    @classmethod
+    def cache_path(cls) -> Path:
+        """Path of the folder where the libraries persist their index.
+
+        It is the "ORODRUIN_CACHE" environment variable when set,
+        the orodruin folder of the user's cache folder otherwise.
+        """
+        cache_path = os.environ.get(cls.cache_env_var)
+        if cache_path:
+            return Path(cache_path)
+
+        user_cache = os.environ.get("XDG_CACHE_HOME") or os.environ.get("LOCALAPPDATA")
+        if not user_cache:
+            user_cache = os.path.join(os.path.expanduser("~"), ".cache")
+        return Path(user_cache) / "orodruin"
+
+    def index_path(self) -> Path:
+        """Path of the file persisting the index of this Library.
+
+        The index is kept in the cache folder, keyed by the path of the Library,
+        so looking nodes up never writes into the Library.
+        """
+        library_path = os.path.abspath(self._path)
+        digest = hashlib.sha1(library_path.encode("utf-8")).hexdigest()[:16]
+        return self.cache_path() / "libraries" / f"{self.name()}-{digest}.json"
+
     def target_path(self, target_name: str) -> Optional[Path]:
         """Return the full path of a target from its name."""
-        for target in self._path.iterdir():
-            if target.name == target_name:
-                return target
+        target_path = self._path / target_name
+        if target_path.is_dir():
+            return target_path
         return None
 
     def targets(self) -> List[Path]:
         """Return all the targets of this Library"""
-        return list(self._path.iterdir())
+        return [path for path in self._path.iterdir() if path.is_dir()]
+
+    def target_names(self) -> List[str]:
+        """Return the names of the targets of this Library, packed or not."""
+        names = {path.name for path in self.targets()}
+        names.update(
+            path.stem for path in self._path.glob(f"*{BUNDLE_SUFFIX}") if path.is_file()
+        )
+        return sorted(names)
+
+    def bundle_path(self, target_name: str) -> Path:
+        """Return the path of the bundle packing a target."""
+        return self._path / f"{target_name}{BUNDLE_SUFFIX}"
 
     def nodes(self, target_name: str = "orodruin") -> List[Path]:
         """Return all the node paths for the given target."""
-        target_path = self.target_path(target_name)
+        nodes_index = self._nodes_index(target_name)
+        bundle = self._bundle(target_name)
 
-        if not target_path:
+        if nodes_index is None and bundle is None:
             raise TargetDoesNotExistError(
-                f"Library {self.name} has no target {target_name}"
+                f"Library {self.name()} has no target {target_name}"
             )
 
-        nodes = []
-        for node_path in target_path.iterdir():
-            if node_path.is_file():
-                nodes.append(node_path)
+        nodes: List[Path] = []
+        if nodes_index is not None:
+            target_path = self._path / target_name
+            nodes.extend(target_path / file_name for file_name in nodes_index)
+        if bundle is not None:
+            nodes.extend(
+                bundle.path() / file_name
+                for file_name in bundle.names()
+                if nodes_index is None or file_name not in nodes_index
+            )
 
         return nodes
 
@@ -64,11 +150,401 @@ class Library:
         extension: str = "json",
     ) -> Optional[Path]:
         """Return the path of a the given node for the given target name."""
-        for node_path in self.nodes(target_name):
-            if node_path.stem == node_name and node_path.suffix.endswith(extension):
-                return node_path
+        file_name = f"{node_name}.{extension.lstrip('.')}"
+
+        nodes_index = self._nodes_index(
+            target_name,
+            [file_name] + [f"{file_name}{codec.suffix}" for codec in CODECS.values()],
+        )
+        if nodes_index is not None:
+            if file_name in nodes_index:
+                return self._path / target_name / file_name
+
+            for codec in CODECS.values():
+                if f"{file_name}{codec.suffix}" in nodes_index:
+                    return self._path / target_name / f"{file_name}{codec.suffix}"
+
+        bundle = self._bundle(target_name)
+        if bundle is not None:
+            if bundle.entry(file_name):
+                return bundle.path() / file_name
+
+            for codec in CODECS.values():
+                if bundle.entry(f"{file_name}{codec.suffix}"):
+                    return bundle.path() / f"{file_name}{codec.suffix}"
+        elif nodes_index is None:
+            raise TargetDoesNotExistError(
+                f"Library {self.name()} has no target {target_name}"
+            )
+
         return None
 
+    def read_node(self, node_path: Path) -> Dict[str, Any]:
+        """Return the deserialized data of a node file.
+
+        The data is cached until the file is modified,
+        the returned dictionary is shared and must not be mutated.
+        """
+        mtime = self.node_mtime(node_path)
+
+        with self._lock:
+            cached = self._definitions.get(node_path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        if node_path.parent.suffix == BUNDLE_SUFFIX:
+            data = self._node_bundle(node_path).load(node_path.name)
+        else:
+            with read_text(node_path) as handle:
+                data = json.load(handle)
+
+        with self._lock:
+            self._definitions[node_path] = (mtime, data)
+
+        return data
+
+    def cache_node(
+        self, node_path: Path, data: Dict[str, Any], mtime: Optional[int] = None
+    ) -> None:
+        """Cache the data of a node file parsed elsewhere, see `read_node`.
+
+        Give the modification time of the file taken before it was read,
+        a file modified while it was parsed is then read again.
+        """
+        if mtime is None:
+            mtime = self.node_mtime(node_path)
+        with self._lock:
+            self._definitions[node_path] = (mtime, data)
+
+    def is_node_cached(self, node_path: Path) -> bool:
+        """Return True if the data of a node file is cached and up to date."""
+        mtime = self.node_mtime(node_path)
+        with self._lock:
+            cached = self._definitions.get(node_path)
+        return cached is not None and cached[0] == mtime
+
+    def _node_bundle(self, node_path: Path) -> Bundle:
+        """Return the bundle packing a node file."""
+        bundle = self._bundle(node_path.parent.stem)
+        if bundle is None:
+            raise FileNotFoundError(f"No bundle found at {node_path.parent}")
+        return bundle
+
+    def node_mtime(self, node_path: Path) -> int:
+        """Return the modification time of a node file, or of its bundle."""
+        if node_path.parent.suffix == BUNDLE_SUFFIX:
+            return self._node_bundle(node_path).mtime()
+
+        return node_path.stat().st_mtime_ns
+
+    def update_target(self, target_name: str = "orodruin") -> List[str]:
+        """Update the index and bundle of a target, return the changed file names.
+
+        See `update_index` and `update_bundle`.
+        """
+        changed = []
+        if (self._path / target_name).is_dir():
+            changed.extend(self.update_index(target_name))
+        changed.extend(self.update_bundle(target_name))
+
+        return list(dict.fromkeys(changed))
+
+    def update_bundle(self, target_name: str = "orodruin") -> List[str]:
+        """Reopen the bundle of a target if it changed, return the changed files.
+
+        The files whose hash changed, or that were added or removed, are returned.
+        """
+        with self._lock:
+            old_bundle = self._bundles.get(target_name)
+            old_hashes = old_bundle.hashes() if old_bundle else {}
+
+            bundle = self._update_bundle(target_name)
+            if bundle is old_bundle:
+                return []
+
+            hashes = bundle.hashes() if bundle else {}
+            changed = [
+                name for name, hash_ in hashes.items() if old_hashes.get(name) != hash_
+            ]
+            changed.extend(name for name in old_hashes if name not in hashes)
+
+            bundle_path = self.bundle_path(target_name)
+            for file_name in changed:
+                self._definitions.pop(bundle_path / file_name, None)
+
+        logger.debug(
+            "Updated bundle of target %s of library %s, %s changed files.",
+            target_name,
+            self.name(),
+            len(changed),
+        )
+
+        return changed
+
+    def update_index(self, target_name: str = "orodruin") -> List[str]:
+        """Update the index of a target and return the names of the changed files.
+
+        Only the files whose modification time or size changed,
+        or that were modified too close to the last update to trust them,
+        are hashed again. The files whose hash changed are returned,
+        with the added and removed ones.
+        """
+        with self._lock:
+            return self._update_index(target_name)
+
+    def _update_index(self, target_name: str) -> List[str]:
+        target_path = self._path / target_name
+
+        self._load_index()
+        target_index = self._index.get(target_name, {"mtime": None, "nodes": {}})
+        old_entries: Dict[str, Dict[str, Any]] = target_index["nodes"]
+
+        scanned_time = time.time_ns()
+        target_mtime = target_path.stat().st_mtime_ns
+
+        entries = {}
+        changed = []
+        with os.scandir(target_path) as scanned:
+            for dir_entry in scanned:
+                if not is_node_file(dir_entry.name) or not dir_entry.is_file():
+                    continue
+
+                old_entry = old_entries.get(dir_entry.name)
+                entry = _index_entry(
+                    Path(dir_entry.path),
+                    dir_entry.stat(),
+                    old_entry,
+                    target_index.get("scanned", 0),
+                )
+                if old_entry is None or entry["hash"] != old_entry["hash"]:
+                    changed.append(dir_entry.name)
+                entries[dir_entry.name] = entry
+
+        changed.extend(name for name in old_entries if name not in entries)
+
+        for file_name in changed:
+            self._definitions.pop(target_path / file_name, None)
+
+        self._index[target_name] = {
+            "mtime": target_mtime,
+            "scanned": scanned_time,
+            "nodes": entries,
+        }
+
+        if changed or target_index["mtime"] != target_mtime:
+            self._save_index()
+
+        logger.debug(
+            "Updated index of target %s of library %s, %s changed files.",
+            target_name,
+            self.name(),
+            len(changed),
+        )
+
+        return changed
+
+    def _nodes_index(
+        self, target_name: str, file_names: Optional[List[str]] = None
+    ) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Return the index entries of a target, updating them if they changed.
+
+        When file names are given and the target folder wasn't modified since
+        the last update, only the entries of these files that may be out of date
+        are updated, see `update_index`. Files can't be added or removed without
+        modifying the folder, the files missing from the index are only checked
+        when the folder was modified too close to the last update to trust it.
+        Return None if the library has no folder for the target.
+        """
+        self._load_index()
+
+        target_path = self._path / target_name
+
+        with self._lock:
+            try:
+                target_stat = target_path.stat()
+            except OSError:
+                return None
+            if not S_ISDIR(target_stat.st_mode):
+                return None
+
+            target_index = self._index.get(target_name)
+            if (
+                target_index is None
+                or file_names is None
+                or target_index["mtime"] != target_stat.st_mtime_ns
+            ):
+                self.update_index(target_name)
+                return self._index[target_name]["nodes"]
+
+            scanned_time = target_index.get("scanned", 0)
+            racy_folder = target_index["mtime"] >= scanned_time - _RACY_NS
+
+            stale_names = [
+                file_name
+                for file_name in file_names
+                if (racy_folder or file_name in target_index["nodes"])
+                and self._is_file_stale(target_index, target_path / file_name)
+            ]
+            if stale_names:
+                self._update_entries(target_name, stale_names)
+
+            return target_index["nodes"]
+
+    @staticmethod
+    def _is_file_stale(target_index: Dict[str, Any], path: Path) -> bool:
+        """Return True if the index entry of a file may be out of date."""
+        entry = target_index["nodes"].get(path.name)
+        try:
+            stat = path.stat()
+        except OSError:
+            return entry is not None
+
+        return entry is None or _is_stale(entry, stat, target_index.get("scanned", 0))
+
+    def _update_entries(self, target_name: str, file_names: List[str]) -> List[str]:
+        """Update the index entries of some files of a target, see `update_index`."""
+        target_path = self._path / target_name
+        target_index = self._index[target_name]
+        entries: Dict[str, Dict[str, Any]] = target_index["nodes"]
+
+        changed = []
+        for file_name in file_names:
+            path = target_path / file_name
+            old_entry = entries.get(file_name)
+            try:
+                stat = path.stat()
+            except OSError:
+                stat = None
+
+            if stat is None or not is_node_file(file_name) or not S_ISREG(stat.st_mode):
+                if entries.pop(file_name, None) is not None:
+                    changed.append(file_name)
+                continue
+
+            entry = _index_entry(path, stat, old_entry, target_index.get("scanned", 0))
+            if old_entry is None or entry["hash"] != old_entry["hash"]:
+                changed.append(file_name)
+            entries[file_name] = entry
+
+        for file_name in changed:
+            self._definitions.pop(target_path / file_name, None)
+
+        if changed:
+            self._save_index()
+
+        logger.debug(
+            "Updated %s index entries of target %s of library %s, %s changed files.",
+            len(file_names),
+            target_name,
+            self.name(),
+            len(changed),
+        )
+
+        return changed
+
+    def _bundle(self, target_name: str) -> Optional[Bundle]:
+        """Return the opened bundle of a target, reopening it if it changed."""
+        with self._lock:
+            return self._update_bundle(target_name)
+
+    def _update_bundle(self, target_name: str) -> Optional[Bundle]:
+        bundle = self._bundles.get(target_name)
+
+        try:
+            mtime = self.bundle_path(target_name).stat().st_mtime_ns
+        except OSError:
+            mtime = None
+
+        if bundle is not None and bundle.mtime() != mtime:
+            bundle.close()
+            del self._bundles[target_name]
+            bundle = None
+
+        if bundle is None and mtime is not None:
+            bundle = Bundle(self.bundle_path(target_name))
+            self._bundles[target_name] = bundle
+
+        return bundle
+
+    def _load_index(self) -> None:
+        """Load the index persisted on disk, if any."""
+        if self._index_loaded:
+            return
+
+        with self._lock:
+            if not self._index_loaded:
+                self._read_index()
+                self._index_loaded = True
+
+    def _read_index(self) -> None:
+        try:
+            with self.index_path().open("r", encoding="utf-8") as handle:
+                data = json.load(handle)
+        except (OSError, ValueError):
+            return
+
+        if data.get("version") == self.index_version:
+            self._index = data["targets"]
+
+    def _save_index(self) -> None:
+        """Persist the index on disk, it is skipped if the cache isn't writable."""
+        index_path = self.index_path()
+
+        data = {"version": self.index_version, "targets": self._index}
+
+        # Each process writes its own temporary file, the last replace wins.
+        temporary_name = None
+        try:
+            index_path.parent.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                "w",
+                encoding="utf-8",
+                dir=index_path.parent,
+                prefix=f"{index_path.name}.",
+                suffix=".tmp",
+                delete=False,
+            ) as handle:
+                temporary_name = handle.name
+                json.dump(data, handle)
+            os.replace(temporary_name, index_path)
+        except OSError:
+            logger.debug("Could not write the index of library %s.", self.name())
+            if temporary_name is not None:
+                with suppress(OSError):
+                    os.remove(temporary_name)
+
+
+def _is_stale(entry: Dict[str, Any], stat: os.stat_result, scanned_time: int) -> bool:
+    """Return True if a file may have changed since its index entry was made."""
+    return (
+        entry["mtime"] != stat.st_mtime_ns
+        or entry["size"] != stat.st_size
+        or entry["mtime"] >= scanned_time - _RACY_NS
+    )
+
+
+def _index_entry(
+    path: Path,
+    stat: os.stat_result,
+    entry: Optional[Dict[str, Any]],
+    scanned_time: int,
+) -> Dict[str, Any]:
+    """Return the index entry of a file, hashing it again if it may have changed."""
+    if entry is not None and not _is_stale(entry, stat, scanned_time):
+        return entry
+
+    return {
+        "mtime": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "hash": _file_hash(path),
+    }
+
+
+def _file_hash(path: Path) -> str:
+    """Return the hash of the content of a file."""
+    with path.open("rb") as handle:
+        return hashlib.sha1(handle.read()).hexdigest()
+
 
 class LibraryManager:
     """Manager Class for multiple Libraries.
@@ -79,6 +555,11 @@ class LibraryManager:
 
     libraries_env_var = "ORODRUIN_LIBRARIES"
 
+    # Libraries cached for the last seen value of the environment variable.
+    _libraries_string: Optional[str] = None
+    _libraries: List[Library] = []
+    _libraries_by_name: Dict[str, Library] = {}
+
     def __init__(self) -> None:
         raise NotImplementedError(
             f"Type {self.__class__.__name__} cannot be instantiated."
@@ -89,10 +570,36 @@ class LibraryManager:
         """List all the registered libraries."""
         libraries_string = os.environ.get(cls.libraries_env_var)
 
-        if not libraries_string:
-            return []
+        if libraries_string != cls._libraries_string:
+            cls._update_libraries(libraries_string)
 
-        return [Library(Path(p)) for p in libraries_string.split(";")]
+        return list(cls._libraries)
+
+    @classmethod
+    def _update_libraries(cls, libraries_string: Optional[str]) -> None:
+        """Update the cached libraries, keeping the ones still registered."""
+        existing = {library.path(): library for library in cls._libraries}
+
+        libraries = []
+        if libraries_string:
+            for path_string in libraries_string.split(";"):
+                path = Path(path_string)
+                libraries.append(existing.get(path) or Library(path))
+
+        cls._cache_libraries(libraries, libraries_string)
+
+    @classmethod
+    def _cache_libraries(
+        cls, libraries: List[Library], libraries_string: Optional[str]
+    ) -> None:
+        """Cache the given libraries for the given environment variable value."""
+        libraries_by_name: Dict[str, Library] = {}
+        for library in libraries:
+            libraries_by_name.setdefault(library.name(), library)
+
+        cls._libraries = libraries
+        cls._libraries_by_name = libraries_by_name
+        cls._libraries_string = libraries_string
 
     @classmethod
     def register_library(cls, path: Path) -> Library:
@@ -105,11 +612,15 @@ class LibraryManager:
             raise NotADirectoryError(f"path `{path}` is not a directory.")
 
         libraries = cls.libraries()
+        for library in libraries:
+            if library.path() == path:
+                return library
+
         library = Library(path)
-        if path not in libraries:
-            libraries.append(library)
+        libraries.append(library)
 
         cls._set_libraries_var(libraries)
+
         return library
 
     @classmethod
@@ -124,6 +635,7 @@ class LibraryManager:
         """Set the environment variable with the given libraries."""
         libraries_string = ";".join([str(l.path()) for l in libraries])
         os.environ[cls.libraries_env_var] = libraries_string
+        cls._cache_libraries(libraries, libraries_string)
 
     @classmethod
     def find_node(
@@ -164,8 +676,5 @@ class LibraryManager:
     @classmethod
     def find_library(cls, name: str) -> Optional[Library]:
         """Get a Library instance from a name."""
-        for library in cls.libraries():
-            if library.name() == name:
-                return library
-
-        return None
+        cls.libraries()
+        return cls._libraries_by_name.get(name)
@@ -0,0 +1,80 @@
+"""Unique names of the nodes of a graph and of the ports of a node."""
+from __future__ import annotations
+
+import re
+from typing import Dict, Set, Tuple
+
+import attr
+
+NAME_PATTERN = re.compile(r"^(?P<basename>.*?)(?P<index>\d*)?$")
+
+
+def split_name(name: str) -> Tuple[str, int]:
+    """Split a name into its base name and its trailing index, 0 if none."""
+    match = NAME_PATTERN.match(name)
+    if not match:
+        raise NameError(f"{name} did not match regex pattern {NAME_PATTERN}")
+
+    groups = match.groupdict()
+    index_str = groups.get("index")
+
+    return groups["basename"], int(index_str) if index_str else 0
+
+
+@attr.s
+class NameIndex:
+    """Set of the names of a graph's nodes or a node's ports.
+
+    Unique names are found without walking the siblings,
+    the next free index of each base name is remembered
+    so creating many nodes of the same name doesn't test every index again.
+    """
+
+    _names: Set[str] = attr.ib(factory=set)
+    # All the names `basename + str(index)` below the next index are taken.
+    _next_indices: Dict[str, int] = attr.ib(init=False, factory=dict)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._names
+
+    def add(self, name: str) -> None:
+        """Add a name to the index."""
+        self._names.add(name)
+
+    def discard(self, name: str) -> None:
+        """Remove a name from the index, if present."""
+        self._names.discard(name)
+
+        basename, index = split_name(name)
+        next_index = self._next_indices.get(basename)
+        if next_index is not None and 0 < index < next_index:
+            if name == f"{basename}{index}":
+                self._next_indices[basename] = index
+
+    def unique_name(self, name: str) -> str:
+        """Return the name, or the first free name with a higher index.
+
+        See `orodruin.core.utils.get_unique_node_name`.
+        """
+        if name not in self._names:
+            return name
+
+        basename, index = split_name(name)
+        start = index + 1
+        next_index = self._next_indices.get(basename, 1)
+
+        index = max(start, next_index)
+        while f"{basename}{index}" in self._names:
+            index += 1
+
+        if start <= next_index:
+            self._next_indices[basename] = index
+
+        return f"{basename}{index}"
+
+
+__all__ = [
+    "NAME_PATTERN",
+    "NameIndex",
+    "split_name",
+]
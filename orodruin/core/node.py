@@ -8,7 +8,9 @@ from uuid import UUID, uuid4
 import attr
 
 from .graph import Graph, GraphLike
+from .pathed_object import LazyPath
 from .signal import Signal
+from .traversal import ancestor_nodes
 
 if TYPE_CHECKING:
     from .library import Library  # pylint: disable = cyclic-import
@@ -67,6 +69,9 @@ class Node:
         old_name = self._name
         self._name = name
 
+        if self._parent_graph_id:
+            self._state.update_name_index(self._parent_graph_id, old_name, name)
+
         logger.debug("Renamed node %s to %s.", old_name, name)
 
         self.name_changed.emit(name)
@@ -89,16 +94,21 @@ class Node:
 
     def path(self) -> PurePosixPath:
         """Absolute Path of this node."""
-        parent = self.parent_node()
-        if parent:
-            path = parent.path() / self.name()
-        else:
-            path = PurePosixPath(f"/{self.name()}")
+        names = [self.name()]
+        names.extend(parent.name() for parent in ancestor_nodes(self))
+        names.reverse()
 
-        return path
+        return PurePosixPath("/", *names)
 
     def relative_path(self, relative_to: Node) -> PurePosixPath:
         """Path of the Node relative to another one."""
+        names = [self.name()]
+        for parent in ancestor_nodes(self):
+            if parent.uuid() == relative_to.uuid():
+                names.reverse()
+                return PurePosixPath(*names)
+            names.append(parent.name())
+
         return self.path().relative_to(relative_to.path())
 
     def ports(self) -> List[Port]:
@@ -144,26 +154,36 @@ class Node:
 
         raise NameError(f"Node {self.name()} has no port named {name}")
 
-    def register_port(self, port: PortLike) -> None:
-        """Register an existing port to this node."""
+    def register_port(self, port: PortLike, index: Optional[int] = None) -> None:
+        """Register an existing port to this node, at the given index if any."""
         port = self._state.get_port(port)
 
-        self._port_ids.append(port.uuid())
+        if index is None:
+            self._port_ids.append(port.uuid())
+        else:
+            self._port_ids.insert(index, port.uuid())
+        self._state.update_name_index(self.uuid(), None, port.name())
 
-        logger.debug("Registered port %s to node %s", port.path(), self.path())
+        logger.debug("Registered port %s to node %s", LazyPath(port), LazyPath(self))
 
         self.port_registered.emit(port)
 
-    def unregister_port(self, port: PortLike) -> None:
-        """Remove a registered port from this node."""
+    def unregister_port(self, port: PortLike) -> int:
+        """Remove a registered port from this node and return its index."""
         port = self._state.get_port(port)
 
-        self._port_ids.remove(port.uuid())
+        index = self._port_ids.index(port.uuid())
+        del self._port_ids[index]
+        self._state.update_name_index(self.uuid(), port.name(), None)
 
-        logger.debug("Unregistered port %s from node %s", port.path(), self.path())
+        logger.debug(
+            "Unregistered port %s from node %s", LazyPath(port), LazyPath(self)
+        )
 
         self.port_unregistered.emit(port)
 
+        return index
+
 
 NodeLike = Union[Node, UUID]
 
@@ -0,0 +1,122 @@
+"""Parse serialized files in parallel across processes.
+
+Parsing is CPU bound and doesn't scale across threads,
+independent files are parsed in a process pool instead and only the plain
+decoded data is sent back, the objects are then built in the main process.
+
+The process pools are shared by worker count, starting the worker processes
+costs more than parsing most files. The workers are started with the
+forkserver or spawn method, forking a process while other threads run,
+like the dependency resolver's, may copy locks held by those threads.
+"""
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from .bundle import BUNDLE_SUFFIX, Bundle
+from .compression import decompress, open_read
+
+logger = logging.getLogger(__name__)
+
+_process_executors: Dict[Optional[int], ProcessPoolExecutor] = {}
+_process_executors_lock = threading.Lock()
+
+
+def shared_process_executor(max_workers: Optional[int]) -> ProcessPoolExecutor:
+    """Return the process pool shared by the parses with this worker count."""
+    with _process_executors_lock:
+        executor = _process_executors.get(max_workers)
+        if executor is None:
+            if not _process_executors:
+                atexit.register(_shutdown_process_executors)
+            start_method = (
+                "forkserver"
+                if "forkserver" in multiprocessing.get_all_start_methods()
+                else "spawn"
+            )
+            executor = ProcessPoolExecutor(
+                max_workers, mp_context=multiprocessing.get_context(start_method)
+            )
+            _process_executors[max_workers] = executor
+        return executor
+
+
+def discard_process_executor(executor: ProcessPoolExecutor) -> None:
+    """Forget a broken process pool, the next parse starts a new one."""
+    with _process_executors_lock:
+        for max_workers, shared in list(_process_executors.items()):
+            if shared is executor:
+                del _process_executors[max_workers]
+    executor.shutdown(wait=False)
+
+
+def _shutdown_process_executors() -> None:
+    with _process_executors_lock:
+        executors = list(_process_executors.values())
+        _process_executors.clear()
+
+    for executor in executors:
+        executor.shutdown()
+
+
+def parse_file(path: Path) -> Any:
+    """Return the decoded data of a JSON or binary file.
+
+    Paths of nodes packed in a library bundle are supported too,
+    see `Library.nodes`, and compressed files are decompressed.
+    """
+    # Imported here as the serialization package depends on the commands,
+    # which depend on this module through the dependency resolver.
+    from .serialization import binary  # pylint: disable = import-outside-toplevel
+
+    if path.parent.suffix == BUNDLE_SUFFIX:
+        bundle = Bundle(path.parent)
+        try:
+            content = decompress(bundle.read(path.name))
+        finally:
+            bundle.close()
+    else:
+        with open_read(path) as handle:
+            content = handle.read()
+
+    if binary.is_binary(content):
+        return binary.loads(content)
+    return json.loads(content)
+
+
+def parse_files(
+    paths: Iterable[Path], max_workers: Optional[int] = None
+) -> Dict[Path, Any]:
+    """Parse files in a process pool and return their data by path.
+
+    A single file is parsed in the current process.
+    """
+    paths = list(dict.fromkeys(paths))
+
+    if len(paths) < 2:
+        return {path: parse_file(path) for path in paths}
+
+    executor = shared_process_executor(max_workers)
+    try:
+        results = dict(zip(paths, executor.map(parse_file, paths)))
+    except BrokenProcessPool:
+        discard_process_executor(executor)
+        raise
+
+    logger.debug("Parsed %s files in parallel.", len(results))
+
+    return results
+
+
+__all__ = [
+    "parse_file",
+    "parse_files",
+]
@@ -3,6 +3,7 @@ from __future__ import annotations
 from pathlib import PurePosixPath
 from typing import TYPE_CHECKING
 
+import attr
 from typing_extensions import Protocol, runtime_checkable
 
 if TYPE_CHECKING:
@@ -24,3 +25,17 @@ class PathedObject(Protocol):
 
     def relative_path(self, relative_to: Node) -> PurePosixPath:
         """Path of the Object to relative another one."""
+
+
+@attr.s(frozen=True, slots=True)
+class LazyPath:
+    """Path of an object formatted only when a log record is emitted.
+
+    Computing a path walks all the parents of the object,
+    logging it eagerly would make deep hierarchies quadratic to build.
+    """
+
+    obj: PathedObject = attr.ib()
+
+    def __str__(self) -> str:
+        return str(self.obj.path())
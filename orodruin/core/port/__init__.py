@@ -1,5 +1,5 @@
 from .port import Port, PortDirection, PortLike
-from .types import PortType, PortTypes
+from .types import PortType, PortTypes, TypeConversion
 
 __all__ = [
     "Port",
@@ -7,4 +7,5 @@ __all__ = [
     "PortType",
     "PortTypes",
     "PortLike",
+    "TypeConversion",
 ]
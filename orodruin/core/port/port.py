@@ -3,16 +3,27 @@ from __future__ import annotations
 import logging
 from enum import Enum
 from pathlib import PurePosixPath
-from typing import TYPE_CHECKING, Generic, List, Optional, Type, Union
+from typing import (
+    TYPE_CHECKING,
+    AbstractSet,
+    Generic,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    Union,
+)
 from uuid import UUID, uuid4
 
 import attr
 
 from orodruin.core.connection import Connection
 from orodruin.core.graph import Graph, GraphLike
+from orodruin.core.ids import IndexedIds, insert_ids, remove_ids
 from orodruin.core.signal import Signal
+from orodruin.exceptions import ReadOnlyGraphError
 
-from .types import PortType
+from .types import PortType, PortTypes
 
 if TYPE_CHECKING:
     from ..node import Node  # pylint: disable = cyclic-import
@@ -93,6 +104,7 @@ class Port(Generic[PortType]):
         """Set the name of this port."""
         old_name = self._name
         self._name = name
+        self._state.update_name_index(self._node_id, old_name, name)
 
         logger.debug("Renamed port %s to %s.", old_name, name)
 
@@ -106,8 +118,22 @@ class Port(Generic[PortType]):
         """Type of the port."""
         return self._type
 
-    def connections(self, source: bool = True, target: bool = True) -> List[Connection]:
-        """List all the connection of this port."""
+    def connections(
+        self, source: bool = True, target: bool = True, load: bool = True
+    ) -> List[Connection]:
+        """List all the connection of this port.
+
+        The connections of the port to the content of its node's graph,
+        the downstream ones of an input or the upstream ones of an output,
+        are only made once the graph has its own content.
+        Listing them loads the pending content of the graph, unless `load`
+        is False, see `Graph.load`. The content a graph shares isn't copied
+        and has no connections to the port, the walkers go through
+        its prototype instead, see `upstream_ports`.
+        """
+        if load and (target if self._direction is PortDirection.input else source):
+            self.node().graph().load()
+
         connections = []
         if source:
             connections.extend(
@@ -125,14 +151,67 @@ class Port(Generic[PortType]):
             )
         return connections
 
+    def ensure_editable(self, content: bool = True) -> None:
+        """Raise if this port can't be edited, and give its node's graph its content.
+
+        The content the graph of the node shares or has pending is made first,
+        its connections to the port are made by the name of the port.
+        When `content` is False, like to edit the value of the port,
+        the content is left as is, see `Graph.ensure_content`.
+
+        Raises:
+            ReadOnlyGraphError: when the graph of the port is read only.
+        """
+        graph = self.graph()
+        if graph.is_read_only():
+            raise ReadOnlyGraphError(
+                f"Port {self._name} is in the read only graph {graph.uuid()}."
+            )
+
+        if content:
+            self.node().graph().ensure_content()
+
     def get(self) -> PortType:
-        """Get the value of the Port.
+        """Get the value set on the Port.
 
-        When connected, it recursively gets the source's value
-        until a non connected port is found.
+        See `evaluated` for the value flowing to it through its connections.
         """
         return self._value
 
+    def evaluated(self) -> PortType:
+        """Get the value flowing to the Port through its connections.
+
+        When connected, the value of the most upstream port is returned,
+        see `value_connections`. It is converted to the type of the target
+        of each connection it flows through, see `PortTypes.conversion`.
+        When not connected, the value set on the Port is returned.
+
+        Raises:
+            TypeError: when a connection joins types that are no longer compatible.
+        """
+        # Imported here as the traversal module depends on the ports.
+        # pylint: disable = import-outside-toplevel, cyclic-import
+        from ..traversal import value_connections
+
+        connections = value_connections(self)
+        if not connections:
+            return self._value
+
+        value = connections[-1].source().get()
+        for connection in reversed(connections):
+            source_type = connection.source().type()
+            target_type = connection.target().type()
+
+            convert = PortTypes.conversion(source_type, target_type).convert
+            if convert is None:
+                raise TypeError(
+                    f"Cannot convert {source_type.__name__} values "
+                    f"to {target_type.__name__}."
+                )
+            value = convert(value)
+
+        return value
+
     def set(self, value: PortType) -> None:
         """Set the value of the Port.
 
@@ -165,9 +244,18 @@ class Port(Generic[PortType]):
         """Children of the port."""
         return [self._state.get_port(port) for port in self._child_port_ids]
 
-    def add_child_port(self, port: Port) -> None:
-        """Add a child port to the port."""
-        self._child_port_ids.append(port.uuid())
+    def add_child_port(self, port: Port, index: Optional[int] = None) -> None:
+        """Add a child port to the port, at the given index if any."""
+        if index is None:
+            self._child_port_ids.append(port.uuid())
+        else:
+            self._child_port_ids.insert(index, port.uuid())
+
+    def remove_child_port(self, port: Port) -> int:
+        """Remove a child port from the port and return its index."""
+        index = self._child_port_ids.index(port.uuid())
+        del self._child_port_ids[index]
+        return index
 
     def path(self) -> PurePosixPath:
         """The absolute path of this Port."""
@@ -178,7 +266,7 @@ class Port(Generic[PortType]):
         if relative_to is self.node():
             path = PurePosixPath(f".{self.name()}")
         else:
-            path = self.path().relative_to(relative_to.path())
+            path = self.node().relative_path(relative_to).with_suffix(f".{self.name()}")
 
         return path
 
@@ -198,6 +286,26 @@ class Port(Generic[PortType]):
         """Unregister a target connection from this port."""
         self._downstream_connection_ids.remove(connection.uuid())
 
+    def unregister_connections(
+        self, connection_ids: AbstractSet[UUID]
+    ) -> Tuple[IndexedIds, IndexedIds]:
+        """Unregister many connections from this port in a single pass.
+
+        Return the removed upstream and downstream connections' UUIDs
+        and indices, see `register_connections`.
+        """
+        return (
+            remove_ids(self._upstream_connection_ids, connection_ids),
+            remove_ids(self._downstream_connection_ids, connection_ids),
+        )
+
+    def register_connections(
+        self, upstream: IndexedIds, downstream: IndexedIds
+    ) -> None:
+        """Register connections back at their indices, see `unregister_connections`."""
+        insert_ids(self._upstream_connection_ids, upstream)
+        insert_ids(self._downstream_connection_ids, downstream)
+
 
 PortLike = Union[Port[PortType], UUID]
 
@@ -3,15 +3,16 @@
 to register a new type, it must be available in this module and
 exported through the __all__ variable.
 
-The ConnectPort command will try to cast the value of the source port
-to the target's type.
+The conversions between the types are registered on `PortTypes`,
+the ConnectPorts command only connects ports whose types are compatible.
 All custom types should raise a TypeError if the provided value can't be casted
 """
 from __future__ import annotations
 
+import copy
 from builtins import bool, float, int, str
 from enum import Enum
-from typing import List, Optional, TypeVar
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type, TypeVar
 from uuid import UUID
 
 import attr
@@ -32,14 +33,15 @@ class Vector2:
 
     def __init__(self, value: Vector2 | List[float] | None = None) -> None:
         if value is None:
-            self.value = [0.0, 0.0]
+            value = [0.0, 0.0]
+        elif isinstance(value, Vector2):
+            value = list(value.value)
 
-        if isinstance(value, Vector2):
-            self.value = value.value
-
-        if not isinstance(value, list) or len(value) != 9:
+        if not isinstance(value, list) or len(value) != 2:
             raise TypeError(f"Invalid value {value} for {self.__class__.__name__}")
 
+        self.value = value
+
 
 @attr.s(init=False)
 class Vector3:
@@ -49,14 +51,15 @@ class Vector3:
 
     def __init__(self, value: Vector3 | List[float] | None = None) -> None:
         if value is None:
-            self.value = [0.0, 0.0, 0.0]
-
-        if isinstance(value, Vector3):
-            self.value = value.value
+            value = [0.0, 0.0, 0.0]
+        elif isinstance(value, Vector3):
+            value = list(value.value)
 
-        if not isinstance(value, list) or len(value) != 9:
+        if not isinstance(value, list) or len(value) != 3:
             raise TypeError(f"Invalid value {value} for {self.__class__.__name__}")
 
+        self.value = value
+
 
 @attr.s(init=False)
 class Quaternion:
@@ -66,14 +69,15 @@ class Quaternion:
 
     def __init__(self, value: Quaternion | List[float] | None = None) -> None:
         if value is None:
-            self.value = [0.0, 0.0, 0.0, 1.0]
-
-        if isinstance(value, Quaternion):
-            self.value = value.value
+            value = [0.0, 0.0, 0.0, 1.0]
+        elif isinstance(value, Quaternion):
+            value = list(value.value)
 
-        if not isinstance(value, list) or len(value) != 9:
+        if not isinstance(value, list) or len(value) != 4:
             raise TypeError(f"Invalid value {value} for {self.__class__.__name__}")
 
+        self.value = value
+
 
 @attr.s(init=False)
 class Matrix3:
@@ -84,19 +88,20 @@ class Matrix3:
     def __init__(self, value: Matrix3 | List[float] | None = None) -> None:
         if value is None:
             # fmt: off
-            self.value = [
+            value = [
                 1.0, 0.0, 0.0,
                 0.0, 1.0, 0.0,
                 0.0, 0.0, 1.0,
             ]
             # fmt: on
-
-        if isinstance(value, Matrix3):
-            self.value = value.value
+        elif isinstance(value, Matrix3):
+            value = list(value.value)
 
         if not isinstance(value, list) or len(value) != 9:
             raise TypeError(f"Invalid value {value} for {self.__class__.__name__}")
 
+        self.value = value
+
 
 @attr.s(init=False)
 class Matrix4:
@@ -107,20 +112,21 @@ class Matrix4:
     def __init__(self, value: Matrix4 | List[float] | None = None) -> None:
         if value is None:
             # fmt: off
-            self.value = [
+            value = [
                 1.0, 0.0, 0.0, 0.0,
                 0.0, 1.0, 0.0, 0.0,
                 0.0, 0.0, 1.0, 0.0,
                 0.0, 0.0, 0.0, 1.0,
             ]
             # fmt: on
-
-        if isinstance(value, Matrix4):
-            self.value = value.value
+        elif isinstance(value, Matrix4):
+            value = list(value.value)
 
         if not isinstance(value, list) or len(value) != 16:
             raise TypeError(f"Invalid value {value} for {self.__class__.__name__}")
 
+        self.value = value
+
 
 PortType = TypeVar(
     "PortType",
@@ -136,6 +142,43 @@ PortType = TypeVar(
 )
 
 
+@attr.s(frozen=True)
+class TypeConversion:
+    """How the values of a port type are cast to another port type."""
+
+    compatible: bool = attr.ib()
+    convert: Optional[Callable[[Any], Any]] = attr.ib(default=None)
+
+
+# Conversions between the pairs of types, filled once for the registered types.
+_conversions: Dict[Tuple[Type, Type], TypeConversion] = {}
+
+
+_NUMBER_TYPES = (bool, int, float)
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def _find_conversion(source_type: Type, target_type: Type) -> TypeConversion:
+    """Return the default conversion of the source type to the target type.
+
+    The values of a type are copied to the same type, and the numbers
+    are cast to the other number types and to str.
+    The other types are incompatible unless a conversion is registered.
+    """
+    if source_type is target_type:
+        if source_type in (*_NUMBER_TYPES, str):
+            return TypeConversion(True, _identity)
+        return TypeConversion(True, copy.deepcopy)
+
+    if source_type in _NUMBER_TYPES and target_type in (*_NUMBER_TYPES, str):
+        return TypeConversion(True, target_type)
+
+    return TypeConversion(False)
+
+
 class PortTypes(Enum):
     """Enum registering all the possible orodruin types."""
 
@@ -150,11 +193,52 @@ class PortTypes(Enum):
     int = int
     str = str
 
+    @staticmethod
+    def conversion(source_type: Type, target_type: Type) -> TypeConversion:
+        """Return how values of the source type are cast to the target type.
+
+        The conversions between the registered types are computed at import,
+        the other ones the first time they are asked for.
+        """
+        conversion = _conversions.get((source_type, target_type))
+        if conversion is None:
+            conversion = _find_conversion(source_type, target_type)
+            _conversions[(source_type, target_type)] = conversion
+        return conversion
+
+    @staticmethod
+    def register_conversion(
+        source_type: Type,
+        target_type: Type,
+        convert: Optional[Callable[[Any], Any]],
+    ) -> None:
+        """Register how values of the source type are cast to the target type.
+
+        A None converter makes the types incompatible,
+        see `unregister_conversion` to restore the default conversion.
+        """
+        _conversions[(source_type, target_type)] = TypeConversion(
+            convert is not None, convert
+        )
+
+    @staticmethod
+    def unregister_conversion(source_type: Type, target_type: Type) -> None:
+        """Restore the default conversion of the source type to the target type."""
+        _conversions[(source_type, target_type)] = _find_conversion(
+            source_type, target_type
+        )
+
+
+for _source in PortTypes:
+    for _target in PortTypes:
+        PortTypes.conversion(_source.value, _target.value)
+
 
 __all__ = [
     "Reference",
     "PortType",
     "PortTypes",
+    "TypeConversion",
     "Matrix3",
     "Matrix4",
     "Vector2",
@@ -0,0 +1,243 @@
+"""Resolve and prefetch the library dependencies of node definitions."""
+from __future__ import annotations
+
+import logging
+import threading
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+import attr
+
+from .library import Library, LibraryManager
+from .parallel import discard_process_executor, parse_file, shared_process_executor
+
+logger = logging.getLogger(__name__)
+
+NodeKey = Tuple[str, str]
+"""Library name and type of a library node."""
+
+# Thread pool shared by the resolvers without a worker count of their own,
+# importing nodes doesn't start new threads each time.
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _shared_executor() -> ThreadPoolExecutor:
+    global _executor  # pylint: disable = global-statement
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(thread_name_prefix="orodruin-resolver")
+        return _executor
+
+
+def node_dependencies(data: Dict[str, Any]) -> Set[NodeKey]:
+    """Return the library nodes directly referenced by serialized node data.
+
+    Instances of library nodes are dependencies, their own graph isn't walked
+    as it is defined by the library node itself.
+    """
+    dependencies = set()
+
+    graphs = [data.get("graph", {})]
+    # The definitions of deduplicated data, see `serialization.definitions`.
+    graphs.extend(
+        definition.get("graph", {})
+        for definition in data.get("definitions", {}).values()
+    )
+    while graphs:
+        graph_data = graphs.pop()
+        for child_data in graph_data.get("nodes", []):
+            if child_data["library"] != "Internal":
+                dependencies.add((child_data["library"], child_data["type"]))
+            else:
+                graphs.append(child_data.get("graph", {}))
+
+    return dependencies
+
+
+@attr.s
+class DependencyResolver:
+    """Load the whole dependency closure of a node definition concurrently.
+
+    Each definition is loaded as soon as the definition referencing it is parsed,
+    so the time spent is bounded by the longest chain of dependencies
+    rather than by the number of definitions.
+    The loaded definitions are cached by their library,
+    importing the node afterwards doesn't read any file.
+
+    The files are loaded in a thread pool shared by the resolvers,
+    unless `max_workers` is given.
+    When `processes` is True, the files are parsed in a process pool
+    instead of threads, see `orodruin.core.parallel`. The process pools are
+    shared with `parse_files` by worker count and shut down at exit.
+    """
+
+    target_name: str = attr.ib(default="orodruin")
+    max_workers: Optional[int] = attr.ib(default=None)
+    processes: bool = attr.ib(default=False)
+
+    def prefetch(self, data: Dict[str, Any]) -> Dict[NodeKey, Path]:
+        """Load all the library nodes the given data depends on.
+
+        Return the paths of the loaded nodes.
+        Nodes that can't be found are skipped and will be reported on import.
+        """
+        resolved: Dict[NodeKey, Path] = {}
+
+        dependencies = node_dependencies(data)
+        if not dependencies:
+            return resolved
+
+        if self.processes:
+            return self._prefetch_processes(dependencies)
+
+        seen = set(dependencies)
+
+        with self._thread_executor() as executor:
+            futures: Dict[Future[Tuple[Optional[Path], Set[NodeKey]]], NodeKey] = {
+                executor.submit(self._load, key): key for key in dependencies
+            }
+
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    key = futures.pop(future)
+                    node_path, child_dependencies = future.result()
+
+                    if node_path is None:
+                        logger.debug("Could not prefetch node %s.", key)
+                        continue
+
+                    resolved[key] = node_path
+
+                    for dependency in child_dependencies - seen:
+                        seen.add(dependency)
+                        futures[executor.submit(self._load, dependency)] = dependency
+
+        logger.debug("Prefetched %s library nodes.", len(resolved))
+
+        return resolved
+
+    @contextmanager
+    def _thread_executor(self) -> Iterator[ThreadPoolExecutor]:
+        """Yield the shared thread pool, or a new one sized by `max_workers`."""
+        if self.max_workers is None:
+            yield _shared_executor()
+            return
+
+        with ThreadPoolExecutor(self.max_workers) as executor:
+            yield executor
+
+    def _prefetch_processes(self, dependencies: Set[NodeKey]) -> Dict[NodeKey, Path]:
+        """Prefetch the dependencies, parsing the files in a process pool.
+
+        The files are found in this process, which caches the parsed data.
+        """
+        executor = shared_process_executor(self.max_workers)
+        prefetch = _ProcessPrefetch(self._find, executor, set(dependencies))
+
+        try:
+            prefetch.submit_queued()
+            while prefetch.futures:
+                prefetch.collect_done()
+                prefetch.submit_queued()
+        except BrokenProcessPool:
+            discard_process_executor(executor)
+            raise
+
+        logger.debug("Prefetched %s library nodes.", len(prefetch.resolved))
+
+        return prefetch.resolved
+
+    def _find(self, key: NodeKey) -> Optional[Tuple[Library, Path]]:
+        """Find the library and the file of a library node."""
+        library_name, node_type = key
+
+        library = LibraryManager.find_library(library_name)
+        if library is None:
+            return None
+
+        node_path = library.find_node(node_type, self.target_name)
+        if node_path is None:
+            return None
+
+        return library, node_path
+
+    def _load(self, key: NodeKey) -> Tuple[Optional[Path], Set[NodeKey]]:
+        """Load a library node and return its path and dependencies."""
+        found = self._find(key)
+        if found is None:
+            return None, set()
+
+        library, node_path = found
+        return node_path, node_dependencies(library.read_node(node_path))
+
+
+@attr.s
+class _ProcessPrefetch:
+    """The files found and being parsed by `DependencyResolver._prefetch_processes`."""
+
+    find: Callable[[NodeKey], Optional[Tuple[Library, Path]]] = attr.ib()
+    executor: ProcessPoolExecutor = attr.ib()
+    seen: Set[NodeKey] = attr.ib()
+
+    queue: List[NodeKey] = attr.ib(init=False)
+    resolved: Dict[NodeKey, Path] = attr.ib(init=False, factory=dict)
+    futures: Dict[Future[Any], Tuple[Library, Path, int]] = attr.ib(
+        init=False, factory=dict
+    )
+
+    def __attrs_post_init__(self) -> None:
+        self.queue = list(self.seen)
+
+    def submit_queued(self) -> None:
+        """Find the queued nodes, parse the files that aren't cached yet."""
+        while self.queue:
+            key = self.queue.pop()
+            found = self.find(key)
+            if found is None:
+                logger.debug("Could not prefetch node %s.", key)
+                continue
+
+            library, node_path = found
+            self.resolved[key] = node_path
+
+            if library.is_node_cached(node_path):
+                self._queue_dependencies(library.read_node(node_path))
+            else:
+                # Taken before the file is read, see `Library.cache_node`.
+                mtime = library.node_mtime(node_path)
+                future = self.executor.submit(parse_file, node_path)
+                self.futures[future] = (library, node_path, mtime)
+
+    def collect_done(self) -> None:
+        """Wait for parsed files, cache them and queue their dependencies."""
+        done, _ = wait(self.futures, return_when=FIRST_COMPLETED)
+        for future in done:
+            library, node_path, mtime = self.futures.pop(future)
+            data = future.result()
+            library.cache_node(node_path, data, mtime)
+            self._queue_dependencies(data)
+
+    def _queue_dependencies(self, data: Dict[str, Any]) -> None:
+        child_dependencies = node_dependencies(data) - self.seen
+        self.seen.update(child_dependencies)
+        self.queue.extend(child_dependencies)
+
+
+__all__ = [
+    "DependencyResolver",
+    "NodeKey",
+    "node_dependencies",
+]
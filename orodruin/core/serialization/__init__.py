@@ -1,12 +1,22 @@
 from .deserializer import Deserializer, OrodruinDeserializer, RootDeserializer
+from .incremental import IncrementalWriter
+from .index import SceneIndex, read_index, write_indexed
 from .serializer import RootSerializer, Serializer
-from .types import SerializationType
+from .types import CrossingConnections, SerializationType
+from .writer import iter_json, write_json
 
 __all__ = [
+    "CrossingConnections",
     "Deserializer",
+    "IncrementalWriter",
     "OrodruinDeserializer",
     "SerializationType",
     "Serializer",
     "RootDeserializer",
     "RootSerializer",
+    "SceneIndex",
+    "iter_json",
+    "read_index",
+    "write_indexed",
+    "write_json",
 ]
@@ -0,0 +1,527 @@
+"""Compact binary format for serialized data.
+
+The binary format stores the same data as the JSON files:
+anything `RootSerializer.serialize` returns round trips through `dumps` and `loads`.
+
+The data is stored in columns, each packed in bulk:
+    - magic bytes and format version.
+    - string table: every dict key and string value, stored once.
+    - shape table: the keys and value kinds of every distinct dict layout.
+    - handles: unsigned integers packed at the narrowest width that fits them,
+      holding value kinds, sizes, string indices, zigzag encoded integers
+      and connection handles.
+    - floats: every float, single values and packed float lists alike.
+
+Dicts sharing a layout, such as all the ports of a scene, are stored once in the
+shape table and only their values are written. Lists of floats such as matrix
+and vector values are packed as runs of doubles, and connections are stored
+as (node index, port name) handles into their graph instead of path strings.
+
+Decoding a shape is compiled once per file into a single expression building
+the dict, so loading doesn't dispatch on every value.
+"""
+from __future__ import annotations
+
+import struct
+import sys
+from array import array
+from itertools import islice
+from typing import IO, Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+MAGIC = b"ORDN"
+VERSION = 2
+
+# Value kinds, kinds from _SHAPES on are indices into the shape table.
+_NULL = 0
+_FALSE = 1
+_TRUE = 2
+_INT = 3
+_FLOAT = 4
+_STRING = 5
+_LIST = 6
+_FLOAT_ARRAY = 7
+_SHAPES = 8
+
+# Shape tags.
+_DICT = 0
+_GRAPH = 1
+_CONNECTION = 2
+
+_EXPRESSIONS = {
+    _NULL: "None",
+    _FALSE: "False",
+    _TRUE: "True",
+    _INT: "Z(n())",
+    _FLOAT: "f()",
+    _STRING: "S[n()]",
+    _LIST: "[R[n()]() for _ in range(n())]",
+    _FLOAT_ARRAY: "F(n())",
+}
+
+_COLUMN = struct.Struct("<BI")
+_MAX_HANDLE = 2**64
+
+# Unsigned array typecodes by item size.
+_TYPECODES = {array(code).itemsize: code for code in "QLIHB"}
+_WIDTHS = sorted(width for width in _TYPECODES if width <= 8)
+
+# Position of a value in the handle and float columns.
+Position = Tuple[int, int]
+
+
+def is_binary(content: bytes) -> bool:
+    """Return True if the content is in the binary format."""
+    return content[: len(MAGIC)] == MAGIC
+
+
+def dumps(data: Any, spans: Optional[Dict[str, Position]] = None) -> bytes:
+    """Encode data to the binary format.
+
+    When given, spans is filled with the position of each node
+    in the handle and float columns, by absolute node path.
+    A node can be decoded alone with `loads(content, position)`.
+    """
+    return _Encoder(spans).encode(data)
+
+
+def dump(data: Any, handle: IO[bytes]) -> None:
+    """Write data to a file handle in the binary format."""
+    handle.write(dumps(data))
+
+
+def loads(content: bytes, position: Optional[Position] = None) -> Any:
+    """Decode data from the binary format.
+
+    When given, only the value at position is decoded.
+
+    Raises:
+        ValueError: when the content isn't in the binary format.
+    """
+    try:
+        return _Decoder(content).decode(position or (0, 0))
+    except (IndexError, KeyError, StopIteration, TypeError, struct.error) as error:
+        raise ValueError("Invalid orodruin binary content.") from error
+
+
+def load(handle: IO[bytes]) -> Any:
+    """Read data in the binary format from a file handle."""
+    return loads(handle.read())
+
+
+def _pack_column(values: List[int]) -> bytes:
+    """Pack unsigned integers at the narrowest width that fits them all."""
+    largest = max(values, default=0)
+    width = next(width for width in _WIDTHS if largest < 256**width)
+
+    column = array(_TYPECODES[width], values)
+    if sys.byteorder == "big":
+        column.byteswap()
+
+    return _COLUMN.pack(width, len(column)) + column.tobytes()
+
+
+def _unpack_column(content: bytes, offset: int) -> Tuple[List[int], int]:
+    """Return the integers of the column at offset and the offset after it."""
+    width, count = _COLUMN.unpack_from(content, offset)
+    offset += _COLUMN.size
+
+    if width not in _WIDTHS:
+        raise ValueError(f"Invalid column width {width} in binary content.")
+
+    column = array(_TYPECODES[width])
+    column.frombytes(content[offset : offset + width * count])
+    if len(column) != count:
+        raise ValueError("Truncated binary content.")
+    if sys.byteorder == "big":
+        column.byteswap()
+
+    return column.tolist(), offset + width * count
+
+
+def _is_graph(value: Dict[str, Any]) -> bool:
+    return isinstance(value.get("nodes"), list) and isinstance(
+        value.get("connections"), list
+    )
+
+
+def _node_name(value: Any) -> Optional[str]:
+    node_name = value.get("name") if isinstance(value, dict) else None
+    return node_name if isinstance(node_name, str) else None
+
+
+def _connection_handle(path: str, node_indices: Dict[str, int]) -> Tuple[int, str]:
+    """Return the (node index, port name) handle of a connection port path.
+
+    The node index is 0 for the graph's parent node.
+
+    Raises:
+        KeyError: when the path doesn't point to a node of the graph.
+    """
+    if path.startswith("."):
+        return 0, path[1:]
+
+    node_name, port_name = path.split(".", 1)
+    return node_indices[node_name], port_name
+
+
+def _unzigzag(value: int) -> int:
+    return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+
+class _Encoder:
+    def __init__(self, spans: Optional[Dict[str, Position]] = None) -> None:
+        self._strings: Dict[str, int] = {}
+        self._shapes: Dict[Tuple[int, ...], int] = {}
+        self._handles: List[int] = []
+        self._floats: List[float] = []
+        self._spans = spans
+        self._node_paths: List[str] = []
+
+    def encode(self, data: Any) -> bytes:
+        """Return the encoded data, prefixed with the header."""
+        node_name = _node_name(data)
+        if self._spans is not None and node_name is not None:
+            self._node(data, f"/{node_name}")
+        else:
+            self._item(data)
+
+        strings = [string.encode("utf-8") for string in self._strings]
+        shapes: List[int] = []
+        for shape in self._shapes:
+            shapes.append(len(shape))
+            shapes.extend(shape)
+
+        floats = array("d", self._floats)
+        if sys.byteorder == "big":
+            floats.byteswap()
+
+        return b"".join(
+            (
+                MAGIC,
+                bytes((VERSION,)),
+                _pack_column([len(string) for string in strings]),
+                *strings,
+                _pack_column(shapes),
+                _pack_column(self._handles),
+                _COLUMN.pack(floats.itemsize, len(floats)),
+                floats.tobytes(),
+            )
+        )
+
+    def _node(self, value: Any, path: str) -> None:
+        """Encode a node, keeping track of its position."""
+        if self._spans is not None:
+            self._spans[path] = (len(self._handles), len(self._floats))
+
+        self._node_paths.append(path)
+        self._item(value)
+        self._node_paths.pop()
+
+    def _item(self, value: Any) -> None:
+        """Encode a value preceded by its kind."""
+        handles = self._handles
+        index = len(handles)
+        handles.append(0)
+        handles[index] = self._value(value)
+
+    def _string(self, string: str) -> int:
+        index = self._strings.get(string)
+        if index is None:
+            index = len(self._strings)
+            self._strings[string] = index
+        return index
+
+    def _shape(self, shape: Tuple[int, ...]) -> int:
+        index = self._shapes.get(shape)
+        if index is None:
+            index = len(self._shapes)
+            self._shapes[shape] = index
+        return index + _SHAPES
+
+    def _value(self, value: Any) -> int:
+        """Encode a value and return its kind."""
+        # Exact types are checked first, isinstance is slower on the hot path.
+        # pylint: disable = too-many-return-statements, too-many-branches
+        # pylint: disable = unidiomatic-typecheck
+        value_type = type(value)
+
+        if value_type is str:
+            self._handles.append(self._string(value))
+            return _STRING
+        if value_type is dict:
+            if _is_graph(value):
+                return self._graph(value)
+            return self._dict(value)
+        if value_type is float:
+            self._floats.append(value)
+            return _FLOAT
+        if value_type is list or value_type is tuple:
+            if value and type(value[0]) is float:
+                if all(type(item) is float for item in value):
+                    self._handles.append(len(value))
+                    self._floats.extend(value)
+                    return _FLOAT_ARRAY
+            self._handles.append(len(value))
+            for item in value:
+                self._item(item)
+            return _LIST
+        if value is None:
+            return _NULL
+        if value is True:
+            return _TRUE
+        if value is False:
+            return _FALSE
+        if isinstance(value, int):
+            handle = value * 2 if value >= 0 else -value * 2 - 1
+            if handle >= _MAX_HANDLE:
+                raise ValueError(f"Cannot encode {value}, larger than 64 bits.")
+            self._handles.append(handle)
+            return _INT
+
+        # Subclasses of the builtin types are encoded as their base type.
+        if isinstance(value, str):
+            return self._value(str(value))
+        if isinstance(value, float):
+            return self._value(float(value))
+        if isinstance(value, dict):
+            return self._value(dict(value))
+        if isinstance(value, (list, tuple)):
+            return self._value(list(value))
+
+        raise TypeError(f"Cannot encode {value!r} of type {type(value)}.")
+
+    def _dict(self, value: Dict[str, Any]) -> int:
+        shape = [_DICT]
+        for key, item in value.items():
+            shape.append(self._string(key if isinstance(key, str) else str(key)))
+            shape.append(self._value(item))
+        return self._shape(tuple(shape))
+
+    def _graph(self, value: Dict[str, Any]) -> int:
+        nodes = value["nodes"]
+        connections = value["connections"]
+
+        node_indices: Dict[str, int] = {}
+        for index, node_data in enumerate(nodes, 1):
+            node_name = _node_name(node_data)
+            if node_name is not None:
+                node_indices.setdefault(node_name, index)
+
+        self._handles.append(len(nodes))
+        for node_data in nodes:
+            node_name = _node_name(node_data)
+            if self._spans is not None and self._node_paths and node_name is not None:
+                self._node(node_data, f"{self._node_paths[-1]}/{node_name}")
+            else:
+                self._item(node_data)
+
+        self._handles.append(len(connections))
+        for connection in connections:
+            self._connection(connection, node_indices)
+
+        extra = {k: v for k, v in value.items() if k not in ("nodes", "connections")}
+        return self._shape((_GRAPH, self._dict(extra)))
+
+    def _connection(self, value: Any, node_indices: Dict[str, int]) -> None:
+        try:
+            source = _connection_handle(value["source"], node_indices)
+            target = _connection_handle(value["target"], node_indices)
+        except (KeyError, TypeError, ValueError, AttributeError):
+            # Not a connection this format can address, store it as is.
+            self._item(value)
+            return
+
+        index = len(self._handles)
+        self._handles.append(0)
+        for node_index, port_name in (source, target):
+            self._handles.append(node_index)
+            self._handles.append(self._string(port_name))
+
+        extra = {k: v for k, v in value.items() if k not in ("source", "target")}
+        self._handles[index] = self._shape((_CONNECTION, self._dict(extra)))
+
+
+class _Readers(Dict[int, Callable[[], Any]]):
+    """Readers of the values of each kind, compiled on first use."""
+
+    def __init__(self, decoder: _Decoder) -> None:
+        super().__init__()
+        self._decoder = decoder
+
+    def __missing__(self, kind: int) -> Callable[[], Any]:
+        reader = self._decoder.compile(kind)
+        self[kind] = reader
+        return reader
+
+
+class _Decoder:
+    def __init__(self, content: bytes) -> None:
+        if not is_binary(content):
+            raise ValueError("Content is not in the orodruin binary format.")
+
+        offset = len(MAGIC)
+        version = content[offset]
+        if version != VERSION:
+            raise ValueError(f"Unsupported binary format version {version}.")
+
+        sizes, offset = _unpack_column(content, offset + 1)
+        self._strings: List[str] = []
+        for size in sizes:
+            self._strings.append(str(content[offset : offset + size], "utf-8"))
+            offset += size
+
+        flat_shapes, offset = _unpack_column(content, offset)
+        self._shapes: List[Tuple[int, ...]] = []
+        index = 0
+        while index < len(flat_shapes):
+            size = flat_shapes[index]
+            self._shapes.append(tuple(flat_shapes[index + 1 : index + 1 + size]))
+            index += 1 + size
+
+        self._handle_column, offset = _unpack_column(content, offset)
+
+        width, count = _COLUMN.unpack_from(content, offset)
+        offset += _COLUMN.size
+        floats = array("d")
+        if width != floats.itemsize:
+            raise ValueError(f"Invalid float width {width} in binary content.")
+        floats.frombytes(content[offset : offset + width * count])
+        if len(floats) != count:
+            raise ValueError("Truncated binary content.")
+        if sys.byteorder == "big":
+            floats.byteswap()
+        self._float_column = floats.tolist()
+
+        self._readers = _Readers(self)
+        self._next_handle: Callable[[], int] = iter(()).__next__
+        self._floats: Iterator[float] = iter(())
+        self._namespace: Dict[str, Any] = {}
+
+    def decode(self, position: Position) -> Any:
+        """Return the decoded value at the given position."""
+        handle_position, float_position = position
+        if not 0 <= handle_position < len(self._handle_column):
+            raise ValueError(f"Invalid position {position} in binary content.")
+
+        self._next_handle = iter(self._handle_column[handle_position:]).__next__
+        self._floats = iter(self._float_column[float_position:])
+        self._namespace = {
+            "n": self._next_handle,
+            "f": self._floats.__next__,
+            "F": self._float_array,
+            "S": self._strings,
+            "Z": _unzigzag,
+            "R": self._readers,
+            "G": self._graph,
+        }
+
+        return self._readers[self._next_handle()]()
+
+    def compile(self, kind: int) -> Callable[[], Any]:
+        """Return a function reading a value of the given kind."""
+        source = f"lambda: {self._expression(kind)}"
+        code = compile(source, f"<orodruin binary kind {kind}>", "eval")
+        return eval(code, self._namespace)  # pylint: disable = eval-used
+
+    def _shape(self, kind: int, tag: int) -> Tuple[int, ...]:
+        """Return the shape of a kind, checking it is of the given tag."""
+        index = kind - _SHAPES
+        if not 0 <= index < len(self._shapes):
+            raise ValueError(f"Invalid value kind {kind} in binary content.")
+
+        shape = self._shapes[index]
+        if not shape or shape[0] != tag:
+            raise ValueError(f"Invalid value kind {kind} in binary content.")
+
+        return shape
+
+    def _expression(self, kind: int) -> str:
+        """Return the expression reading a value of the given kind.
+
+        Shapes only refer to kinds defined before them,
+        the generated code is made of integers and the expressions above.
+        """
+        if 0 <= kind < _SHAPES:
+            return _EXPRESSIONS[kind]
+
+        index = kind - _SHAPES
+        if 0 <= index < len(self._shapes) and self._shapes[index][:1] == (_GRAPH,):
+            extra = self._graph_extra(kind)
+            return f"G(R[{extra}])"
+
+        shape = self._shape(kind, _DICT)
+        if len(shape) % 2 != 1:
+            raise ValueError(f"Invalid value kind {kind} in binary content.")
+
+        fields = []
+        for position in range(1, len(shape), 2):
+            key, child = shape[position : position + 2]
+            if not 0 <= key < len(self._strings) or child >= kind:
+                raise ValueError(f"Invalid value kind {kind} in binary content.")
+            fields.append(f"S[{int(key)}]: {self._expression(child)}")
+
+        return "{" + ", ".join(fields) + "}"
+
+    def _graph_extra(self, kind: int) -> int:
+        """Return the dict kind of the extra keys of a graph or connection."""
+        shape = self._shapes[kind - _SHAPES]
+        if len(shape) != 2 or shape[1] >= kind:
+            raise ValueError(f"Invalid value kind {kind} in binary content.")
+        self._shape(shape[1], _DICT)
+        return int(shape[1])
+
+    def _float_array(self, size: int) -> List[float]:
+        values = list(islice(self._floats, size))
+        if len(values) != size:
+            raise ValueError("Truncated binary content.")
+        return values
+
+    def _graph(self, extra: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        next_handle = self._next_handle
+        readers = self._readers
+
+        nodes = [readers[next_handle()]() for _ in range(next_handle())]
+
+        node_names = [""]
+        for node_data in nodes:
+            node_names.append(_node_name(node_data) or "")
+
+        connections = []
+        for _ in range(next_handle()):
+            kind = next_handle()
+            index = kind - _SHAPES
+            if 0 <= index < len(self._shapes) and self._shapes[index][:1] == (
+                _CONNECTION,
+            ):
+                connections.append(self._connection(kind, node_names))
+            else:
+                connections.append(readers[kind]())
+
+        graph = {"nodes": nodes, "connections": connections}
+        graph.update(extra())
+
+        return graph
+
+    def _connection(self, kind: int, node_names: List[str]) -> Dict[str, Any]:
+        next_handle = self._next_handle
+        strings = self._strings
+        extra = self._readers[self._graph_extra(kind)]
+
+        source = f"{node_names[next_handle()]}.{strings[next_handle()]}"
+        target = f"{node_names[next_handle()]}.{strings[next_handle()]}"
+
+        connection = {"source": source, "target": target}
+        connection.update(extra())
+
+        return connection
+
+
+__all__ = [
+    "MAGIC",
+    "VERSION",
+    "dump",
+    "dumps",
+    "is_binary",
+    "load",
+    "loads",
+]
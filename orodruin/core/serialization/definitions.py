@@ -0,0 +1,214 @@
+"""Content addressed node definitions.
+
+A deduplicated file stores each internal node definition once in a
+`definitions` table, keyed by a digest of its content.
+The nodes of the graphs are then references to the table,
+with the values of their own ports that differ from the definition.
+
+A reference looks like::
+
+    {
+        "name": "arm_L",
+        "type": "Arm",
+        "library": "Internal",
+        "definition": "<digest>",
+        "metadata": {"serialization_type": "definition"},
+        "values": {"side": "L"},
+    }
+"""
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Tuple
+
+Definitions = Dict[str, Dict[str, Any]]
+"""Definitions table, the serialized data of the node definitions by digest."""
+
+
+def is_reference(data: Dict[str, Any]) -> bool:
+    """Return True if the node data is a reference to a definition."""
+    return "definition" in data
+
+
+def definition_digest(data: Dict[str, Any]) -> str:
+    """Return the digest of a node definition's data.
+
+    The name of the node and the values of its own ports are left out,
+    they are stored by each reference.
+    The nested definitions are expected to be references already
+    so their digest stands for their content.
+    """
+    content = {key: value for key, value in data.items() if key != "name"}
+    content["ports"] = [_port_structure(port) for port in data.get("ports", [])]
+
+    encoded = json.dumps(content, sort_keys=True, separators=(",", ":"))
+    return hashlib.blake2b(encoded.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _port_structure(data: Dict[str, Any]) -> Dict[str, Any]:
+    structure = {key: value for key, value in data.items() if key != "default_value"}
+    if "children" in data:
+        structure["children"] = [_port_structure(child) for child in data["children"]]
+    return structure
+
+
+def make_reference(
+    data: Dict[str, Any], digest: str, definition: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Return a reference to a definition from the data of one of its nodes."""
+    reference = {
+        "name": data["name"],
+        "type": data["type"],
+        "library": data["library"],
+        "definition": digest,
+        "metadata": data["metadata"],
+    }
+
+    definition_values = dict(_port_values(definition.get("ports", [])))
+    values = {
+        name: value
+        for name, value in _port_values(data.get("ports", []))
+        if value != definition_values.get(name)
+    }
+
+    if values:
+        reference["values"] = values
+
+    return reference
+
+
+def _port_values(ports: List[Dict[str, Any]]) -> Iterator[Tuple[str, Any]]:
+    for port in ports:
+        yield port["name"], port.get("default_value")
+        yield from _port_values(port.get("children", []))
+
+
+def resolve_reference(
+    reference: Dict[str, Any], definitions: Definitions
+) -> Dict[str, Any]:
+    """Return the data of the node a reference stands for.
+
+    The returned data shares its content with the definition,
+    it must not be modified.
+
+    Raises:
+        KeyError: when the definition isn't in the table.
+    """
+    definition = definitions[reference["definition"]]
+
+    data = dict(definition)
+    data["name"] = reference["name"]
+
+    values = reference.get("values")
+    if values:
+        data["ports"] = _override_ports(definition.get("ports", []), values)
+
+    return data
+
+
+def _override_ports(
+    ports: List[Dict[str, Any]], values: Dict[str, Any]
+) -> List[Dict[str, Any]]:
+    overridden = []
+    for port in ports:
+        port = dict(port)
+        if port["name"] in values:
+            port["default_value"] = values[port["name"]]
+        if "children" in port:
+            port["children"] = _override_ports(port["children"], values)
+        overridden.append(port)
+    return overridden
+
+
+def _graph_nodes(graph_data: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Iterate over the nodes of a graph and of their nested graphs."""
+    graphs = [graph_data]
+    while graphs:
+        graph = graphs.pop()
+        for node_data in graph.get("nodes", []):
+            yield node_data
+            if "graph" in node_data:
+                graphs.append(node_data["graph"])
+
+
+def inline_unique(data: Dict[str, Any], definitions: Definitions) -> None:
+    """Replace the references to definitions used once by their content.
+
+    The data and the table are modified in place.
+    """
+    graphs = [data.get("graph", {})]
+    graphs.extend(definition.get("graph", {}) for definition in definitions.values())
+
+    counts = Counter(
+        node_data["definition"]
+        for graph in graphs
+        for node_data in _graph_nodes(graph)
+        if is_reference(node_data)
+    )
+
+    # Only the graphs of the kept definitions are walked,
+    # the inlined ones are walked from the graph they are inlined in.
+    graphs = [data.get("graph", {})]
+    graphs.extend(
+        definition.get("graph", {})
+        for digest, definition in definitions.items()
+        if counts[digest] > 1
+    )
+
+    while graphs:
+        nodes = graphs.pop().get("nodes", [])
+        for index, node_data in enumerate(nodes):
+            if is_reference(node_data) and counts[node_data["definition"]] == 1:
+                node_data = resolve_reference(node_data, definitions)
+                nodes[index] = node_data
+            if "graph" in node_data:
+                graphs.append(node_data["graph"])
+
+    for digest, count in counts.items():
+        if count == 1:
+            del definitions[digest]
+
+
+def expand_references(graph_data: Dict[str, Any], definitions: Definitions) -> None:
+    """Replace all the references of a graph by their content, in place."""
+    graphs = [graph_data]
+    while graphs:
+        nodes = graphs.pop().get("nodes", [])
+        for index, node_data in enumerate(nodes):
+            if is_reference(node_data):
+                node_data = copy.deepcopy(resolve_reference(node_data, definitions))
+                nodes[index] = node_data
+            if "graph" in node_data:
+                graphs.append(node_data["graph"])
+
+
+def referenced_definitions(
+    graph_data: Dict[str, Any], definitions: Definitions
+) -> Definitions:
+    """Return the definitions a graph references, directly or not."""
+    referenced: Definitions = {}
+
+    graphs = [graph_data]
+    while graphs:
+        for node_data in _graph_nodes(graphs.pop()):
+            digest = node_data.get("definition")
+            if digest is not None and digest not in referenced:
+                referenced[digest] = definitions[digest]
+                graphs.append(referenced[digest].get("graph", {}))
+
+    return referenced
+
+
+__all__ = [
+    "Definitions",
+    "definition_digest",
+    "expand_references",
+    "inline_unique",
+    "is_reference",
+    "make_reference",
+    "referenced_definitions",
+    "resolve_reference",
+]
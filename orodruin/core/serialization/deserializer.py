@@ -2,7 +2,10 @@
 from __future__ import annotations
 
 from abc import ABCMeta, abstractmethod
-from typing import TYPE_CHECKING, Any, Dict, List, Optional
+from functools import partial
+from pathlib import PurePosixPath
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+from uuid import UUID
 
 import attr
 
@@ -11,9 +14,16 @@ from orodruin.commands.ports import ConnectPorts, CreatePort, SetPort
 from orodruin.core.library import LibraryManager
 from orodruin.core.port import PortDirection, PortTypes
 from orodruin.core.utils import port_from_path
-from orodruin.exceptions import LibraryDoesNotExistError, PortDoesNotExistError
+from orodruin.exceptions import (
+    LibraryDoesNotExistError,
+    NodeDoesNotExistError,
+    NodeNotFoundError,
+    PortDoesNotExistError,
+)
 
-from .types import SerializationType
+from ..traversal import Job, run_depth_first
+from .definitions import Definitions, resolve_reference
+from .types import CrossingConnections, SerializationType
 
 if TYPE_CHECKING:
     from orodruin.core import Connection, Graph, Node, Port, State
@@ -63,21 +73,114 @@ class OrodruinDeserializer(Deserializer):
         pass
 
 
+def _to_paths(paths: Iterable[Union[str, PurePosixPath]]) -> Tuple[PurePosixPath, ...]:
+    return tuple(PurePosixPath(path) for path in paths)
+
+
 @attr.s
 class RootDeserializer:
-    """Deserialize data from an Orodruin file."""
+    """Deserialize data from an Orodruin file.
+
+    When lazy, the graphs of the deserialized node definitions are kept as
+    pending data, see `Graph.set_pending_data`.
+
+    When trusted, the data is known to be valid, like the data of a saved file.
+    The child nodes and ports are then created directly instead of through
+    the commands, keeping their serialized names, and the connections
+    aren't validated. See `orodruin.core.integrity` to verify the result.
+
+    When paths are given, only the nodes at these absolute paths, their content
+    and their parent nodes are deserialized, the other nodes are skipped.
+    The connections to skipped nodes are dropped, or kept as stubs on their graph
+    depending on `crossing_connections`, see `Graph.stub_connections`.
+
+    The references of deduplicated data are resolved from its definitions table,
+    see `orodruin.core.serialization.definitions`. When sharing definitions,
+    each referenced definition is built once as a read only prototype
+    whose graph is shared by the nodes referencing it, like `ImportNode` shared.
+    """
 
     state: State = attr.ib()
+    lazy: bool = attr.ib(default=False)
+    trusted: bool = attr.ib(default=False)
+    paths: Optional[Tuple[PurePosixPath, ...]] = attr.ib(
+        default=None,
+        converter=attr.converters.optional(_to_paths),
+    )
+    crossing_connections: CrossingConnections = attr.ib(
+        default=CrossingConnections.drop
+    )
+    share_definitions: bool = attr.ib(default=False)
+    definitions: Optional[Definitions] = attr.ib(default=None, eq=False, repr=False)
 
     def _state_deserializers(self) -> List[Deserializer]:
         return self.state.deserializers()
 
-    def deserialize(self, data: Dict[str, Any], graph: Graph) -> Node:
-        """Recursively deserialize a node's data."""
-        node = self.deserialize_node(data, graph)
+    def deserialize(
+        self, data: Dict[str, Any], graph: Graph, unique_name: bool = True
+    ) -> Node:
+        """Deserialize a node's data with the content of its graph.
+
+        The nested graphs are deserialized iteratively,
+        deep hierarchies don't hit the recursion limit.
+
+        When unique_name is False and the deserializer is trusted,
+        the node keeps its serialized name without checking its siblings.
+
+        Raises:
+            NodeDoesNotExistError: when paths are given and the node
+                isn't one of them or one of their parents.
+            NodeNotFoundError: when a referenced definition isn't in the table.
+        """
+        definitions = data.get("definitions")
+        if definitions is not None and definitions is not self.definitions:
+            return attr.evolve(self, definitions=definitions).deserialize(
+                data, graph, unique_name
+            )
+
+        node, jobs = self._deserialize_shallow(
+            data, graph, unique_name, PurePosixPath("/")
+        )
+        run_depth_first(jobs)
+
+        return node
+
+    def _deserialize_shallow(
+        self,
+        data: Dict[str, Any],
+        graph: Graph,
+        unique_name: bool,
+        parent_path: PurePosixPath,
+    ) -> Tuple[Node, List[Job]]:
+        """Deserialize a node's data and ports, return the jobs left to run.
+
+        The parent path is the path of the parent node in the data,
+        the selected paths are matched against the serialized names
+        as the nodes may be renamed when deserialized.
+        """
+        digest = data.get("definition")
+        if digest is not None:
+            data = self._resolve_reference(data)
+
+        node_path = parent_path / data["name"]
+
+        if self.paths is not None and not self._is_selected(node_path):
+            raise NodeDoesNotExistError(
+                f"Node {data['name']} contains none of the paths {self.paths}."
+            )
+
+        node = self.deserialize_node(data, graph, unique_name)
+        deserializer = self
+
+        if self.paths is not None:
+            if any(
+                node_path == path or path in node_path.parents for path in self.paths
+            ):
+                # The whole content of a selected node is deserialized.
+                deserializer = attr.evolve(self, paths=None)
 
         for port_data in data.get("ports", []):
-            self._deserialize_port_recursive(port_data, node)
+            self._deserialize_port_tree(port_data, node)
 
         metadata = data["metadata"]
         serialization_type = SerializationType(metadata["serialization_type"])
@@ -86,29 +189,135 @@ class RootDeserializer:
             # deserialize the node's graph only if we're in a definition
             # otherwise the sub nodes will be created durint both
             # the definition _and_ the instance deserialization of the node.
+            graph_data = data.get("graph", {})
+            if (
+                digest is not None
+                and deserializer.share_definitions
+                and deserializer.paths is None
+            ):
+                node.graph().set_shared_graph(self._definition_prototype(digest))
+            elif (
+                deserializer.lazy
+                and deserializer.paths is None
+                and (graph_data.get("nodes") or graph_data.get("connections"))
+            ):
+                if self.definitions:
+                    data = {**data, "definitions": self.definitions}
+                node.graph().set_pending_data(data)
+            else:
+                return node, [
+                    partial(
+                        RootDeserializer._graph_jobs,
+                        deserializer,
+                        data,
+                        node,
+                        node_path,
+                    )
+                ]
+
+        return node, []
+
+    def deserialize_graph(self, data: Dict[str, Any], node: Node) -> None:
+        """Deserialize the child nodes and connections of a node definition."""
+        definitions = data.get("definitions")
+        if definitions is not None and definitions is not self.definitions:
+            attr.evolve(self, definitions=definitions).deserialize_graph(data, node)
+            return
+
+        run_depth_first(
+            [partial(self._graph_jobs, data, node, PurePosixPath("/", data["name"]))]
+        )
+
+    def _graph_jobs(
+        self, data: Dict[str, Any], node: Node, data_path: PurePosixPath
+    ) -> List[Job]:
+        """Deserialize the child nodes and connections of a node definition.
+
+        Return the jobs deserializing the graphs of the child nodes.
+        The connections are made before the connections of the nested graphs,
+        so notifying their downstream ports doesn't walk the nested graphs.
+        """
+        ports = _PortResolver(node)
+        skipped_names: Set[str] = set()
+        jobs: List[Job] = []
+        for child_data in data.get("graph", {}).get("nodes", []):
+            if self.paths is None or self._is_selected(data_path / child_data["name"]):
+                child, child_jobs = self._deserialize_shallow(
+                    child_data, node.graph(), not self.trusted, data_path
+                )
+                ports.add_node(child_data["name"], child)
+                jobs.extend(child_jobs)
+            else:
+                skipped_names.add(child_data["name"])
+
+        for connection_data in data.get("graph", {}).get("connections", []):
+            if skipped_names and _connected_node_names(connection_data).intersection(
+                skipped_names
+            ):
+                if self.crossing_connections is CrossingConnections.stub:
+                    node.graph().add_stub_connection(connection_data)
+                continue
+
+            self.deserialize_connection(connection_data, node, ports)
+
+        # The state deserializers run once the nested graphs are deserialized.
+        jobs.append(partial(self._deserialize_graph_extra, data, node))
+
+        return jobs
+
+    def _deserialize_graph_extra(self, data: Dict[str, Any], node: Node) -> List[Job]:
+        node_graph = node.graph()
+        if node_graph:
+            for deserializer in self._state_deserializers():
+                deserializer.deserialize_graph(data, node_graph)
+
+        return []
+
+    def _resolve_reference(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Return the data of the node a definition reference stands for."""
+        try:
+            return resolve_reference(data, self.definitions or {})
+        except KeyError as error:
+            raise NodeNotFoundError(
+                f"Found no definition {data['definition']} for node {data['name']}"
+            ) from error
+
+    def _definition_prototype(self, digest: str) -> Graph:
+        """Return the graph of the prototype of a definition, created if needed."""
+        key = f"definition:{digest}"
+
+        prototype = self.state.prototype(key)
+        if prototype is None:
+            definitions = self.definitions or {}
+            prototype = self.state.create_prototype(
+                key, {**definitions[digest], "definitions": definitions}
+            )
+
+        return prototype.graph()
+
+    def _is_selected(self, node_path: PurePosixPath) -> bool:
+        """Return True if the serialized path is in or above one of the paths."""
+        return any(
+            node_path == path or node_path in path.parents or path in node_path.parents
+            for path in self.paths or ()
+        )
+
+    def _deserialize_port_tree(self, data: Dict[str, Any], node: Node) -> Port:
+        """Deserialize a port with its child ports."""
+        port = self.deserialize_port(data, node)
+
+        stack = [(data, port)]
+        while stack:
+            parent_data, parent = stack.pop()
+            for child_data in parent_data.get("children", []):
+                child = self.deserialize_port(child_data, node, parent)
+                stack.append((child_data, child))
 
-            for child_data in data.get("graph", {}).get("nodes", []):
-                self.deserialize(child_data, node.graph())
-
-            for connection_data in data.get("graph", {}).get("connections", []):
-                self.deserialize_connection(connection_data, node)
-
-            node_graph = node.graph()
-            if node_graph:
-                for deserializer in self._state_deserializers():
-                    deserializer.deserialize_graph(data, node_graph)
-
-        return node
-
-    def _deserialize_port_recursive(
-        self, data: Dict[str, Any], node: Node, parent: Optional[Port] = None
-    ) -> Port:
-        port = self.deserialize_port(data, node, parent)
-        for child_data in data.get("children", []):
-            self._deserialize_port_recursive(child_data, node, port)
         return port
 
-    def deserialize_node(self, data: Dict[str, Any], graph: Graph) -> Node:
+    def deserialize_node(
+        self, data: Dict[str, Any], graph: Graph, unique_name: bool = True
+    ) -> Node:
         """Create a node, or import it from a library."""
         library_name = data["library"]
         if library_name != "Internal":
@@ -128,7 +337,21 @@ class RootDeserializer:
         metadata = data["metadata"]
         serialization_type = SerializationType(metadata["serialization_type"])
 
-        if serialization_type is SerializationType.definition:
+        if (
+            serialization_type is SerializationType.definition
+            and self.trusted
+            and not unique_name
+        ):
+
+            node = self.state.create_node(
+                name=data["name"],
+                node_type=data["type"],
+                library=library,
+                parent_graph_id=graph.uuid(),
+            )
+            graph.register_node(node)
+
+        elif serialization_type is SerializationType.definition:
 
             node = CreateNode(
                 state=self.state,
@@ -140,7 +363,16 @@ class RootDeserializer:
 
         else:
 
-            node = ImportNode(self.state, graph, data["type"], library_name).do()
+            # Dependencies are prefetched, if asked, by the top most library import.
+            node = ImportNode(
+                self.state,
+                graph,
+                data["type"],
+                library_name,
+                prefetch=False,
+                lazy=self.lazy and self.paths is None,
+                trusted=self.trusted,
+            ).do()
             node.set_name(data["name"])
 
         for deserializer in self._state_deserializers():
@@ -160,7 +392,17 @@ class RootDeserializer:
         if serialization_type is SerializationType.definition:
             direction = PortDirection[data["direction"]]
             port_type = PortTypes[data["type"]].value
-            port = CreatePort(self.state, node, name, direction, port_type, parent).do()
+            node_graph = node.parent_graph()
+            if self.trusted and node_graph:
+                port = self.state.create_port(
+                    name, direction, port_type, node, node_graph, parent
+                )
+                node_graph.register_port(port)
+                node.register_port(port)
+            else:
+                port = CreatePort(
+                    self.state, node, name, direction, port_type, parent
+                ).do()
 
             default_value = data.get("default_value", None)
             if default_value:
@@ -174,14 +416,25 @@ class RootDeserializer:
         return port
 
     def deserialize_connection(
-        self, data: Dict[str, Any], parent_node: Node
+        self,
+        data: Dict[str, Any],
+        parent_node: Node,
+        ports: Optional[_PortResolver] = None,
     ) -> Connection:
-        """Create a connection."""
+        """Create a connection.
+
+        The ports are resolved with the given resolver of the parent node graph,
+        or looked up from the parent node.
+        """
         source_name = data["source"]
         target_name = data["target"]
 
-        source_port = port_from_path(parent_node, source_name)
-        target_port = port_from_path(parent_node, target_name)
+        if ports is None:
+            source_port = port_from_path(parent_node, source_name)
+            target_port = port_from_path(parent_node, target_name)
+        else:
+            source_port = ports.port(source_name)
+            target_port = ports.port(target_name)
 
         if not source_port:
             raise PortDoesNotExistError(f"Port {source_name} not found")
@@ -189,10 +442,71 @@ class RootDeserializer:
             raise PortDoesNotExistError(f"Port {target_name} not found")
 
         connection = ConnectPorts(
-            self.state, parent_node.graph(), source_port, target_port
+            self.state,
+            parent_node.graph(),
+            source_port,
+            target_port,
+            trusted=self.trusted,
         ).do()
 
         for deserializer in self._state_deserializers():
             deserializer.deserialize_connection(data, connection)
 
         return connection
+
+
+@attr.s
+class _PortResolver:
+    """Resolve the port paths of the connections of a node graph.
+
+    The child nodes are indexed by name as they are deserialized,
+    and the ports of each node by name the first time one of them is resolved.
+    """
+
+    parent_node: Node = attr.ib()
+    _nodes: Dict[str, Node] = attr.ib(init=False, factory=dict)
+    _ports: Dict[UUID, Dict[str, Port]] = attr.ib(init=False, factory=dict)
+
+    def add_node(self, name: str, node: Node) -> None:
+        """Index a deserialized child node under its serialized name."""
+        self._nodes.setdefault(name, node)
+
+    def port(self, port_path: str) -> Optional[Port]:
+        """Return the port at the given path, like `port_from_path`.
+
+        Raises:
+            NameError: when the parent node has no port of this name.
+        """
+        if port_path.startswith("."):
+            port_name = port_path.strip(".")
+            port = self._node_ports(self.parent_node).get(port_name)
+            if port is None:
+                raise NameError(
+                    f"Node {self.parent_node.name()} has no port named {port_name}"
+                )
+            return port
+
+        node_name, port_name = port_path.split(".")
+        node = self._nodes.get(node_name)
+        if node is None:
+            return None
+
+        return self._node_ports(node).get(port_name)
+
+    def _node_ports(self, node: Node) -> Dict[str, Port]:
+        ports = self._ports.get(node.uuid())
+        if ports is None:
+            ports = {}
+            for port in node.ports():
+                ports.setdefault(port.name(), port)
+            self._ports[node.uuid()] = ports
+        return ports
+
+
+def _connected_node_names(data: Dict[str, Any]) -> Set[str]:
+    """Return the names of the child nodes a connection's data refers to."""
+    return {
+        port_path.split(".", 1)[0]
+        for port_path in (data["source"], data["target"])
+        if not port_path.startswith(".")
+    }
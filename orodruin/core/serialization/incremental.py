@@ -0,0 +1,218 @@
+"""Save nodes incrementally, rewriting only the changed parts.
+
+The first save writes the whole node to its file. The next saves append the
+serialized data of the changed subtrees, found through the dirty nodes tracked
+by the state, to a `<file>.delta` file of JSON lines.
+Library instances are saved without their graph, the changes inside them
+are recorded as a change of the outermost instance.
+Once the delta holds enough records it is compacted back in the file.
+The whole file is written with its side index, see `write_indexed`,
+the index doesn't cover the changes of the delta.
+"""
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path, PurePosixPath
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Tuple
+from uuid import UUID
+
+import attr
+
+from ..traversal import ancestor_nodes
+from .index import index_path, write_indexed
+from .serializer import RootSerializer
+from .types import SerializationType
+
+if TYPE_CHECKING:
+    from orodruin.core import Node, State
+
+DELTA_SUFFIX = ".delta"
+
+
+def delta_path(path: Path) -> Path:
+    """Return the path of the delta file of a saved file."""
+    return path.with_name(f"{path.name}{DELTA_SUFFIX}")
+
+
+@attr.s
+class IncrementalWriter:
+    """Save a node to a file, only writing its changes after the first save."""
+
+    state: State = attr.ib()
+    root: Node = attr.ib()
+    path: Path = attr.ib()
+    # Number of delta records after which the delta is compacted.
+    compact_threshold: int = attr.ib(default=100)
+
+    _saved: bool = attr.ib(init=False, default=False)
+    _record_count: int = attr.ib(init=False, default=0)
+
+    def save(self) -> int:
+        """Save the root node and return the number of written subtrees.
+
+        The first save and the saves compacting the delta write the whole node.
+        """
+        if not self._saved or self._record_count >= self.compact_threshold:
+            self.compact()
+            return 1
+
+        records = list(self._records())
+        if records:
+            with delta_path(self.path).open("a", encoding="utf-8") as handle:
+                for record in records:
+                    handle.write(json.dumps(record))
+                    handle.write("\n")
+
+            self._record_count += len(records)
+
+        return len(records)
+
+    def compact(self) -> None:
+        """Write the whole root node and remove the delta."""
+        _write_compacted(self.state.serialize(self.root, lazy=True), self.path)
+
+        self.state.clear_dirty(self._dirty_nodes())
+        self._saved = True
+        self._record_count = 0
+
+    def _records(self) -> Iterator[Dict[str, Any]]:
+        """Serialize the topmost dirty nodes of the root node."""
+        serializer = RootSerializer(self.state)
+
+        all_dirty_nodes = self._dirty_nodes()
+        dirty_nodes: Dict[UUID, Node] = {}
+        for node in all_dirty_nodes:
+            saved_node = _saved_node(node, self.root)
+            dirty_nodes[saved_node.uuid()] = saved_node
+
+        for node in dirty_nodes.values():
+            if any(
+                ancestor.uuid() in dirty_nodes
+                for ancestor in _ancestors(node, self.root)
+            ):
+                continue
+
+            if node is self.root:
+                serialization_type = SerializationType.definition
+            elif node.library():
+                serialization_type = SerializationType.instance
+            else:
+                serialization_type = SerializationType.definition
+
+            yield {
+                "path": str(node.relative_path(self.root)),
+                "data": serializer.serialize(node, serialization_type),
+            }
+
+        # The dirty nodes that weren't saved are in the saved subtrees.
+        self.state.clear_dirty(all_dirty_nodes)
+
+    def _dirty_nodes(self) -> List[Node]:
+        """Return the dirty nodes of the root node, the root node included."""
+        root_id = self.root.uuid()
+        return [
+            node
+            for node in self.state.dirty_nodes()
+            if node.uuid() == root_id
+            or any(ancestor.uuid() == root_id for ancestor in ancestor_nodes(node))
+        ]
+
+
+def _ancestors(node: Node, root: Node) -> Iterator[Node]:
+    """Iterate over the ancestors of a node up to the root node, included."""
+    if node.uuid() == root.uuid():
+        return
+
+    for parent in ancestor_nodes(node):
+        yield parent
+        if parent.uuid() == root.uuid():
+            return
+
+
+def _saved_node(node: Node, root: Node) -> Node:
+    """Return the node whose record saves the changes of a node.
+
+    It is the outermost library instance containing the node below the root,
+    or the node itself.
+    """
+    saved_node = node
+    for ancestor in _ancestors(node, root):
+        if ancestor.uuid() != root.uuid() and ancestor.library():
+            saved_node = ancestor
+    return saved_node
+
+
+def load(path: Path) -> Dict[str, Any]:
+    """Read a saved node, with the changes of its delta applied."""
+    with path.open("r", encoding="utf-8") as handle:
+        data = json.load(handle)
+
+    for record in _read_delta(path):
+        data = apply_record(data, record)
+
+    return data
+
+
+def compact(path: Path) -> None:
+    """Apply the delta of a saved file to it and remove the delta."""
+    _write_compacted(load(path), path)
+
+
+def _write_compacted(data: Dict[str, Any], path: Path) -> None:
+    """Replace a saved file and its side index, and remove its delta."""
+    temporary_path = path.with_name(f"{path.name}.tmp")
+    write_indexed(data, temporary_path)
+
+    os.replace(temporary_path, path)
+    os.replace(index_path(temporary_path), index_path(path))
+
+    try:
+        delta_path(path).unlink()
+    except FileNotFoundError:
+        pass
+
+
+def apply_record(data: Dict[str, Any], record: Dict[str, Any]) -> Dict[str, Any]:
+    """Replace the subtree of the data at the record path by the record data.
+
+    Raises:
+        KeyError: when the data has no node at the record path.
+    """
+    names = [name for name in PurePosixPath(record["path"]).parts if name != "."]
+    if not names:
+        return record["data"]
+
+    parent_data = data
+    for name in names[:-1]:
+        parent_data = _child_data(parent_data, name)[1]
+
+    index, _ = _child_data(parent_data, names[-1])
+    parent_data["graph"]["nodes"][index] = record["data"]
+
+    return data
+
+
+def _child_data(data: Dict[str, Any], name: str) -> Tuple[int, Dict[str, Any]]:
+    for index, child_data in enumerate(data.get("graph", {}).get("nodes", [])):
+        if child_data["name"] == name:
+            return index, child_data
+    raise KeyError(f"Node {data['name']} has no child node {name}.")
+
+
+def _read_delta(path: Path) -> List[Dict[str, Any]]:
+    try:
+        with delta_path(path).open("r", encoding="utf-8") as handle:
+            return [json.loads(line) for line in handle if line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+__all__ = [
+    "DELTA_SUFFIX",
+    "IncrementalWriter",
+    "apply_record",
+    "compact",
+    "delta_path",
+    "load",
+]
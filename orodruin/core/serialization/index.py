@@ -0,0 +1,263 @@
+"""Write serialized data with a side index for random access.
+
+Next to each written file, a `<file>.index` JSON file maps the absolute path of
+every node of the file to the (start, end) byte range of its data.
+For binary files, it maps them to the position of the node in the packed
+columns of the file instead, see `orodruin.core.serialization.binary`.
+Tools can then list the nodes of a file or read a single node
+by seeking into the file instead of parsing the whole document.
+
+The index stores the size and hash of the file it was written with,
+it is verified when read so an index out of date with its file is never used.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import IO, Any, Dict, List, Optional, Tuple
+
+import attr
+
+from orodruin.exceptions import PortDoesNotExistError, SceneIndexError
+
+from . import binary as binary_format
+from .writer import write_json
+
+INDEX_SUFFIX = ".index"
+INDEX_VERSION = 1
+
+# Span of a node in its file.
+Span = Tuple[int, int]
+
+
+def index_path(path: Path) -> Path:
+    """Return the path of the side index of a file."""
+    return path.with_name(f"{path.name}{INDEX_SUFFIX}")
+
+
+@attr.s
+class SceneIndex:
+    """Side index of a file, mapping node paths to their byte ranges."""
+
+    _path: Path = attr.ib()
+    _format: str = attr.ib()
+    _size: int = attr.ib()
+    _hash: str = attr.ib()
+    _nodes: Dict[str, Span] = attr.ib(factory=dict)
+
+    def path(self) -> Path:
+        """Path of the indexed file."""
+        return self._path
+
+    def format(self) -> str:
+        """Format of the indexed file, "json" or "binary"."""
+        return self._format
+
+    def size(self) -> int:
+        """Size of the indexed file when it was written."""
+        return self._size
+
+    def hash(self) -> str:
+        """Hash of the content of the indexed file when it was written."""
+        return self._hash
+
+    def list_nodes(self) -> List[str]:
+        """Return the absolute paths of all the nodes of the file."""
+        return list(self._nodes)
+
+    def span(self, node_path: str) -> Span:
+        """Return the (start, end) byte range of a node.
+
+        For binary files, the span is the position of the node
+        in the handle and float columns.
+
+        Raises:
+            KeyError: when the file contains no node at this path.
+        """
+        return self._nodes[node_path]
+
+    def read_node(self, node_path: str) -> Dict[str, Any]:
+        """Read the serialized data of a single node of the file."""
+        start, end = self.span(node_path)
+
+        if self._format == "binary":
+            # The columns are read whole, only the node is decoded.
+            return binary_format.loads(self._path.read_bytes(), (start, end))
+
+        with self._path.open("rb") as handle:
+            handle.seek(start)
+            return json.loads(handle.read(end - start))
+
+    def read_port_value(self, node_path: str, port_name: str) -> Any:
+        """Read the saved value of a port of a node of the file.
+
+        Child ports are named `<parent>.<child>`.
+
+        Raises:
+            PortDoesNotExistError: when the node has no such port.
+        """
+        ports = self.read_node(node_path).get("ports", [])
+
+        port_data: Optional[Dict[str, Any]] = None
+        for name in port_name.split("."):
+            port_data = next((p for p in ports if p["name"] == name), None)
+            if port_data is None:
+                raise PortDoesNotExistError(
+                    f"Node {node_path} has no port {port_name}."
+                )
+            ports = port_data.get("children", [])
+
+        if port_data is None:
+            raise PortDoesNotExistError(f"Node {node_path} has no port {port_name}.")
+        if "value" in port_data:
+            return port_data["value"]
+        return port_data.get("default_value")
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the data saved in the index file."""
+        return {
+            "version": INDEX_VERSION,
+            "format": self._format,
+            "size": self._size,
+            "hash": self._hash,
+            "nodes": {path: list(span) for path, span in self._nodes.items()},
+        }
+
+
+@attr.s
+class _HashingWriter:
+    """Text handle writing to a binary handle while hashing the content."""
+
+    handle: IO[bytes] = attr.ib()
+    digest: Any = attr.ib(factory=hashlib.sha1)
+    size: int = attr.ib(default=0)
+
+    def write(self, text: str) -> int:
+        """Write ASCII text, see `iter_json`."""
+        content = text.encode("ascii")
+        self.handle.write(content)
+        self.digest.update(content)
+        self.size += len(content)
+        return len(text)
+
+
+def write_indexed(data: Dict[str, Any], path: Path, binary: bool = False) -> SceneIndex:
+    """Write serialized node data to a file along with its side index.
+
+    The data is written as JSON, or in the binary format
+    of `orodruin.core.serialization.binary`.
+    """
+    nodes: Dict[str, Span] = {}
+
+    if binary:
+        content = binary_format.dumps(data, nodes)
+        path.write_bytes(content)
+        scene_index = SceneIndex(
+            path, "binary", len(content), hashlib.sha1(content).hexdigest(), nodes
+        )
+    else:
+        names: Dict[Tuple[Any, ...], str] = {}
+        spans: Dict[Tuple[Any, ...], Span] = {}
+
+        def on_dict(
+            value: Dict[str, Any], location: Tuple[Any, ...], start: int, end: int
+        ) -> None:
+            if location and location[-3:-1] != ("graph", "nodes"):
+                return
+            # Children are written before their parent, which isn't named yet.
+            names[location] = str(value.get("name"))
+            spans[location] = (start, end)
+
+        with path.open("wb") as handle:
+            writer = _HashingWriter(handle)
+            write_json(data, writer, on_dict=on_dict)  # type: ignore[arg-type]
+
+        for location in sorted(spans, key=lambda location: spans[location][0]):
+            nodes[_node_path(location, names)] = spans[location]
+
+        scene_index = SceneIndex(
+            path, "json", writer.size, writer.digest.hexdigest(), nodes
+        )
+
+    _write_index(scene_index)
+
+    return scene_index
+
+
+def _node_path(location: Tuple[Any, ...], names: Dict[Tuple[Any, ...], str]) -> str:
+    """Return the absolute path of the node written at the given location."""
+    parts = []
+    while True:
+        parts.append(names[location])
+        if not location:
+            break
+        location = location[:-3]
+
+    return "/" + "/".join(reversed(parts))
+
+
+def _write_index(scene_index: SceneIndex) -> None:
+    path = index_path(scene_index.path())
+    temporary_path = path.with_name(f"{path.name}.tmp")
+
+    with temporary_path.open("w", encoding="utf-8") as handle:
+        json.dump(scene_index.to_dict(), handle)
+    os.replace(temporary_path, path)
+
+
+def read_index(path: Path, verify: bool = True) -> SceneIndex:
+    """Read the side index of a file.
+
+    The size of the file is always checked against the index,
+    its content is hashed and checked too when verify is True.
+
+    Raises:
+        SceneIndexError: when the index is missing, invalid or out of date.
+    """
+    try:
+        with index_path(path).open("r", encoding="utf-8") as handle:
+            data = json.load(handle)
+    except (OSError, ValueError) as error:
+        raise SceneIndexError(f"Could not read the index of {path}.") from error
+
+    if data.get("version") != INDEX_VERSION:
+        raise SceneIndexError(f"Unsupported index version for {path}.")
+
+    scene_index = SceneIndex(
+        path,
+        data["format"],
+        data["size"],
+        data["hash"],
+        {node_path: (span[0], span[1]) for node_path, span in data["nodes"].items()},
+    )
+
+    try:
+        size = path.stat().st_size
+    except OSError as error:
+        raise SceneIndexError(f"Indexed file {path} does not exist.") from error
+
+    if size != scene_index.size() or (
+        verify and _file_hash(path) != scene_index.hash()
+    ):
+        raise SceneIndexError(f"Index of {path} is out of date.")
+
+    return scene_index
+
+
+def _file_hash(path: Path) -> str:
+    digest = hashlib.sha1()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(65536), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+__all__ = [
+    "INDEX_SUFFIX",
+    "SceneIndex",
+    "index_path",
+    "read_index",
+    "write_indexed",
+]
@@ -1,11 +1,21 @@
 """Serialize core objects."""
 from __future__ import annotations
 
+import copy
 from abc import ABCMeta, abstractmethod
-from typing import TYPE_CHECKING, Any, Dict, List
+from functools import partial
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple
 
 import attr
 
+from ..traversal import Job, run_depth_first
+from .definitions import (
+    Definitions,
+    definition_digest,
+    expand_references,
+    make_reference,
+    referenced_definitions,
+)
 from .types import SerializationType
 
 if TYPE_CHECKING:
@@ -45,74 +55,220 @@ class Serializer(metaclass=ABCMeta):
 
 @attr.s
 class RootSerializer:
-    """Serialize data to save in an Orodruin file."""
+    """Serialize data to save in an Orodruin file.
+
+    When deduplicating, the internal node definitions are written once
+    in the definitions table and the nodes reference them,
+    see `orodruin.core.serialization.definitions`.
+    The subtrees are hashed once serialized so they are never lazy.
+    """
 
     state: State = attr.ib()
+    deduplicate: bool = attr.ib(default=False)
+
+    _definitions: Definitions = attr.ib(init=False, factory=dict, eq=False, repr=False)
+
+    def definitions(self) -> Definitions:
+        """Return the definitions written while deduplicating."""
+        return self._definitions
 
     def _state_serializers(self) -> List[Serializer]:
         return self.state.serializers()
 
-    def serialize(self, root: Node, serialization_type: SerializationType) -> Dict:
-        """Recursively serialize a node's data."""
-        data = self.serialize_node(root, serialization_type)
+    def serialize(
+        self, root: Node, serialization_type: SerializationType, lazy: bool = False
+    ) -> Dict:
+        """Serialize a node's data with the content of its graph.
 
-        data["ports"] = [
-            self._serialize_port_recursive(port, serialization_type)
-            for port in root.ports()
-            if not port.parent_port()
-        ]
+        The nested graphs are serialized iteratively,
+        deep hierarchies don't hit the recursion limit.
 
-        node_graph = root.graph()
+        When lazy, the ports, child nodes and connections are generators
+        serializing each of their items only when iterated,
+        see `orodruin.core.serialization.write_json`.
+        """
+        data, node_graph = self._serialize_shallow(root, serialization_type, lazy)
 
-        if node_graph:
-            graph_data = self.serialize_graph(node_graph, SerializationType.instance)
-            data["graph"] = graph_data
+        if node_graph is not None:
+            data["graph"] = self.serialize_graph(
+                node_graph, SerializationType.instance, lazy
+            )
 
         return data
 
-    def _serialize_port_recursive(
+    def _serialize_shallow(
+        self, node: Node, serialization_type: SerializationType, lazy: bool
+    ) -> Tuple[Dict[str, Any], Optional[Graph]]:
+        """Serialize a node's data and ports, return the graph left to serialize."""
+        data = self.serialize_node(node, serialization_type)
+
+        ports = (
+            self._serialize_port_tree(port, serialization_type)
+            for port in node.ports()
+            if not port.parent_port()
+        )
+        data["ports"] = ports if lazy else list(ports)
+
+        # Shared instances serialize the content of the graph they share.
+        node_graph = node.graph()
+        node_graph = node_graph.shared_graph() or node_graph
+
+        pending_data = node_graph.pending_data()
+        if pending_data is not None:
+            # The graph wasn't loaded so it didn't change since it was read.
+            data["graph"] = copy.deepcopy(pending_data["graph"])
+            self._adopt_definitions(data["graph"], pending_data)
+            return data, None
+
+        return data, node_graph
+
+    def _serialize_port_tree(
         self, port: Port, serialization_type: SerializationType
     ) -> Dict[str, Any]:
+        """Serialize a port's data with the data of its child ports."""
         data = self.serialize_port(port, serialization_type)
-        if port.child_ports():
-            data["children"] = [
-                self._serialize_port_recursive(child, serialization_type)
-                for child in port.child_ports()
-            ]
+
+        stack = [(port, data)]
+        while stack:
+            parent, parent_data = stack.pop()
+            child_ports = parent.child_ports()
+            if child_ports:
+                parent_data["children"] = [
+                    self.serialize_port(child, serialization_type)
+                    for child in child_ports
+                ]
+                stack.extend(zip(child_ports, parent_data["children"]))
+
         return data
 
     def serialize_graph(
-        self, graph: Graph, serialization_type: SerializationType
+        self, graph: Graph, serialization_type: SerializationType, lazy: bool = False
     ) -> Dict[str, Any]:
         """Serialize a graph's data."""
-        parent_node = graph.parent_node()
-        if not parent_node:
-            raise NotImplementedError("Cannot serialize a graph with no parent node.")
-
-        graph_data = {}
+        graph_data: Dict[str, Any] = {}
 
-        nodes_data = []
-        for node in graph.nodes():
-            serialization_type = (
-                SerializationType.instance
+        if lazy:
+            nodes = (
+                self.serialize(node, SerializationType.instance, lazy)
                 if node.library()
-                else SerializationType.definition
+                else self._serialize_definition(node, lazy)
+                for node in graph.nodes()
+            )
+            graph_data["nodes"] = nodes
+            graph_data["connections"] = self._serialize_connections(graph)
+            self._serialize_graph_extra(graph, serialization_type, graph_data)
+        else:
+            run_depth_first(
+                [partial(self._graph_jobs, graph, serialization_type, graph_data)]
             )
-            nodes_data.append(self.serialize(node, serialization_type))
-        graph_data["nodes"] = nodes_data
 
-        graph_data["connections"] = [
+        return graph_data
+
+    def _graph_jobs(
+        self,
+        graph: Graph,
+        serialization_type: SerializationType,
+        graph_data: Dict[str, Any],
+    ) -> List[Job]:
+        """Serialize the child nodes of a graph, return the jobs left to run.
+
+        The jobs serialize the graphs of the child nodes, then deduplicate
+        the internal child nodes and let the state serializers extend
+        the graph's data, once the nodes are fully serialized.
+        """
+        nodes: List[Dict[str, Any]] = []
+        jobs: List[Job] = []
+
+        for node in graph.nodes():
+            if node.library():
+                node_type = SerializationType.instance
+            else:
+                node_type = SerializationType.definition
+
+            node_data, node_graph = self._serialize_shallow(node, node_type, False)
+            nodes.append(node_data)
+
+            if node_graph is not None:
+                node_data["graph"] = {}
+                jobs.append(
+                    partial(
+                        self._graph_jobs,
+                        node_graph,
+                        SerializationType.instance,
+                        node_data["graph"],
+                    )
+                )
+            if self.deduplicate and node_type is SerializationType.definition:
+                jobs.append(partial(self._deduplicate, nodes, len(nodes) - 1))
+
+        graph_data["nodes"] = nodes
+        graph_data["connections"] = list(self._serialize_connections(graph))
+        jobs.append(
+            partial(self._serialize_graph_extra, graph, serialization_type, graph_data)
+        )
+
+        return jobs
+
+    def _serialize_connections(self, graph: Graph) -> Iterator[Dict[str, Any]]:
+        parent_node = graph.parent_node()
+        if not parent_node:
+            raise NotImplementedError("Cannot serialize a graph with no parent node.")
+
+        return (
             self.serialize_connection(
                 connection, parent_node, SerializationType.instance
             )
             for connection in graph.connections()
-        ]
+        )
 
+    def _serialize_graph_extra(
+        self,
+        graph: Graph,
+        serialization_type: SerializationType,
+        graph_data: Dict[str, Any],
+    ) -> List[Job]:
+        """Extend a graph's data with the data of the state serializers."""
         for serializer in self._state_serializers():
             serializer_data = serializer.serialize_graph(graph, serialization_type)
             graph_data.update(serializer_data)
 
-        return graph_data
+        return []
+
+    def _deduplicate(self, nodes: List[Dict[str, Any]], index: int) -> List[Job]:
+        """Replace a serialized internal node by a reference to its definition."""
+        data = nodes[index]
+        digest = definition_digest(data)
+        definition = self._definitions.setdefault(digest, data)
+        nodes[index] = make_reference(data, digest, definition)
+
+        return []
+
+    def _serialize_definition(self, node: Node, lazy: bool) -> Dict[str, Any]:
+        """Serialize an internal node, as a reference when deduplicating."""
+        if not self.deduplicate:
+            return self.serialize(node, SerializationType.definition, lazy)
+
+        data = self.serialize(node, SerializationType.definition)
+        digest = definition_digest(data)
+        definition = self._definitions.setdefault(digest, data)
+
+        return make_reference(data, digest, definition)
+
+    def _adopt_definitions(
+        self, graph_data: Dict[str, Any], pending_data: Dict[str, Any]
+    ) -> None:
+        """Keep the definitions referenced by a copied pending graph valid."""
+        definitions = pending_data.get("definitions")
+        if not definitions:
+            return
+
+        if self.deduplicate:
+            for digest, definition in referenced_definitions(
+                graph_data, definitions
+            ).items():
+                self._definitions.setdefault(digest, copy.deepcopy(definition))
+        else:
+            expand_references(graph_data, definitions)
 
     def serialize_node(
         self, node: Node, serialization_type: SerializationType
@@ -7,3 +7,10 @@ class SerializationType(Enum):
 
     instance = "instance"
     definition = "definition"
+
+
+class CrossingConnections(Enum):
+    """Describe how a partial load handles the connections to skipped nodes."""
+
+    drop = "drop"
+    stub = "stub"
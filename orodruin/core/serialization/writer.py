@@ -0,0 +1,150 @@
+"""Write serialized data to files."""
+from __future__ import annotations
+
+import json
+from typing import IO, Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import attr
+
+
+@attr.s
+class _Container:
+    """A dict or array being written."""
+
+    items: Iterator = attr.ib()
+    is_dict: bool = attr.ib()
+    level: int = attr.ib()
+    count: int = attr.ib(default=0)
+
+    # Only tracked for the callback of `iter_json`.
+    value: Any = attr.ib(default=None)
+    location: Tuple[Any, ...] = attr.ib(default=())
+    start: int = attr.ib(default=0)
+
+
+# Called with a dict, its location and its (start, end) offsets once written.
+DictCallback = Callable[[Dict[str, Any], Tuple[Any, ...], int, int], None]
+
+
+def _open_value(
+    value: Any,
+    level: int,
+    stack: List[_Container],
+    location: Tuple[Any, ...] = (),
+    start: int = 0,
+) -> str:
+    """Return the encoding of a scalar value or the opening of a container.
+
+    Opened containers are pushed on the stack to be written item by item.
+    """
+    if isinstance(value, dict):
+        stack.append(
+            _Container(iter(value.items()), True, level, 0, value, location, start)
+        )
+        return "{"
+    if isinstance(value, (list, tuple, Iterator)):
+        stack.append(_Container(iter(value), False, level, 0, None, location, start))
+        return "["
+    return json.dumps(value)
+
+
+def _is_number(encoded: str) -> bool:
+    return encoded[0].isdigit() or (encoded[0] == "-" and encoded[1:2].isdigit())
+
+
+def iter_json(
+    data: Any, indent: int = 2, on_dict: Optional[DictCallback] = None
+) -> Iterator[str]:
+    """Encode data to JSON chunk by chunk.
+
+    Generators and iterators are encoded as arrays, and only consumed
+    while they are written, see `RootSerializer.serialize` lazy mode.
+
+    The output is indented like `json.dumps(data, indent=indent)` except that
+    numbers and closing brackets of arrays are kept on the previous line
+    to keep matrices and vectors compact.
+
+    The output is ASCII only so offsets in characters are offsets in bytes.
+    When given, `on_dict` is called once each dict is written with the dict,
+    its location as the keys and indices leading to it from the data,
+    and its start and end offsets in the output.
+    """
+    # pylint: disable = too-many-locals
+    stack: List[_Container] = []
+    offset = 0
+
+    chunk = _open_value(data, 0, stack)
+    offset += len(chunk)
+    yield chunk
+
+    while stack:
+        container = stack[-1]
+
+        try:
+            item = next(container.items)
+        except StopIteration:
+            stack.pop()
+            if not container.count:
+                chunk = "}" if container.is_dict else "]"
+            elif container.is_dict:
+                chunk = "\n" + " " * (indent * container.level) + "}"
+            else:
+                chunk = " ]"
+            offset += len(chunk)
+            yield chunk
+
+            if on_dict is not None and container.is_dict:
+                on_dict(container.value, container.location, container.start, offset)
+            continue
+
+        separator = "," if container.count else ""
+        container.count += 1
+        newline = "\n" + " " * (indent * (container.level + 1))
+
+        if container.is_dict:
+            key, value = item
+            chunk = f"{separator}{newline}{json.dumps(str(key))}: "
+            offset += len(chunk)
+            yield chunk
+
+            location = container.location + (key,) if on_dict else ()
+            chunk = _open_value(value, container.level + 1, stack, location, offset)
+        else:
+            location = container.location + (container.count - 1,) if on_dict else ()
+            prefix = f"{separator}{newline}"
+            encoded = _open_value(
+                item, container.level + 1, stack, location, offset + len(prefix)
+            )
+            if _is_number(encoded):
+                chunk = f"{separator} {encoded}"
+            else:
+                chunk = f"{prefix}{encoded}"
+
+        offset += len(chunk)
+        yield chunk
+
+
+def write_json(
+    data: Any,
+    handle: IO[str],
+    indent: int = 2,
+    chunk_size: int = 65536,
+    on_dict: Optional[DictCallback] = None,
+) -> None:
+    """Write data to a file handle as JSON without encoding it all in memory.
+
+    See `iter_json`.
+    """
+    chunks: List[str] = []
+    size = 0
+
+    for chunk in iter_json(data, indent, on_dict):
+        chunks.append(chunk)
+        size += len(chunk)
+
+        if size >= chunk_size:
+            handle.write("".join(chunks))
+            chunks.clear()
+            size = 0
+
+    handle.write("".join(chunks))
@@ -1,9 +1,55 @@
-from typing import Callable, Generic, List, TypeVar
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Generic, Iterator, List, Optional, Tuple, TypeVar
 
 import attr
 
 T = TypeVar("T")  # pylint: disable = invalid-name
 
+_deferred = threading.local()
+
+
+@contextmanager
+def deferred_signals() -> Iterator[None]:
+    """Defer the signals emitted by the current thread until the context exits.
+
+    The deferred signals are then emitted in order.
+    Nested contexts emit their signals when the outermost one exits.
+    """
+    if _deferred_queue() is not None:
+        yield
+        return
+
+    _deferred.queue = []
+    try:
+        yield
+    finally:
+        queue = _deferred.queue
+        _deferred.queue = None
+        for signal, args in queue:
+            signal.emit(*args)
+
+
+def deferred_count() -> int:
+    """Return the number of signals deferred so far by the current thread."""
+    queue = _deferred_queue()
+    return len(queue) if queue is not None else 0
+
+
+def drop_deferred(count: int) -> None:
+    """Drop the signals deferred by the current thread after the first ones.
+
+    Used to roll back edits whose signals shouldn't be emitted,
+    see `deferred_count`.
+    """
+    queue = _deferred_queue()
+    if queue is not None:
+        del queue[count:]
+
+
+def _deferred_queue() -> Optional[List[Tuple["Signal", Tuple[Any, ...]]]]:
+    return getattr(_deferred, "queue", None)
+
 
 @attr.s
 class Signal(Generic[T]):
@@ -27,6 +73,13 @@ class Signal(Generic[T]):
 
         This calls every registered callbacks and passes *args and **kwargs directly
         to them.
+        While signals are deferred, the signal is queued instead,
+        see `deferred_signals`.
         """
+        queue = _deferred_queue()
+        if queue is not None:
+            queue.append((self, args))
+            return
+
         for callback in self._callbacks:
             callback(*args)
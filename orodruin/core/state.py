@@ -1,14 +1,22 @@
 from __future__ import annotations
 
 import logging
-from typing import Any, Dict, List, Optional, Type
+import weakref
+from contextlib import contextmanager
+from functools import partial
+from pathlib import PurePosixPath
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Type, Union
 from uuid import UUID
 
 import attr
 
+from orodruin.commands.nodes import DeleteNodes
+from orodruin.core.integrity import verify_node
 from orodruin.core.library import Library
+from orodruin.core.names import NameIndex
 from orodruin.core.port.port import PortDirection
 from orodruin.core.serialization import (
+    CrossingConnections,
     Deserializer,
     OrodruinDeserializer,
     RootDeserializer,
@@ -16,15 +24,22 @@ from orodruin.core.serialization import (
     SerializationType,
     Serializer,
 )
-from orodruin.core.signal import Signal
+from orodruin.core.serialization.definitions import inline_unique
+from orodruin.core.signal import Signal, deferred_signals
 
+from .clone import Cloner
 from .connection import Connection, ConnectionLike
 from .graph import Graph, GraphLike
 from .node import Node, NodeLike
+from .pathed_object import LazyPath
 from .port import Port, PortLike, PortType
+from .traversal import ancestor_nodes, descendant_nodes
 
 logger = logging.getLogger(__name__)
 
+PROTOTYPES_NODE_NAME = ":prototypes"
+"""Name of the node holding the prototypes, outside of the root graph."""
+
 
 @attr.s
 class State:
@@ -37,6 +52,7 @@ class State:
     """
 
     _root_graph: Graph = attr.ib(init=False)
+    _prototypes_node: Optional[Node] = attr.ib(init=False, default=None)
     _root_serializer: RootSerializer = attr.ib(init=False)
     _root_deserializer: RootDeserializer = attr.ib(init=False)
 
@@ -46,6 +62,20 @@ class State:
     _connections: Dict[UUID, Connection] = attr.ib(init=False, factory=dict)
     _serializers: List[Serializer] = attr.ib(init=False, factory=list)
     _deserializers: List[Deserializer] = attr.ib(init=False, factory=list)
+    _prototypes: Dict[str, UUID] = attr.ib(init=False, factory=dict)
+    # Prototypes no longer registered, deleted once no graph shares them.
+    _dropped_prototype_ids: Set[UUID] = attr.ib(init=False, factory=set)
+    # Graphs that shared another graph, including the deleted graphs
+    # kept alive by the undo stack.
+    _sharing_graphs: weakref.WeakValueDictionary = attr.ib(
+        init=False, factory=weakref.WeakValueDictionary, eq=False, repr=False
+    )
+    # Nodes whose serialized data changed since they were last saved.
+    _dirty_node_ids: Set[UUID] = attr.ib(init=False, factory=set)
+    # Names of the nodes of each graph and the ports of each node, during a batch.
+    _name_indexes: Optional[Dict[UUID, NameIndex]] = attr.ib(
+        init=False, default=None, eq=False, repr=False
+    )
 
     # Signals
     graph_created: Signal[Graph] = attr.ib(init=False, factory=Signal)
@@ -68,6 +98,20 @@ class State:
         "return the state's root graph"
         return self._root_graph
 
+    def prototype_graph(self) -> Graph:
+        """Return the graph holding the prototypes of shared instances.
+
+        It is the graph of a node created with the first prototype.
+        That node isn't registered to any graph, the paths of the prototypes
+        start with its name and can't be reached from the root graph.
+        """
+        if self._prototypes_node is None:
+            self._prototypes_node = Node(state=self, name=PROTOTYPES_NODE_NAME)
+            self._nodes[self._prototypes_node.uuid()] = self._prototypes_node
+            self._prototypes_node.post_node_created()
+
+        return self._prototypes_node.graph()
+
     def get_graph(self, graph: GraphLike) -> Graph:
         """Return a Graph from a GraphLike object.
 
@@ -165,6 +209,12 @@ class State:
         graph = Graph(self, parent_node)
         self._graphs[graph.uuid()] = graph
 
+        on_graph_changed = partial(self._on_graph_changed, graph.uuid())
+        graph.node_registered.subscribe(on_graph_changed)
+        graph.node_unregistered.subscribe(on_graph_changed)
+        graph.connection_registered.subscribe(on_graph_changed)
+        graph.connection_unregistered.subscribe(on_graph_changed)
+
         logger.debug("Created graph %s.", graph.uuid())
 
         self.graph_created.emit(graph)
@@ -182,6 +232,14 @@ class State:
 
         self.graph_deleted.emit(graph)
 
+    def restore_graph(self, graph: Graph) -> None:
+        """Register a deleted graph to the state again, to undo its deletion."""
+        self._graphs[graph.uuid()] = graph
+
+        logger.debug("Restored graph %s.", graph.uuid())
+
+        self.graph_created.emit(graph)
+
     def create_node(
         self,
         name: str,
@@ -203,8 +261,10 @@ class State:
             node.set_type(node_type)
 
         self._nodes[node.uuid()] = node
+        self._dirty_node_ids.add(node.uuid())
+        node.name_changed.subscribe(partial(self._on_node_renamed, node.uuid()))
 
-        logger.debug("Created node %s.", node.path())
+        logger.debug("Created node %s.", LazyPath(node))
 
         self.node_created.emit(node)
 
@@ -218,11 +278,21 @@ class State:
         node = self.get_node(node)
 
         del self._nodes[node.uuid()]
+        self._dirty_node_ids.discard(node.uuid())
 
-        logger.debug("Deleted node %s.", node.path())
+        logger.debug("Deleted node %s.", LazyPath(node))
 
         self.node_deleted.emit(node)
 
+    def restore_node(self, node: Node) -> None:
+        """Register a deleted node to the state again, to undo its deletion."""
+        self._nodes[node.uuid()] = node
+        self._dirty_node_ids.add(node.uuid())
+
+        logger.debug("Restored node %s.", LazyPath(node))
+
+        self.node_created.emit(node)
+
     def create_port(
         self,
         name: str,
@@ -252,8 +322,13 @@ class State:
             parent_port.add_child_port(port)
 
         self._ports[port.uuid()] = port
+        self._dirty_node_ids.add(node.uuid())
 
-        logger.debug("Created port %s.", port.path())
+        on_port_changed = partial(self._on_port_changed, node.uuid())
+        port.value_changed.subscribe(on_port_changed)
+        port.name_changed.subscribe(on_port_changed)
+
+        logger.debug("Created port %s.", LazyPath(port))
 
         self.port_created.emit(port)
 
@@ -265,11 +340,21 @@ class State:
         port = self.get_port(port)
 
         del self._ports[port.uuid()]
+        self.mark_dirty(port.node())
 
-        logger.debug("Deleted port %s from the state.", port.path())
+        logger.debug("Deleted port %s from the state.", LazyPath(port))
 
         self.port_deleted.emit(port)
 
+    def restore_port(self, port: Port) -> None:
+        """Register a deleted port to the state again, to undo its deletion."""
+        self._ports[port.uuid()] = port
+        self.mark_dirty(port.node())
+
+        logger.debug("Restored port %s.", LazyPath(port))
+
+        self.port_created.emit(port)
+
     def create_connection(
         self,
         graph: GraphLike,
@@ -302,6 +387,308 @@ class State:
 
         self.connection_deleted.emit(connection)
 
+    def restore_connection(self, connection: Connection) -> None:
+        """Register a deleted connection to the state again, to undo its deletion."""
+        self._connections[connection.uuid()] = connection
+
+        logger.debug("Restored connection %s.", connection.uuid())
+
+        self.connection_created.emit(connection)
+
+    def dirty_nodes(self) -> List[Node]:
+        """Return the nodes whose serialized data changed since last saved.
+
+        A node is dirty when its name, ports, port values, child nodes
+        or connections changed.
+        """
+        return [self._nodes[node_id] for node_id in self._dirty_node_ids]
+
+    def is_dirty(self, node: NodeLike) -> bool:
+        """Return True if the serialized data of the node changed since saved."""
+        node = self.get_node(node)
+        return node.uuid() in self._dirty_node_ids
+
+    def mark_dirty(self, node: NodeLike) -> None:
+        """Flag the serialized data of a node as changed."""
+        node = self.get_node(node)
+        self._dirty_node_ids.add(node.uuid())
+
+    def clear_dirty(self, nodes: Optional[Iterable[NodeLike]] = None) -> None:
+        """Flag the given nodes, or all the nodes, as saved."""
+        if nodes is None:
+            self._dirty_node_ids.clear()
+            return
+
+        for node in nodes:
+            self._dirty_node_ids.discard(self.get_node(node).uuid())
+
+    # The signals deferred by a batch are emitted once it ends, see `State.batch`,
+    # the objects they are about may be deleted by then.
+
+    def _on_graph_changed(self, graph_id: UUID, _: Any) -> None:
+        try:
+            parent_node = self._graphs[graph_id].parent_node()
+        except KeyError:
+            return
+        if parent_node:
+            self.mark_dirty(parent_node)
+
+    def _on_node_renamed(self, node_id: UUID, _: str) -> None:
+        # The paths of the node content changed too, its parent is saved as a whole.
+        try:
+            node = self._nodes[node_id]
+            parent_node = node.parent_node()
+        except KeyError:
+            return
+        self.mark_dirty(parent_node or node)
+
+    def _on_port_changed(self, node_id: UUID, _: Any) -> None:
+        if node_id in self._nodes:
+            self._dirty_node_ids.add(node_id)
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Batch many edits of the state, see `orodruin.commands.MacroCommand`.
+
+        During a batch, the signals are deferred until the batch ends,
+        see `orodruin.core.signal.deferred_signals`, and the names of the nodes
+        of each graph and the ports of each node are indexed so unique names
+        are found without walking the siblings, see `State.name_index`.
+        Nested batches end with the outermost one.
+        """
+        if self._name_indexes is not None:
+            yield
+            return
+
+        self._name_indexes = {}
+        try:
+            with deferred_signals():
+                yield
+        finally:
+            self._name_indexes = None
+
+    def is_batching(self) -> bool:
+        """Return True during a batch, see `State.batch`."""
+        return self._name_indexes is not None
+
+    def name_index(self, owner: Union[Graph, Node]) -> Optional[NameIndex]:
+        """Return the index of a graph's node names or a node's port names.
+
+        The indexes only exist during a batch, None is returned otherwise.
+        """
+        if self._name_indexes is None:
+            return None
+
+        name_index = self._name_indexes.get(owner.uuid())
+        if name_index is None:
+            if isinstance(owner, Graph):
+                names = {node.name() for node in owner.nodes()}
+            else:
+                names = {port.name() for port in owner.ports()}
+            name_index = NameIndex(names)
+            self._name_indexes[owner.uuid()] = name_index
+
+        return name_index
+
+    def update_name_index(
+        self, owner_id: UUID, old_name: Optional[str], new_name: Optional[str]
+    ) -> None:
+        """Update the index of a graph or a node after a name changed, if any.
+
+        Called when a node or port is registered, unregistered or renamed.
+        """
+        if self._name_indexes is None:
+            return
+
+        name_index = self._name_indexes.get(owner_id)
+        if name_index is None:
+            return
+
+        if old_name is not None:
+            name_index.discard(old_name)
+        if new_name is not None:
+            name_index.add(new_name)
+
+    def prototype(self, key: str) -> Optional[Node]:
+        """Return the prototype registered under the given key, if any."""
+        prototype_id = self._prototypes.get(key)
+        if prototype_id is None:
+            return None
+        return self.get_node(prototype_id)
+
+    def drop_prototypes(self, prefix: str) -> None:
+        """Forget the prototypes registered under keys starting with the prefix.
+
+        The nodes sharing a forgotten prototype keep sharing it,
+        the next request for its key creates a new one.
+        The library watcher calls it from the thread of the state,
+        see `orodruin.core.LibraryWatcher.dispatch`.
+        The forgotten prototypes are deleted by `release_prototypes`.
+        """
+        for key in list(self._prototypes):
+            if key.startswith(prefix):
+                prototype_id = self._prototypes.pop(key, None)
+                if prototype_id is not None:
+                    self._dropped_prototype_ids.add(prototype_id)
+
+    def track_sharing_graph(self, graph: Graph) -> None:
+        """Remember a graph sharing another one, see `Graph.set_shared_graph`.
+
+        The graph is only weakly referenced, the prototypes it shares
+        are kept until it is garbage collected or materialized.
+        """
+        self._sharing_graphs[graph.uuid()] = graph
+
+    def release_prototypes(self) -> None:
+        """Delete the forgotten prototypes that no graph shares anymore.
+
+        The deleted graphs kept by the undo stack still share their prototype,
+        it is only deleted once the commands holding them are dropped.
+        It is called when prototypes are created and graphs materialized.
+        """
+        while self._dropped_prototype_ids:
+            shared_ids = set()
+            for graph in list(self._sharing_graphs.values()):
+                shared_graph = graph.shared_graph()
+                if shared_graph:
+                    shared_ids.add(shared_graph.uuid())
+
+            released: List[NodeLike] = []
+            for prototype_id in list(self._dropped_prototype_ids):
+                prototype = self._nodes.get(prototype_id)
+                if prototype and prototype.graph().uuid() in shared_ids:
+                    continue
+                self._dropped_prototype_ids.discard(prototype_id)
+                if prototype:
+                    released.append(prototype)
+            if not released:
+                return
+
+            # The command isn't kept, the deleted objects can be collected.
+            DeleteNodes(self, released).do()
+
+            logger.debug("Released %s prototypes.", len(released))
+
+    def create_prototype(
+        self, key: str, data: Dict[str, Any], trusted: bool = False
+    ) -> Node:
+        """Deserialize a read only node that shared instances can be created from.
+
+        The prototype lives in the state's prototype graph and
+        its graph and all its nested graphs are made read only.
+        Prototypes are never saved, they aren't flagged as dirty.
+        When `trusted` is True, the data isn't validated, see `deserialize`.
+        """
+        self.release_prototypes()
+
+        prototype = self.deserialize(data, self.prototype_graph(), trusted=trusted)
+
+        graphs = [prototype.graph()]
+        while graphs:
+            graph = graphs.pop()
+            graph.set_read_only(True)
+            graphs.extend(node.graph() for node in graph.nodes())
+
+        self.clear_dirty([*ancestor_nodes(prototype), prototype])
+        self.clear_dirty(descendant_nodes(prototype))
+
+        self._prototypes[key] = prototype.uuid()
+
+        logger.debug("Created prototype %s for %s.", prototype.path(), key)
+
+        return prototype
+
+    def duplicate(
+        self,
+        nodes: Iterable[NodeLike],
+        graph: Optional[GraphLike] = None,
+        *,
+        keep_input_connections: bool = False,
+    ) -> List[Node]:
+        """Copy nodes with their ports, values, nested graphs and connections.
+
+        The nodes are copied directly, without serializing them,
+        to the given graph or to the graph of the nodes.
+        The nodes inside another given node are copied with it,
+        the other nodes must be in the same graph, see `Cloner.clone_nodes`.
+
+        The connections between the copied nodes are copied.
+        When keeping the input connections, the connections from other nodes
+        to the copied nodes are copied too if the copies are in the same graph.
+        """
+        node_list = [self.get_node(node) for node in nodes]
+        node_ids = {node.uuid() for node in node_list}
+        top_nodes = {
+            node.uuid(): node
+            for node in node_list
+            if not any(ancestor.uuid() in node_ids for ancestor in ancestor_nodes(node))
+        }
+        if not top_nodes:
+            return []
+
+        if graph is None:
+            parent_graph = next(iter(top_nodes.values())).parent_graph()
+            if parent_graph is None:
+                raise TypeError("Cannot duplicate a node with no graph.")
+            graph = parent_graph
+        graph = self.get_graph(graph)
+
+        with self.batch():
+            clones = Cloner(self).clone_nodes(
+                list(top_nodes.values()), graph, keep_input_connections
+            )
+
+        logger.debug("Duplicated %s nodes.", len(clones))
+
+        return clones
+
+    def materialize_graph(self, graph: GraphLike) -> None:
+        """Replace the shared content of a graph by its own copy of it."""
+        graph = self.get_graph(graph)
+
+        shared_graph = graph.shared_graph()
+        if shared_graph is None:
+            return
+
+        # Stop sharing before copying so the new nodes register to this graph.
+        graph.set_shared_graph(None)
+
+        cloner = Cloner(self)
+        # Root graphs have no ports connected to their content.
+        parent_node = graph.parent_node()
+        prototype = shared_graph.parent_node()
+        if parent_node is not None and prototype is not None:
+            ports = {port.name(): port for port in parent_node.ports()}
+            for port in prototype.ports():
+                cloner.map_port(port, ports[port.name()])
+
+        with self.batch():
+            cloner.clone_graph(shared_graph, graph)
+
+        logger.debug("Materialized graph %s.", graph.uuid())
+
+        self.release_prototypes()
+
+    def load_graph(self, graph: GraphLike) -> None:
+        """Deserialize the pending content of a lazily deserialized graph.
+
+        The nested graphs of the content are deserialized lazily too.
+        """
+        graph = self.get_graph(graph)
+
+        data = graph.pending_data()
+        parent_node = graph.parent_node()
+        if data is None or parent_node is None:
+            return
+
+        # Clear the pending data first so the new nodes register to this graph.
+        graph.set_pending_data(None)
+
+        deserializer = attr.evolve(self._root_deserializer, lazy=True)
+        deserializer.deserialize_graph(data, parent_node)
+
+        logger.debug("Loaded graph of %s.", parent_node.path())
+
     def serializers(self) -> List[Serializer]:
         """Return the state serializers."""
         return self._serializers
@@ -318,20 +705,79 @@ class State:
         """Register a new deserializer."""
         self._deserializers.append(deserializer)
 
-    def serialize(self, root: NodeLike) -> Dict[str, Any]:
+    def serialize(
+        self, root: NodeLike, lazy: bool = False, *, deduplicate: bool = False
+    ) -> Dict[str, Any]:
         """Serialize a node.
 
+        When deduplicating, the identical internal node definitions are written
+        once in a definitions table, see `orodruin.core.serialization.definitions`.
+        The data is then never lazy.
+
         See `RootSerializer.serialize`.
         """
         root = self.get_node(root)
-        data = self._root_serializer.serialize(root, SerializationType.definition)
+
+        if not deduplicate:
+            return self._root_serializer.serialize(
+                root, SerializationType.definition, lazy
+            )
+
+        serializer = attr.evolve(self._root_serializer, deduplicate=True)
+        data = serializer.serialize(root, SerializationType.definition)
+
+        definitions = serializer.definitions()
+        inline_unique(data, definitions)
+        if definitions:
+            data["definitions"] = definitions
+
         return data
 
-    def deserialize(self, data: Dict[str, Any], graph: GraphLike) -> Node:
+    def deserialize(
+        self,
+        data: Dict[str, Any],
+        graph: GraphLike,
+        lazy: bool = False,
+        *,
+        trusted: bool = False,
+        verify: bool = False,
+        paths: Optional[Iterable[Union[str, PurePosixPath]]] = None,
+        crossing_connections: CrossingConnections = CrossingConnections.drop,
+        share_definitions: bool = False,
+    ) -> Node:
         """Deserialize a node.
 
+        When lazy, the content of the node's graph is deserialized
+        the first time it is needed, see `Graph.set_pending_data`.
+
+        When trusted, the nodes, ports and connections of the data are created
+        without the validation of the commands, and verified in a single pass
+        afterwards when verify is True, see `orodruin.core.integrity`.
+
+        When paths are given, only the nodes at these absolute paths
+        and their parents are deserialized.
+
+        When sharing definitions, the nodes referencing the same definition
+        of deduplicated data share the graph of a prototype of it.
+
         See `RootDeserializer.deserialize`.
         """
         graph = self.get_graph(graph)
-        node = self._root_deserializer.deserialize(data, graph)
+
+        deserializer = self._root_deserializer
+        if lazy or trusted or paths is not None or share_definitions:
+            deserializer = attr.evolve(
+                deserializer,
+                lazy=lazy,
+                trusted=trusted,
+                paths=paths,
+                crossing_connections=crossing_connections,
+                share_definitions=share_definitions,
+            )
+
+        node = deserializer.deserialize(data, graph)
+
+        if verify:
+            verify_node(node)
+
         return node
@@ -0,0 +1,186 @@
+"""Walk the connections and hierarchies of nodes and ports.
+
+The walkers are generators using an explicit stack instead of recursion,
+deep hierarchies and long chains of connections don't hit the recursion limit.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator, List, Set
+from uuid import UUID
+
+from .port import PortDirection
+
+if TYPE_CHECKING:
+    from .connection import Connection
+    from .node import Node
+    from .port import Port
+
+
+def upstream_ports(ports: Iterable[Port], load: bool = True) -> Iterator[Port]:
+    """Yield the ports and the ports upstream of them, each once.
+
+    The ports are walked depth first, following the first upstream
+    connection of a port before the next ones.
+    The content a graph shares is walked from the ports of its prototype node,
+    without being copied.
+    When `load` is False, the pending or shared content of the graphs
+    isn't walked, see `Port.connections`.
+    """
+    yield from _walk_connections(ports, upstream=True, load=load)
+
+
+def downstream_ports(ports: Iterable[Port], load: bool = True) -> Iterator[Port]:
+    """Yield the ports and the ports downstream of them, each once.
+
+    The ports are walked depth first, following the first downstream
+    connection of a port before the next ones.
+    The content a graph shares is walked from the ports of its prototype node,
+    without being copied.
+    When `load` is False, the pending or shared content of the graphs
+    isn't walked, see `Port.connections`.
+    """
+    yield from _walk_connections(ports, upstream=False, load=load)
+
+
+def value_connections(port: Port) -> List[Connection]:
+    """Return the connections the value of a port flows through, nearest first.
+
+    A port has a single upstream connection, the chain ends at the first port
+    with none. It is empty when the ports are connected in a loop.
+    The content a graph shares is walked from the ports of its prototype node,
+    without being copied.
+    """
+    connections: List[Connection] = []
+    seen: Set[UUID] = {port.uuid()}
+
+    while True:
+        upstream = _followed_connections(port, upstream=True, load=True)
+        if not upstream:
+            return connections
+
+        connection = upstream[0]
+        port = connection.source()
+        if port.uuid() in seen:
+            return []
+        seen.add(port.uuid())
+        connections.append(connection)
+
+
+def _walk_connections(
+    ports: Iterable[Port], upstream: bool, load: bool
+) -> Iterator[Port]:
+    seen: Set[UUID] = set()
+    stack = list(ports)
+    stack.reverse()
+
+    while stack:
+        port = stack.pop()
+        if port.uuid() in seen:
+            continue
+        seen.add(port.uuid())
+
+        yield port
+
+        if upstream:
+            next_ports = [
+                connection.source()
+                for connection in _followed_connections(port, upstream, load)
+            ]
+        else:
+            next_ports = [
+                connection.target()
+                for connection in _followed_connections(port, upstream, load)
+            ]
+        next_ports.reverse()
+        stack.extend(next_ports)
+
+
+def _followed_connections(port: Port, upstream: bool, load: bool) -> List[Connection]:
+    """Return the upstream or downstream connections of a port.
+
+    A port of a node sharing the content of its graph has no connections to
+    that content, the connections of the prototype node's port are returned.
+    """
+    # An input leads into the graph of its node downstream, an output upstream.
+    if load and (port.direction() is PortDirection.input) is not upstream:
+        node_graph = port.node().graph()
+        node_graph.load()
+
+        shared_graph = node_graph.shared_graph()
+        prototype = shared_graph.parent_node() if shared_graph else None
+        if prototype is not None:
+            try:
+                port = prototype.port(port.name())
+            except NameError:
+                return []
+
+    return port.connections(source=upstream, target=not upstream, load=False)
+
+
+def ancestor_nodes(node: Node) -> Iterator[Node]:
+    """Yield the parent nodes of a node, the closest first."""
+    parent = node.parent_node()
+    while parent:
+        yield parent
+        parent = parent.parent_node()
+
+
+def descendant_nodes(node: Node) -> Iterator[Node]:
+    """Yield the nodes nested in the graph of a node, depth first.
+
+    Each node is yielded before its own child nodes. The nodes of a shared
+    graph belong to the graph it shares and a graph still pending has no nodes
+    yet, neither are walked, see `Graph.shared_graph` and `Graph.is_loaded`.
+    """
+    stack = _child_nodes(node)
+
+    while stack:
+        child = stack.pop()
+        yield child
+        stack.extend(_child_nodes(child))
+
+
+def _child_nodes(node: Node) -> List[Node]:
+    """Return the child nodes of a node, in reverse order to pop them in order."""
+    graph = node.graph()
+    if not graph.is_loaded() or graph.shared_graph():
+        return []
+    return list(reversed(graph.nodes()))
+
+
+def descendant_ports(port: Port) -> Iterator[Port]:
+    """Yield the child ports of a port and their own children, depth first."""
+    stack = list(reversed(port.child_ports()))
+
+    while stack:
+        child = stack.pop()
+        yield child
+        stack.extend(reversed(child.child_ports()))
+
+
+Job = Callable[[], List[Any]]
+"""A step of a walk, returning the jobs it spawns, see `run_depth_first`."""
+
+
+def run_depth_first(jobs: List[Job]) -> None:
+    """Run jobs and the jobs they spawn, depth first, without recursion.
+
+    The jobs spawned by a job all run, with their own spawned jobs,
+    before the next sibling of the job.
+    """
+    stack = list(reversed(jobs))
+
+    while stack:
+        stack.extend(reversed(stack.pop()()))
+
+
+__all__ = [
+    "Job",
+    "ancestor_nodes",
+    "descendant_nodes",
+    "descendant_ports",
+    "downstream_ports",
+    "run_depth_first",
+    "upstream_ports",
+    "value_connections",
+]
@@ -1,14 +1,22 @@
 import re
-from typing import Optional
+from itertools import islice
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from uuid import UUID
 
 from .connection import Connection
 from .graph import Graph
+from .ids import IndexedIds
 from .node import Node
 from .port import Port
+from .traversal import downstream_ports, upstream_ports
 
 
 def get_unique_node_name(graph: Graph, name: str) -> str:
     """Return a valid unique node name inside of the given graph."""
+    name_index = graph.state().name_index(graph)
+    if name_index is not None:
+        return name_index.unique_name(name)
+
     name_pattern = re.compile(r"^(?P<basename>.*?)(?P<index>\d*)?$")
 
     for node in graph.nodes():
@@ -37,6 +45,10 @@ def get_unique_node_name(graph: Graph, name: str) -> str:
 
 def get_unique_port_name(node: Node, name: str) -> str:
     """Return a valid unique node name inside of the given graph."""
+    name_index = node.state().name_index(node)
+    if name_index is not None:
+        return name_index.unique_name(name)
+
     name_pattern = re.compile(r"^(?P<basename>.*?)(?P<index>\d*)?$")
 
     for port in node.ports():
@@ -65,21 +77,96 @@ def get_unique_port_name(node: Node, name: str) -> str:
 
 def find_connection(graph: Graph, source: Port, target: Port) -> Optional[Connection]:
     """Find the connection between two ports of a graph."""
-    for connection in graph.connections():
-        if connection.source() != source:
+    # Only the upstream connections of the target can connect it to the source.
+    for connection in target.connections(source=True, target=False):
+        if connection.source().uuid() != source.uuid():
             continue
-        if connection.target() != target:
+        if connection.graph().uuid() != graph.uuid():
             continue
         return connection
     return None
 
 
+def notify_downstream_ports(ports: Iterable[Port], created: bool) -> None:
+    """Notify each port downstream of the given ports once.
+
+    The ports emit `upstream_connection_created` when connections were created,
+    `upstream_connection_deleted` otherwise.
+    The pending or shared content of the graphs isn't walked,
+    it has no listeners of its own.
+    """
+    for port in downstream_ports(ports, load=False):
+        if created:
+            port.upstream_connection_created.emit(port)
+        else:
+            port.upstream_connection_deleted.emit(port)
+
+
+DetachedConnections = Tuple[
+    List[Connection],
+    List[Tuple[Graph, IndexedIds]],
+    List[Tuple[Port, IndexedIds, IndexedIds]],
+]
+"""Connections unregistered from their graphs and ports, and their indices."""
+
+
+def detach_connections(connections: List[Connection]) -> DetachedConnections:
+    """Unregister connections from their graphs and ports in a single pass each.
+
+    The connections stay registered to the state,
+    see `reattach_connections` to register them back.
+    """
+    graphs: Dict[UUID, Graph] = {}
+    graph_connections: Dict[UUID, List[Connection]] = {}
+    ports: Dict[UUID, Port] = {}
+    port_connection_ids: Dict[UUID, Set[UUID]] = {}
+
+    for connection in connections:
+        graph = connection.graph()
+        graphs[graph.uuid()] = graph
+        graph_connections.setdefault(graph.uuid(), []).append(connection)
+
+        for port in (connection.source(), connection.target()):
+            ports[port.uuid()] = port
+            port_connection_ids.setdefault(port.uuid(), set()).add(connection.uuid())
+
+    return (
+        connections,
+        [
+            (graph, graph.unregister_connections(graph_connections[graph_id]))
+            for graph_id, graph in graphs.items()
+        ],
+        [
+            (port, *port.unregister_connections(port_connection_ids[port_id]))
+            for port_id, port in ports.items()
+        ],
+    )
+
+
+def reattach_connections(detached: DetachedConnections) -> None:
+    """Register connections back at their indices, see `detach_connections`."""
+    _, graph_records, port_records = detached
+
+    for graph, connection_ids in graph_records:
+        graph.register_connections(connection_ids)
+    for port, upstream, downstream in port_records:
+        port.register_connections(upstream, downstream)
+
+
 def get_most_upstream_port(port: Port) -> Port:
-    """Recursively get the most upstream port connected to the given port."""
-    connections = port.connections(source=True, target=False)
-    if connections:
-        return get_most_upstream_port(connections[0].source())
-    return port
+    """Get the most upstream port connected to the given port.
+
+    A port has a single upstream connection, the walk is a chain
+    going through the shared content of the graphs, see `upstream_ports`.
+    """
+    most_upstream_port = port
+    for most_upstream_port in upstream_ports([port]):
+        pass
+
+    # The upstream ports are connected in a loop.
+    if next(islice(upstream_ports([most_upstream_port]), 1, None), None) is not None:
+        return port
+    return most_upstream_port
 
 
 def port_from_path(parent_node: Node, port_path: str) -> Optional[Port]:
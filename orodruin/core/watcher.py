@@ -0,0 +1,171 @@
+"""Watch the registered libraries for changes."""
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional
+
+import attr
+
+from .library import Library, LibraryManager
+from .signal import Signal
+
+if TYPE_CHECKING:
+    from .state import State
+
+logger = logging.getLogger(__name__)
+
+
+@attr.s
+class LibraryChange:
+    """Files of a library target that were added, modified or removed."""
+
+    library: Library = attr.ib()
+    target_name: str = attr.ib()
+    file_names: List[str] = attr.ib()
+
+    def node_paths(self) -> List[Path]:
+        """Return the paths the changed files are found at, in the folder or bundle."""
+        target_path = self.library.path() / self.target_name
+        bundle_path = self.library.bundle_path(self.target_name)
+        return [
+            path
+            for file_name in self.file_names
+            for path in (target_path / file_name, bundle_path / file_name)
+        ]
+
+
+@attr.s
+class LibraryWatcher:
+    """Poll the targets of the registered libraries for changed nodes.
+
+    Each poll lists the target directories and compares the modification time
+    and size of their files with the library index, and reopens the target
+    bundles that were modified, see `Library.update_target`.
+    Only the changed entries of the index and of the definitions cache
+    are updated, and the `library_changed` signal is emitted for each target
+    with changed files.
+
+    The shared prototypes of the changed files are dropped
+    from the watched states, see `watch_state`.
+
+    `poll` drops the prototypes and emits the signal from the calling thread,
+    it must be called from the thread the watched states are edited from.
+    When started, the watcher scans the libraries from a background thread
+    and queues the changes, they are applied by calling `dispatch`
+    from the thread of the states, like a UI idle callback.
+    """
+
+    interval: float = attr.ib(default=1.0)
+
+    _thread: Optional[threading.Thread] = attr.ib(init=False, default=None)
+    _stop_event: threading.Event = attr.ib(init=False, factory=threading.Event)
+    _states: List[State] = attr.ib(init=False, factory=list)
+    # Changes found by the background thread, waiting for `dispatch`.
+    _pending: queue.Queue = attr.ib(init=False, factory=queue.Queue)
+
+    # Signals
+    library_changed: Signal[LibraryChange] = attr.ib(init=False, factory=Signal)
+
+    def poll(self) -> List[LibraryChange]:
+        """Update the index of every registered library and return the changes.
+
+        The changes are applied to the watched states from the calling thread.
+        """
+        changes = self._scan()
+        for change in changes:
+            self._apply(change)
+        return changes
+
+    def dispatch(self) -> List[LibraryChange]:
+        """Apply the changes found by the background thread and return them.
+
+        Call it from the thread the watched states are edited from.
+        """
+        changes = []
+        while True:
+            try:
+                change = self._pending.get_nowait()
+            except queue.Empty:
+                break
+            self._apply(change)
+            changes.append(change)
+        return changes
+
+    def _scan(self) -> List[LibraryChange]:
+        """Update the index of every registered library and return the changes."""
+        changes = []
+
+        for library in LibraryManager.libraries():
+            for target_name in library.target_names():
+                changed = library.update_target(target_name)
+                if not changed:
+                    continue
+
+                change = LibraryChange(library, target_name, changed)
+                changes.append(change)
+
+                logger.debug(
+                    "Library %s target %s changed: %s",
+                    library.name(),
+                    target_name,
+                    changed,
+                )
+
+        return changes
+
+    def _apply(self, change: LibraryChange) -> None:
+        """Drop the prototypes of the changed files and emit the signal."""
+        for node_path in change.node_paths():
+            for state in list(self._states):
+                state.drop_prototypes(f"{node_path}:")
+
+        self.library_changed.emit(change)
+
+    def watch_state(self, state: State) -> None:
+        """Drop the prototypes of the changed node files from a state.
+
+        The next shared imports of the changed nodes create new prototypes,
+        see `orodruin.commands.ImportNode`.
+        """
+        if all(watched is not state for watched in self._states):
+            self._states.append(state)
+
+    def unwatch_state(self, state: State) -> None:
+        """Stop dropping the prototypes of the changed node files from a state."""
+        self._states = [watched for watched in self._states if watched is not state]
+
+    def start(self) -> None:
+        """Start polling the libraries from a background thread, see `dispatch`."""
+        if self._thread is not None:
+            return
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop polling the libraries."""
+        if self._thread is None:
+            return
+
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+
+    def is_running(self) -> bool:
+        """Return True if the watcher is polling from a background thread."""
+        return self._thread is not None
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            for change in self._scan():
+                self._pending.put(change)
+
+
+__all__ = [
+    "LibraryChange",
+    "LibraryWatcher",
+]
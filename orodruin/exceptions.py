@@ -50,3 +50,23 @@ class ConnectionToDifferentDirectionError(ConnectionError):
     """Two ports of the node and its parent direction are being connected together
     while they have the same direction.
     """
+
+
+class ReadOnlyGraphError(Exception):
+    """Graph can't be edited."""
+
+
+class BundleError(Exception):
+    """Invalid or corrupted library bundle."""
+
+
+class SceneIndexError(Exception):
+    """Side index missing, invalid or out of date with its file."""
+
+
+class IntegrityError(Exception):
+    """Nodes, ports and connections are not consistent with each other."""
+
+
+class JournalError(Exception):
+    """Command journal can't be written or replayed."""
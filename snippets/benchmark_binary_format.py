@@ -0,0 +1,55 @@
+import io
+import json
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+# isort: split
+from orodruin.core import Node, PortDirection, State
+from orodruin.core.port.types import Matrix4
+from orodruin.core.serialization import binary, write_json
+
+# isort: split
+from orodruin.commands import ConnectPorts, CreateNode, CreatePort
+
+
+def build_graph(state: State, node_count: int) -> Node:
+    root = CreateNode(state, "root").do()
+
+    previous = None
+    for index in range(node_count):
+        node = CreateNode(state, f"node{index}", graph=root.graph()).do()
+        CreatePort(state, node, "input", PortDirection.input, Matrix4).do()
+        CreatePort(state, node, "output", PortDirection.output, Matrix4).do()
+        CreatePort(state, node, "weight", PortDirection.input, float).do()
+
+        if previous is not None:
+            ConnectPorts(
+                state, root.graph(), previous.port("output"), node.port("input")
+            ).do()
+        previous = node
+
+    return root
+
+
+if __name__ == "__main__":
+    state = State()
+    data = state.serialize(build_graph(state, 2000))
+
+    json_content = json.dumps(data, indent=2).encode("utf-8")
+    binary_content = binary.dumps(data)
+    assert binary.loads(binary_content) == data
+
+    print(f"json:   {len(json_content)} bytes")
+    print(f"binary: {len(binary_content)} bytes")
+
+    for name, save_statement, load_statement in (
+        ("json", "json.dumps(data, indent=2)", "json.loads(json_content)"),
+        ("write_json", "write_json(data, io.StringIO())", "json.loads(json_content)"),
+        ("binary", "binary.dumps(data)", "binary.loads(binary_content)"),
+    ):
+        save = timeit.timeit(save_statement, number=10, globals=globals()) / 10
+        load = timeit.timeit(load_statement, number=10, globals=globals()) / 10
+        print(f"{name}: save {save * 1000:.1f}ms, load {load * 1000:.1f}ms")
@@ -1,9 +1,70 @@
+import json
+from pathlib import Path
+from typing import Any, Dict, Generator
+
 import pytest
 
-from orodruin.core import State
+from orodruin.core import Library, LibraryManager, State
+
+
+def _port_data(name: str, direction: str) -> Dict[str, Any]:
+    return {
+        "name": name,
+        "metadata": {"serialization_type": "definition"},
+        "direction": direction,
+        "type": "int",
+        "default_value": 0,
+    }
+
+
+NESTED_NODE_DATA: Dict[str, Any] = {
+    "name": "Nested",
+    "type": "Nested",
+    "library": "NestedLibrary",
+    "metadata": {"serialization_type": "definition"},
+    "ports": [_port_data("input", "input"), _port_data("output", "output")],
+    "graph": {
+        "nodes": [
+            {
+                "name": "child",
+                "type": "child",
+                "library": "Internal",
+                "metadata": {"serialization_type": "definition"},
+                "ports": [_port_data("input", "input"), _port_data("output", "output")],
+                "graph": {"nodes": [], "connections": []},
+            }
+        ],
+        "connections": [
+            {"source": ".input", "target": "child.input"},
+            {"source": "child.output", "target": ".output"},
+        ],
+    },
+}
+
+
+@pytest.fixture(autouse=True)
+def library_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Persist the library indices in a temporary cache folder."""
+    cache_path = tmp_path / "cache"
+    monkeypatch.setenv(Library.cache_env_var, str(cache_path))
+    return cache_path
 
 
 @pytest.fixture(name="state")
 def fixture_state() -> State:
     """Create and return a root graph."""
     return State()
+
+
+@pytest.fixture(name="library")
+def fixture_library(tmp_path: Path) -> Generator[Library, None, None]:
+    """Register a library containing a `Nested` node and yield it."""
+    library_path = tmp_path / "NestedLibrary"
+    (library_path / "orodruin").mkdir(parents=True)
+
+    with (library_path / "orodruin" / "Nested.json").open("w") as handle:
+        json.dump(NESTED_NODE_DATA, handle)
+
+    yield LibraryManager.register_library(library_path)
+
+    LibraryManager.unregister_library(library_path)
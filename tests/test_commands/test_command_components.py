@@ -18,10 +18,19 @@ def test_create_node_do_undo_redo(state: State) -> None:
     assert not state.root_graph().nodes()
 
     command = CreateNode(state, "my_node")
-    command.do()
+    node = command.do()
 
     assert state.root_graph().nodes()
 
+    command.undo()
+
+    assert not state.nodes()
+    assert not state.root_graph().nodes()
+
+    command.redo()
+
+    assert state.root_graph().nodes() == [node]
+
 
 def test_delete_node_init(state: State) -> None:
     node = CreateNode(state, "my_node").do()
@@ -44,13 +53,13 @@ def test_delete_node_do_undo_redo(state: State) -> None:
     assert not state.nodes()
     assert not state.root_graph().nodes()
 
-    # command.undo()
+    command.undo()
 
-    # assert state.root_graph().nodes()
+    assert state.root_graph().nodes()
 
-    # command.redo()
+    command.redo()
 
-    # assert not state.root_graph().nodes()
+    assert not state.root_graph().nodes()
 
 
 def test_rename_node_init(state: State) -> None:
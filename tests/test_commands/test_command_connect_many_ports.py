@@ -0,0 +1,77 @@
+# pylint: disable = missing-module-docstring, missing-function-docstring
+from typing import List, Tuple
+
+import pytest
+
+from orodruin.commands import ConnectManyPorts, ConnectPorts, CreateNode, CreatePort
+from orodruin.core import Port, PortDirection, State
+from orodruin.exceptions import ConnectionOnSameNodeError, PortAlreadyConnectedError
+
+
+def _ports(state: State, count: int) -> Tuple[List[Port], List[Port]]:
+    source = CreateNode(state, "source").do()
+    target = CreateNode(state, "target").do()
+    outputs = [
+        CreatePort(state, source, f"output{i}", PortDirection.output, int).do()
+        for i in range(count)
+    ]
+    inputs = [
+        CreatePort(state, target, f"input{i}", PortDirection.input, int).do()
+        for i in range(count)
+    ]
+    return outputs, inputs
+
+
+def test_connect_many_ports_do_undo_redo(state: State) -> None:
+    outputs, inputs = _ports(state, 5)
+    other = CreateNode(state, "other").do()
+    other_output = CreatePort(state, other, "output", PortDirection.output, int).do()
+    existing = ConnectPorts(state, state.root_graph(), other_output, inputs[0]).do()
+
+    notified: List[Port] = []
+    inputs[1].upstream_connection_created.subscribe(notified.append)
+
+    command = ConnectManyPorts(
+        state, state.root_graph(), list(zip(outputs, inputs)), force=True
+    )
+    connections = command.do()
+
+    assert len(connections) == 5
+    assert len(state.root_graph().connections()) == 5
+    assert len(notified) == 1
+    for output, input_port in zip(outputs, inputs):
+        assert input_port.connections()[0].source().uuid() == output.uuid()
+
+    command.undo()
+
+    assert len(state.root_graph().connections()) == 1
+    assert inputs[0].connections()[0].uuid() == existing.uuid()
+    assert not inputs[1].connections()
+
+    command.redo()
+
+    assert [connection.uuid() for connection in state.root_graph().connections()] == [
+        connection.uuid() for connection in connections
+    ]
+    assert not other_output.connections()
+
+
+def test_connect_many_ports_validation(state: State) -> None:
+    outputs, inputs = _ports(state, 2)
+
+    with pytest.raises(PortAlreadyConnectedError):
+        ConnectManyPorts(
+            state,
+            state.root_graph(),
+            [(outputs[0], inputs[0]), (outputs[1], inputs[0])],
+        ).do()
+
+    with pytest.raises(ConnectionOnSameNodeError):
+        ConnectManyPorts(
+            state,
+            state.root_graph(),
+            [(outputs[0], inputs[0]), (outputs[0], outputs[1])],
+        ).do()
+
+    # Nothing is connected when a pair is invalid.
+    assert not state.connections()
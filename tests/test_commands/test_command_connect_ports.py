@@ -42,15 +42,15 @@ def test_connect_port_do_undo_redo(state: State) -> None:
     assert state.connections()
     assert state.root_graph().connections()
 
-    # command.undo()
+    command.undo()
 
-    # assert not state.connections()
-    # assert not state.root_graph().connections()
+    assert not state.connections()
+    assert not state.root_graph().connections()
 
-    # command.redo()
+    command.redo()
 
-    # assert state.connections()
-    # assert state.root_graph().connections()
+    assert state.connections()
+    assert state.root_graph().connections()
 
 
 def test_connect_port_same_node_error(state: State) -> None:
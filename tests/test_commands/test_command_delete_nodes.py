@@ -0,0 +1,123 @@
+# pylint: disable = missing-module-docstring, missing-function-docstring
+from typing import Tuple
+
+import pytest
+
+from orodruin.commands import (
+    ConnectPorts,
+    CreateNode,
+    CreatePort,
+    DeleteNodes,
+    MacroCommand,
+)
+from orodruin.core import Node, PortDirection, State
+
+
+def _counts(state: State) -> Tuple[int, int, int, int]:
+    return (
+        len(state.graphs()),
+        len(state.nodes()),
+        len(state.ports()),
+        len(state.connections()),
+    )
+
+
+def _rig(macro: MacroCommand, count: int) -> Node:
+    """Create a compound node holding a chain of nodes, each with a child node."""
+    state = macro.state
+    parent = macro.run(CreateNode(state, "parent"))
+    previous = macro.run(CreatePort(state, parent, "input", PortDirection.input, int))
+
+    for _ in range(count):
+        node = macro.run(CreateNode(state, "joint", graph=parent.graph()))
+        input_port = macro.run(
+            CreatePort(state, node, "input", PortDirection.input, int)
+        )
+        output_port = macro.run(
+            CreatePort(state, node, "output", PortDirection.output, int)
+        )
+        child = macro.run(CreateNode(state, "child", graph=node.graph()))
+        child_input = macro.run(
+            CreatePort(state, child, "input", PortDirection.input, int)
+        )
+        macro.run(ConnectPorts(state, node.graph(), input_port, child_input))
+        macro.run(ConnectPorts(state, parent.graph(), previous, input_port))
+        previous = output_port
+
+    return parent
+
+
+def test_delete_nodes_releases_everything(state: State) -> None:
+    counts = _counts(state)
+    parent = MacroCommand(state, function=lambda macro: _rig(macro, 50)).do()
+    data = state.serialize(parent)
+    source = CreateNode(state, "source").do()
+    output_port = CreatePort(state, source, "output", PortDirection.output, int).do()
+    ConnectPorts(state, state.root_graph(), output_port, parent.port("input")).do()
+    created_counts = _counts(state)
+
+    command = DeleteNodes(state, [parent, parent.graph().nodes()[10]])
+    command.do()
+
+    assert len(command.deleted_nodes()) == 101
+    assert [node.name() for node in state.nodes()] == ["source"]
+    assert not output_port.connections()
+    assert not state.root_graph().connections()
+
+    command.undo()
+
+    assert _counts(state) == created_counts
+    assert state.serialize(parent) == data
+    assert output_port.connections()[0].target().uuid() == parent.port("input").uuid()
+
+    command.redo()
+    DeleteNodes(state, [source]).do()
+
+    assert _counts(state) == counts
+
+
+def test_delete_nodes_redo_reuses_gathered(
+    state: State, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    parent = MacroCommand(state, function=lambda macro: _rig(macro, 3)).do()
+    data = state.serialize(parent)
+    counts = _counts(state)
+
+    command = DeleteNodes(state, [parent])
+    command.do()
+    deleted_counts = _counts(state)
+
+    def fail(_: DeleteNodes) -> None:
+        raise AssertionError("The nodes to delete are gathered again.")
+
+    monkeypatch.setattr(DeleteNodes, "_gather", fail)
+
+    for _ in range(2):
+        command.undo()
+        assert _counts(state) == counts
+        assert state.serialize(parent) == data
+
+        command.redo()
+        assert _counts(state) == deleted_counts
+
+
+def test_delete_nodes_inner(state: State) -> None:
+    parent = MacroCommand(state, function=lambda macro: _rig(macro, 3)).do()
+    joints = parent.graph().nodes()
+
+    command = DeleteNodes(state, [joints[1]])
+    command.do()
+
+    assert [node.name() for node in parent.graph().nodes()] == ["joint", "joint2"]
+    assert not joints[0].port("output").connections()
+    assert not joints[2].port("input").connections(target=False)
+
+    command.undo()
+
+    assert [node.uuid() for node in parent.graph().nodes()] == [
+        node.uuid() for node in joints
+    ]
+    assert [
+        connection.target().node().name()
+        for connection in joints[0].port("output").connections()
+    ] == ["joint1"]
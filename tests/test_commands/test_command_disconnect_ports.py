@@ -34,12 +34,12 @@ def test_connect_port_do_undo_redo(state: State) -> None:
     assert not state.connections()
     assert not state.root_graph().connections()
 
-    # command.undo()
+    command.undo()
 
-    # assert state.connections()
-    # assert state.root_graph().connections()
+    assert state.connections()
+    assert state.root_graph().connections()
 
-    # command.redo()
+    command.redo()
 
-    # assert not state.connections()
-    # assert not state.root_graph().connections()
+    assert not state.connections()
+    assert not state.root_graph().connections()
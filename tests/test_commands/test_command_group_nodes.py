@@ -0,0 +1,125 @@
+# pylint: disable = missing-module-docstring, missing-function-docstring
+from typing import List, Set, Tuple
+
+import pytest
+
+from orodruin.commands import (
+    ConnectPorts,
+    CreateNode,
+    CreatePort,
+    GroupNodes,
+    MacroCommand,
+    UndoStack,
+    UngroupNodes,
+)
+from orodruin.commands.nodes.move_nodes import MoveNodes
+from orodruin.core import Node, PortDirection, State
+from orodruin.exceptions import NodeError
+
+
+def _chain(macro: MacroCommand, count: int) -> List[Node]:
+    state = macro.state
+    nodes = []
+    previous = None
+
+    for _ in range(count):
+        node = macro.run(CreateNode(state, "node"))
+        input_port = macro.run(
+            CreatePort(state, node, "input", PortDirection.input, int)
+        )
+        output_port = macro.run(
+            CreatePort(state, node, "output", PortDirection.output, int)
+        )
+        if previous:
+            macro.run(ConnectPorts(state, state.root_graph(), previous, input_port))
+        previous = output_port
+        nodes.append(node)
+
+    return nodes
+
+
+def _wiring(state: State) -> Set[Tuple[str, str]]:
+    return {
+        (str(connection.source().path()), str(connection.target().path()))
+        for connection in state.connections()
+    }
+
+
+def test_group_nodes_boundary(state: State) -> None:
+    nodes = MacroCommand(state, function=lambda macro: _chain(macro, 4)).do()
+
+    group = GroupNodes(state, state.root_graph(), nodes[1:3]).do()
+
+    assert [node.name() for node in state.root_graph().nodes()] == [
+        "node",
+        "node3",
+        "NewNode",
+    ]
+    assert [(port.name(), port.direction()) for port in group.ports()] == [
+        ("output", PortDirection.input),
+        ("output1", PortDirection.output),
+    ]
+    assert _wiring(state) == {
+        ("/node.output", "/NewNode.output"),
+        ("/NewNode.output", "/NewNode/node1.input"),
+        ("/NewNode/node1.output", "/NewNode/node2.input"),
+        ("/NewNode/node2.output", "/NewNode.output1"),
+        ("/NewNode.output1", "/node3.input"),
+    }
+    assert all(
+        connection.graph().uuid() == group.graph().uuid()
+        for connection in group.graph().connections()
+    )
+
+
+def test_group_ungroup_undo_redo(state: State) -> None:
+    nodes = MacroCommand(state, function=lambda macro: _chain(macro, 200)).do()
+    wiring = _wiring(state)
+    counts = (len(state.graphs()), len(state.ports()), len(state.connections()))
+
+    stack = UndoStack()
+    group = stack.push(GroupNodes(state, state.root_graph(), nodes[50:150]))
+    grouped_wiring = _wiring(state)
+
+    assert len(group.graph().nodes()) == 100
+
+    stack.undo()
+
+    assert _wiring(state) == wiring
+    assert (len(state.graphs()), len(state.ports()), len(state.connections())) == (
+        counts
+    )
+
+    stack.redo()
+
+    assert _wiring(state) == grouped_wiring
+
+    stack.push(UngroupNodes(state, group))
+
+    assert _wiring(state) == wiring
+    assert len(state.root_graph().nodes()) == 200
+    assert (len(state.graphs()), len(state.ports()), len(state.connections())) == (
+        counts
+    )
+
+    stack.undo()
+
+    assert _wiring(state) == grouped_wiring
+
+
+def test_move_nodes_from_other_graph(state: State) -> None:
+    nodes = MacroCommand(state, function=lambda macro: _chain(macro, 2)).do()
+    parent = CreateNode(state, "parent").do()
+    child = CreateNode(state, "child", graph=parent.graph()).do()
+
+    with pytest.raises(NodeError):
+        MoveNodes(state, [nodes[0], child], state.root_graph(), parent.graph())
+    with pytest.raises(NodeError):
+        GroupNodes(state, state.root_graph(), [child])
+
+    assert child.parent_graph() is parent.graph()
+    assert [node.name() for node in state.root_graph().nodes()] == [
+        "node",
+        "node1",
+        "parent",
+    ]
@@ -0,0 +1,258 @@
+# pylint: disable = missing-module-docstring, missing-function-docstring
+import gc
+import json
+
+import pytest
+
+from orodruin.commands import (
+    CreateNode,
+    DeleteNodes,
+    DeletePort,
+    ImportNode,
+    RenamePort,
+    SetPort,
+)
+from orodruin.core import Library, State, downstream_ports
+from orodruin.core.serialization.types import CrossingConnections
+from orodruin.exceptions import ReadOnlyGraphError
+
+
+def test_import_node(state: State, library: Library) -> None:
+    node = ImportNode(state, state.root_graph(), "Nested", library.name()).do()
+
+    assert [port.name() for port in node.ports()] == ["input", "output"]
+    assert len(node.graph().nodes()) == 1
+    assert len(node.graph().connections()) == 2
+
+
+def test_import_node_processes(state: State, library: Library) -> None:
+    node = ImportNode(
+        state,
+        state.root_graph(),
+        "Nested",
+        library.name(),
+        prefetch=True,
+        processes=True,
+    ).do()
+
+    assert [port.name() for port in node.ports()] == ["input", "output"]
+
+
+def test_import_node_shared(state: State, library: Library) -> None:
+    node_a = ImportNode(
+        state, state.root_graph(), "Nested", library.name(), shared=True
+    ).do()
+    object_count = len(state.nodes()) + len(state.ports())
+
+    node_b = ImportNode(
+        state, state.root_graph(), "Nested", library.name(), shared=True
+    ).do()
+
+    # Only the instance and its top level ports are created.
+    assert len(state.nodes()) + len(state.ports()) == object_count + 3
+
+    assert node_a.name() != node_b.name()
+    assert node_a.graph() is not node_b.graph()
+    assert node_a.graph().nodes() == node_b.graph().nodes()
+    assert len(node_b.graph().connections()) == 2
+
+    SetPort(node_b.port("input"), 3).do()
+    assert node_a.port("input").get() == 0
+
+
+def test_import_node_shared_options(state: State, library: Library) -> None:
+    with pytest.raises(ValueError):
+        ImportNode(
+            state,
+            state.root_graph(),
+            "Nested",
+            library.name(),
+            shared=True,
+            paths=["/Nested"],
+        )
+
+    with pytest.raises(ValueError):
+        ImportNode(
+            state,
+            state.root_graph(),
+            "Nested",
+            library.name(),
+            shared=True,
+            crossing_connections=CrossingConnections.stub,
+        )
+
+    node = ImportNode(
+        state, state.root_graph(), "Nested", library.name(), shared=True, trusted=True
+    ).do()
+    assert len(node.graph().nodes()) == 1
+
+
+def test_import_node_shared_materialize(state: State, library: Library) -> None:
+    node_a = ImportNode(
+        state, state.root_graph(), "Nested", library.name(), shared=True
+    ).do()
+    node_b = ImportNode(
+        state, state.root_graph(), "Nested", library.name(), shared=True
+    ).do()
+
+    CreateNode(state, "extra", graph=node_a.graph()).do()
+
+    assert node_a.graph().shared_graph() is None
+    assert node_b.graph().shared_graph() is not None
+    assert len(node_a.graph().nodes()) == 2
+    assert len(node_b.graph().nodes()) == 1
+
+    child = node_a.graph().nodes()[0]
+    assert child.parent_node() is node_a
+    connected_port_ids = {
+        port.uuid()
+        for connection in node_a.graph().connections()
+        for port in (connection.source(), connection.target())
+    }
+    assert node_a.port("input").uuid() in connected_port_ids
+    assert child.port("input").uuid() in connected_port_ids
+
+
+def test_import_node_shared_serialize(state: State, library: Library) -> None:
+    node = ImportNode(
+        state, state.root_graph(), "Nested", library.name(), shared=True
+    ).do()
+
+    data = state.serialize(node)
+
+    assert [child["name"] for child in data["graph"]["nodes"]] == ["child"]
+    assert data["graph"]["connections"] == [
+        {"source": ".input", "target": "child.input"},
+        {"source": "child.output", "target": ".output"},
+    ]
+
+
+def test_prototype_is_read_only(state: State, library: Library) -> None:
+    node = ImportNode(
+        state, state.root_graph(), "Nested", library.name(), shared=True
+    ).do()
+
+    with pytest.raises(ReadOnlyGraphError):
+        CreateNode(state, "extra", graph=node.graph().shared_graph()).do()
+
+
+def test_prototype_path(state: State, library: Library) -> None:
+    node = ImportNode(
+        state, state.root_graph(), "Nested", library.name(), shared=True
+    ).do()
+    prototype = node.graph().shared_graph().parent_node()
+
+    assert str(node.path()) == "/Nested"
+    assert str(prototype.path()) == "/:prototypes/Nested"
+    assert prototype.uuid() not in [
+        other.uuid() for other in state.root_graph().nodes()
+    ]
+    assert [other.uuid() for other in state.dirty_nodes()] == [node.uuid()]
+
+
+def test_release_prototypes(state: State, library: Library) -> None:
+    node = ImportNode(
+        state, state.root_graph(), "Nested", library.name(), shared=True
+    ).do()
+    prototype = node.graph().shared_graph().parent_node()
+    state.drop_prototypes("")
+
+    # The deleted instance kept by the command for its undo still shares it.
+    command = DeleteNodes(state, [node])
+    command.do()
+    state.release_prototypes()
+    assert prototype.uuid() in [other.uuid() for other in state.nodes()]
+
+    command.undo()
+    assert [child.name() for child in node.graph().nodes()] == ["child"]
+
+    command.redo()
+    del command, node
+    gc.collect()
+    state.release_prototypes()
+
+    assert prototype.uuid() not in [other.uuid() for other in state.nodes()]
+    assert [graph.uuid() for graph in state.graphs()] == [
+        state.root_graph().uuid(),
+        state.prototype_graph().uuid(),
+    ]
+    assert not state.ports()
+    assert not state.connections()
+
+
+def test_import_node_shared_ports(state: State, library: Library) -> None:
+    node_a = ImportNode(
+        state, state.root_graph(), "Nested", library.name(), shared=True
+    ).do()
+    node_b = ImportNode(
+        state, state.root_graph(), "Nested", library.name(), shared=True
+    ).do()
+
+    with pytest.raises(ReadOnlyGraphError):
+        SetPort(node_a.graph().nodes()[0].port("input"), 3).do()
+
+    # Walking into the graph of an instance goes through the shared content
+    # without copying it.
+    walked = list(downstream_ports([node_a.port("input")]))
+    assert node_a.graph().shared_graph() is not None
+    assert walked[1:] == [node_a.graph().nodes()[0].port("input")]
+
+    # Editing the ports of an instance materializes its graph.
+    RenamePort(state, node_b.port("input"), "renamed").do()
+    assert node_b.graph().shared_graph() is None
+    child_input = node_b.graph().nodes()[0].port("input")
+    assert child_input.connections()[0].source() is node_b.port("renamed")
+
+
+def test_import_node_shared_republished(state: State, library: Library) -> None:
+    node_a = ImportNode(
+        state, state.root_graph(), "Nested", library.name(), shared=True
+    ).do()
+
+    node_path = library.find_node("Nested", "orodruin")
+    data = json.loads(node_path.read_text())
+    data["graph"]["nodes"][0]["name"] = "republished"
+    data["graph"]["connections"] = []
+    node_path.write_text(json.dumps(data))
+
+    node_b = ImportNode(
+        state, state.root_graph(), "Nested", library.name(), shared=True
+    ).do()
+
+    assert [child.name() for child in node_a.graph().nodes()] == ["child"]
+    assert [child.name() for child in node_b.graph().nodes()] == ["republished"]
+
+
+def test_import_node_lazy(state: State, library: Library) -> None:
+    node = ImportNode(
+        state, state.root_graph(), "Nested", library.name(), lazy=True
+    ).do()
+
+    assert not node.graph().is_loaded()
+    assert [port.name() for port in node.ports()] == ["input", "output"]
+
+    CreateNode(state, "extra", graph=node.graph()).do()
+
+    assert node.graph().is_loaded()
+    assert [child.name() for child in node.graph().nodes()] == ["child", "extra"]
+    assert len(node.graph().connections()) == 2
+
+
+def test_import_node_lazy_ports(state: State, library: Library) -> None:
+    node = ImportNode(
+        state, state.root_graph(), "Nested", library.name(), lazy=True
+    ).do()
+
+    # Listing the connections of a port to the node's graph loads it.
+    assert len(node.port("output").connections()) == 1
+    assert node.graph().is_loaded()
+
+    node = ImportNode(
+        state, state.root_graph(), "Nested", library.name(), lazy=True
+    ).do()
+    RenamePort(state, node.port("input"), "renamed").do()
+    DeletePort(state, node.port("output")).do()
+
+    child = node.graph().nodes()[0]
+    assert child.port("input").connections()[0].source() is node.port("renamed")
+    assert not child.port("output").connections()
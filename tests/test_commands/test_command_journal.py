@@ -0,0 +1,147 @@
+# pylint: disable = missing-module-docstring, missing-function-docstring
+import json
+from pathlib import Path
+
+import pytest
+
+from orodruin.commands import (
+    ConnectPorts,
+    CreateNode,
+    CreatePort,
+    DeleteNode,
+    GroupNodes,
+    Journal,
+    MacroCommand,
+    RenameNode,
+    SetPort,
+    UndoStack,
+)
+from orodruin.commands.journal import journal_path, read_records, recover, replay
+from orodruin.core import Node, PortDirection, State
+from orodruin.exceptions import JournalError
+
+
+def _chain(macro: MacroCommand, parent: Node, count: int) -> None:
+    state = macro.state
+    previous = parent.port("input")
+    for _ in range(count):
+        node = macro.run(CreateNode(state, "joint", graph=parent.graph()))
+        input_port = macro.run(
+            CreatePort(state, node, "input", PortDirection.input, int)
+        )
+        macro.run(CreatePort(state, node, "output", PortDirection.output, int))
+        macro.run(ConnectPorts(state, parent.graph(), previous, input_port))
+        previous = node.port("output")
+
+
+def test_journal_recover(state: State, tmp_path: Path) -> None:
+    save_path = tmp_path / "parent.json"
+    journal = Journal(state, journal_path(save_path))
+    stack = UndoStack(journal=journal)
+
+    parent = stack.push(CreateNode(state, "parent"))
+    stack.push(CreatePort(state, parent, "input", PortDirection.input, int))
+    stack.push(MacroCommand(state, function=lambda macro: _chain(macro, parent, 3)))
+
+    with save_path.open("w") as handle:
+        json.dump(state.serialize(parent), handle)
+    stack.checkpoint()
+
+    joint = parent.graph().nodes()[0]
+    stack.push(SetPort(joint.port("input"), 4))
+    stack.push(RenameNode(state, joint, "renamed"))
+    stack.push(MacroCommand(state, function=lambda macro: _chain(macro, parent, 2)))
+    stack.push(DeleteNode(state, parent.graph().nodes()[1]))
+    stack.push(CreateNode(state, "other", graph=parent.graph()))
+    stack.undo()
+    stack.undo()
+    stack.redo()
+    journal.close()
+
+    recovered_state = State()
+    recovered = recover(recovered_state, save_path)
+
+    assert recovered_state.serialize(recovered) == state.serialize(parent)
+
+
+def test_journal_group_nodes(state: State, tmp_path: Path) -> None:
+    path = tmp_path / "scene.journal"
+    journal = Journal(state, path)
+    stack = UndoStack(journal=journal)
+
+    parent = stack.push(CreateNode(state, "parent"))
+    stack.push(CreatePort(state, parent, "input", PortDirection.input, int))
+    stack.push(MacroCommand(state, function=lambda macro: _chain(macro, parent, 3)))
+    group = stack.push(GroupNodes(state, parent.graph(), parent.graph().nodes()[1:]))
+    journal.close()
+
+    replayed_state = State()
+    replay(replayed_state, path)
+    (replayed_group,) = [
+        node
+        for node in replayed_state.root_graph().nodes()[0].graph().nodes()
+        if node.name() == group.name()
+    ]
+
+    assert replayed_group.type() == group.type()
+    assert replayed_state.serialize(replayed_group) == state.serialize(group)
+
+
+def test_journal_replay_truncated(state: State, tmp_path: Path) -> None:
+    path = tmp_path / "scene.journal"
+    journal = Journal(state, path, batch_size=1)
+    node = journal.run(CreateNode(state, "node"))
+    journal.run(CreatePort(state, node, "port", PortDirection.input, int))
+    journal.close()
+
+    with path.open("a") as handle:
+        handle.write('{"op":"CreateNode","ar')
+
+    assert len(list(read_records(path))) == 3
+
+    replayed_state = State()
+    assert replay(replayed_state, path) == 3
+    assert [
+        port.name() for replayed in replayed_state.nodes() for port in replayed.ports()
+    ] == ["port"]
+
+
+def _fail(macro: MacroCommand) -> None:
+    node = macro.run(CreateNode(macro.state, "failed"))
+    macro.run(RenameNode(macro.state, node, "renamed"))
+    raise ValueError("failed")
+
+
+def test_journal_failed_macro(state: State, tmp_path: Path) -> None:
+    path = tmp_path / "scene.journal"
+    journal = Journal(state, path)
+    stack = UndoStack(journal=journal)
+
+    with pytest.raises(ValueError):
+        stack.push(MacroCommand(state, function=_fail))
+    stack.push(CreateNode(state, "after"))
+    journal.close()
+
+    replayed_state = State()
+    replay(replayed_state, path)
+
+    assert [node.name() for node in replayed_state.root_graph().nodes()] == [
+        node.name() for node in state.root_graph().nodes()
+    ]
+
+
+def test_journal_undo_past_checkpoint(state: State, tmp_path: Path) -> None:
+    path = tmp_path / "scene.journal"
+    stack = UndoStack(journal=Journal(state, path))
+    stack.push(CreateNode(state, "child"))
+    stack.checkpoint()
+
+    assert not stack.can_undo()
+    with pytest.raises(JournalError):
+        stack.undo()
+    assert [node.name() for node in state.root_graph().nodes()] == ["child"]
+
+    with path.open("w") as handle:
+        handle.write('{"op":"undo"}\n')
+    with pytest.raises(JournalError):
+        replay(State(), path)
@@ -0,0 +1,130 @@
+# pylint: disable = missing-module-docstring, missing-function-docstring
+from typing import Any, List
+
+import pytest
+
+from orodruin.commands import (
+    ConnectPorts,
+    CreateNode,
+    CreatePort,
+    DeleteNode,
+    MacroCommand,
+    RenameNode,
+    UndoStack,
+)
+from orodruin.core import Node, PortDirection, State
+
+
+def _build(macro: MacroCommand, count: int) -> Node:
+    state = macro.state
+    parent = macro.run(CreateNode(state, "parent"))
+    previous = macro.run(CreatePort(state, parent, "input", PortDirection.input, int))
+
+    for _ in range(count):
+        node = macro.run(CreateNode(state, "joint", graph=parent.graph()))
+        input_port = macro.run(
+            CreatePort(state, node, "input", PortDirection.input, int)
+        )
+        macro.run(CreatePort(state, node, "output", PortDirection.output, int))
+        macro.run(ConnectPorts(state, parent.graph(), previous, input_port))
+        previous = node.port("output")
+
+    return parent
+
+
+def test_macro_command_undo_redo(state: State) -> None:
+    stack = UndoStack()
+    parent = stack.push(MacroCommand(state, function=lambda macro: _build(macro, 5)))
+    data = state.serialize(parent)
+
+    assert stack.undo_count() == 1
+    assert [node.name() for node in parent.graph().nodes()] == [
+        "joint",
+        "joint1",
+        "joint2",
+        "joint3",
+        "joint4",
+    ]
+
+    stack.undo()
+
+    assert not state.nodes()
+    assert not state.ports()
+    assert not state.connections()
+
+    stack.redo()
+
+    assert state.serialize(parent) == data
+
+
+def test_macro_command_deferred_signals(state: State) -> None:
+    created: List[Node] = []
+    state.node_created.subscribe(created.append)
+
+    def build(macro: MacroCommand) -> None:
+        macro.run(CreateNode(state, "a"))
+        macro.run(CreateNode(state, "b"))
+        assert not created
+
+    MacroCommand(state, function=build).do()
+
+    assert [node.name() for node in created] == ["a", "b"]
+    assert not state.is_batching()
+
+
+def test_macro_command_name_index(state: State) -> None:
+    def build(macro: MacroCommand) -> None:
+        nodes = [macro.run(CreateNode(state, "node")) for _ in range(4)]
+        macro.run(DeleteNode(state, nodes[1]))
+        macro.run(RenameNode(state, nodes[2], "other"))
+
+        assert macro.run(CreateNode(state, "node")).name() == "node1"
+        assert macro.run(CreateNode(state, "node")).name() == "node2"
+        assert macro.run(CreateNode(state, "node")).name() == "node4"
+        assert macro.run(CreateNode(state, "other")).name() == "other1"
+
+    MacroCommand(state, function=build).do()
+
+
+def test_macro_command_rollback(state: State) -> None:
+    signaled: List[Node] = []
+    state.node_created.subscribe(signaled.append)
+    state.node_deleted.subscribe(signaled.append)
+
+    def build(macro: MacroCommand) -> Any:
+        _build(macro, 2)
+        raise RuntimeError
+
+    with pytest.raises(RuntimeError):
+        MacroCommand(state, function=build).do()
+
+    assert not state.nodes()
+    assert not state.connections()
+    assert not signaled
+
+    def build_nested(macro: MacroCommand) -> None:
+        macro.run(CreateNode(state, "kept"))
+        with pytest.raises(RuntimeError):
+            macro.run(MacroCommand(state, function=build))
+
+    MacroCommand(state, function=build_nested).do()
+
+    assert [node.name() for node in signaled] == ["kept"]
+
+
+def test_macro_command_list(state: State) -> None:
+    node = CreateNode(state, "node").do()
+    macro = MacroCommand(
+        state,
+        [
+            CreatePort(state, node, "port", PortDirection.input, int),
+            CreatePort(state, node, "port", PortDirection.input, int),
+        ],
+    )
+    macro.do()
+
+    assert [port.name() for port in node.ports()] == ["port", "port1"]
+
+    macro.undo()
+
+    assert not node.ports()
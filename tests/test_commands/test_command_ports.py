@@ -3,6 +3,7 @@
 from attr import asdict
 
 from orodruin.commands import (
+    ConnectPorts,
     CreateNode,
     CreatePort,
     DeletePort,
@@ -73,17 +74,44 @@ def test_delete_port_do_undo_redo(state: State) -> None:
     assert not state.root_graph().ports()
     assert not node.ports()
 
-    # command.undo()
+    command.undo()
 
-    # assert state.ports()
-    # assert state.root_graph().ports()
-    # assert node.ports()
+    assert state.ports()
+    assert state.root_graph().ports()
+    assert node.ports()
 
-    # command.redo()
+    command.redo()
 
-    # assert not state.ports()
-    # assert not state.root_graph().ports()
-    # assert not node.ports()
+    assert not state.ports()
+    assert not state.root_graph().ports()
+    assert not node.ports()
+
+
+def test_delete_port_connections(state: State) -> None:
+    source = CreateNode(state, "source").do()
+    target = CreateNode(state, "target").do()
+    output_port = CreatePort(state, source, "output", PortDirection.output, int).do()
+    input_port = CreatePort(state, target, "input", PortDirection.input, int).do()
+    child_port = CreatePort(
+        state, target, "child", PortDirection.input, int, input_port
+    ).do()
+    ConnectPorts(state, state.root_graph(), output_port, input_port).do()
+
+    command = DeletePort(state, input_port)
+    command.do()
+
+    assert not state.connections()
+    assert not state.root_graph().connections()
+    assert not output_port.connections()
+    assert state.ports() == [output_port]
+
+    command.undo()
+
+    assert [connection.target() for connection in output_port.connections()] == [
+        input_port
+    ]
+    assert input_port.child_ports() == [child_port]
+    assert len(state.ports()) == 3
 
 
 def test_get_port_do_undo_redo(state: State) -> None:
@@ -0,0 +1,164 @@
+# pylint: disable = missing-module-docstring, missing-function-docstring
+from orodruin.commands import (
+    ConnectPorts,
+    CreateNode,
+    CreatePort,
+    DeleteNode,
+    DeleteNodes,
+    ImportNode,
+    SetPort,
+    UndoStack,
+)
+from orodruin.commands.stack import command_size
+from orodruin.core import Library, Node, PortDirection, State
+
+
+def _scene(state: State, stack: UndoStack, count: int) -> Node:
+    parent = stack.push(CreateNode(state, "parent"))
+    stack.push(CreatePort(state, parent, "input", PortDirection.input, int))
+
+    previous = parent.port("input")
+    for index in range(count):
+        node = stack.push(CreateNode(state, f"node{index}", graph=parent.graph()))
+        input_port = stack.push(
+            CreatePort(state, node, "input", PortDirection.input, int)
+        )
+        stack.push(CreatePort(state, node, "output", PortDirection.output, int))
+        stack.push(ConnectPorts(state, parent.graph(), previous, input_port))
+        previous = node.port("output")
+
+    return parent
+
+
+def test_stack_undo_redo(state: State) -> None:
+    stack = UndoStack()
+    parent = _scene(state, stack, 3)
+    data = state.serialize(parent)
+
+    while stack.undo():
+        pass
+
+    assert not state.nodes()
+    assert not state.ports()
+    assert not state.connections()
+
+    while stack.redo():
+        pass
+
+    assert state.serialize(parent) == data
+    assert [node.name() for node in parent.graph().nodes()] == [
+        "node0",
+        "node1",
+        "node2",
+    ]
+
+
+def test_stack_delete_node_undo(state: State) -> None:
+    stack = UndoStack()
+    parent = _scene(state, stack, 300)
+    data = state.serialize(parent)
+    uuids = {node.uuid() for node in state.nodes()}
+
+    stack.push(DeleteNode(state, parent))
+
+    assert not state.nodes()
+    assert not state.connections()
+
+    stack.undo()
+
+    assert state.serialize(parent) == data
+    assert {node.uuid() for node in state.nodes()} == uuids
+
+    stack.redo()
+
+    assert not state.nodes()
+
+
+def test_stack_import_node_undo(state: State, library: Library) -> None:
+    stack = UndoStack()
+    node = stack.push(ImportNode(state, state.root_graph(), "Nested", library.name()))
+    data = state.serialize(node)
+
+    stack.undo()
+
+    assert not state.root_graph().nodes()
+
+    stack.redo()
+
+    assert state.root_graph().nodes() == [node]
+    assert state.serialize(node) == data
+
+
+def test_stack_merge_set_port(state: State) -> None:
+    stack = UndoStack()
+    node = CreateNode(state, "node").do()
+    port = CreatePort(state, node, "input", PortDirection.input, int).do()
+    other = CreatePort(state, node, "other", PortDirection.input, int).do()
+
+    stack.push(SetPort(port, 1))
+    size = stack.memory()
+    for value in range(2, 10):
+        stack.push(SetPort(port, value))
+
+    assert stack.undo_count() == 1
+    # Merging doesn't add up the sizes of the merged commands.
+    assert stack.memory() == size
+
+    stack.push(SetPort(other, 1))
+    stack.seal()
+    stack.push(SetPort(other, 2))
+
+    assert stack.undo_count() == 3
+
+    while stack.undo():
+        pass
+
+    assert port.get() == 0
+    assert other.get() == 0
+
+    stack.redo()
+
+    assert port.get() == 9
+
+
+def test_command_size_deleted_nodes() -> None:
+    sizes = []
+    for count in (10, 40):
+        state = State()
+        nodes = []
+        for index in range(count):
+            node = CreateNode(state, f"node{index}").do()
+            CreatePort(state, node, "input", PortDirection.input, int).do()
+            CreatePort(state, node, "output", PortDirection.output, int).do()
+            nodes.append(node)
+
+        command = DeleteNodes(state, nodes)
+        command.do()
+        sizes.append(command_size(command))
+
+    # The deleted nodes and ports are measured, not only the references to them.
+    per_node = (sizes[1] - sizes[0]) / 30
+    assert per_node > 1000
+    assert 3.5 < sizes[1] / sizes[0] < 4.5
+
+
+def test_stack_memory_budget(state: State) -> None:
+    node = CreateNode(state, "node").do()
+    port = CreatePort(state, node, "input", PortDirection.input, int).do()
+
+    stack = UndoStack()
+    stack.push(SetPort(port, 1))
+    size = stack.memory()
+
+    stack = UndoStack(memory_budget=size * 3)
+    for value in range(10):
+        stack.push(SetPort(port, value))
+        stack.seal()
+
+    assert stack.undo_count() == 3
+    assert stack.memory() <= size * 3
+
+    stack.undo()
+    stack.push(SetPort(port, 1))
+
+    assert not stack.can_redo()
@@ -0,0 +1,78 @@
+# pylint: disable = missing-module-docstring, missing-function-docstring
+import pytest
+
+from orodruin.commands import ConnectPorts, CreateNode, CreatePort, ImportNode, SetPort
+from orodruin.core import Library, PortDirection, State
+from orodruin.core.integrity import integrity_errors
+from orodruin.exceptions import NodeError, ParentToSelfError
+
+
+def test_duplicate(state: State, library: Library) -> None:
+    scene = CreateNode(state, "Scene").do()
+    source = CreateNode(state, "source", graph=scene.graph()).do()
+    output_port = CreatePort(state, source, "output", PortDirection.output, int).do()
+    nested = ImportNode(state, scene.graph(), "Nested", library.name()).do()
+    other = ImportNode(state, scene.graph(), "Nested", library.name()).do()
+    ConnectPorts(state, scene.graph(), output_port, nested.port("input")).do()
+    ConnectPorts(state, scene.graph(), nested.port("output"), other.port("input")).do()
+    SetPort(nested.graph().nodes()[0].port("input"), 3).do()
+
+    clones = state.duplicate([nested, other, other.graph().nodes()[0]])
+
+    assert [node.name() for node in scene.graph().nodes()] == [
+        "source",
+        "Nested",
+        "Nested1",
+        "Nested2",
+        "Nested3",
+    ]
+    for node, clone in zip([nested, other], clones):
+        data = state.serialize(node)
+        del data["name"]
+        clone_data = state.serialize(clone)
+        del clone_data["name"]
+        assert clone_data == data
+    assert not integrity_errors(scene)
+    assert not clones[0].port("input").connections(target=False)
+    assert [
+        connection.target().uuid()
+        for connection in clones[0].port("output").connections(source=False)
+    ] == [clones[1].port("input").uuid()]
+
+    clones = state.duplicate([nested], keep_input_connections=True)
+
+    assert [
+        connection.source().uuid()
+        for connection in clones[0].port("input").connections(target=False)
+    ] == [output_port.uuid()]
+
+
+def test_duplicate_deep(state: State) -> None:
+    parent = CreateNode(state, "node").do()
+    node = parent
+    for _ in range(2000):
+        node = CreateNode(state, "node", graph=node.graph()).do()
+
+    clone = state.duplicate([parent], state.root_graph())[0]
+
+    assert clone.name() == "node1"
+    assert len(state.nodes()) == 4002
+
+
+def test_duplicate_invalid(state: State) -> None:
+    parent = CreateNode(state, "parent").do()
+    child = CreateNode(state, "child", graph=parent.graph()).do()
+    other = CreateNode(state, "other").do()
+
+    with pytest.raises(ParentToSelfError):
+        state.duplicate([parent], parent.graph())
+    with pytest.raises(ParentToSelfError):
+        state.duplicate([parent], child.graph())
+    with pytest.raises(NodeError):
+        state.duplicate([child, other])
+    assert len(state.nodes()) == 3
+
+    # The nodes inside another given node are copied with it, to its graph.
+    (clone,) = state.duplicate([child, parent])
+    assert clone.parent_graph() is state.root_graph()
+    assert [node.name() for node in clone.graph().nodes()] == ["child"]
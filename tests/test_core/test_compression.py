@@ -0,0 +1,66 @@
+# pylint: disable = missing-module-docstring, missing-function-docstring
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+
+from orodruin.commands import ExportNode, ImportNode
+from orodruin.core import Library, State
+from orodruin.core.bundle import pack
+from orodruin.core.compression import CODECS, detect_codec, read_text, write_text
+
+
+@pytest.mark.parametrize("codec", [None, *CODECS])
+def test_compression_round_trip(tmp_path: Path, codec: str) -> None:
+    path = tmp_path / "data.json"
+    data = {"values": list(range(10000))}
+
+    with write_text(path, codec) as handle:
+        json.dump(data, handle)
+
+    detected = detect_codec(path.read_bytes()[:8])
+    assert (detected.name if detected else None) == codec
+
+    with read_text(path) as handle:
+        assert json.load(handle) == data
+
+
+@pytest.mark.parametrize("codec", list(CODECS))
+def test_export_compressed_node(state: State, library: Library, codec: str) -> None:
+    node = ImportNode(state, state.root_graph(), "Nested", library.name()).do()
+    data = state.serialize(node)
+
+    path = ExportNode(state, node, library.name(), codec=codec).do()
+
+    assert path.name == f"Nested.json{CODECS[codec].suffix}"
+    assert library.find_node("Nested") == path
+    assert not (path.parent / "Nested.json").exists()
+
+    other_state = State()
+    imported = ImportNode(
+        other_state, other_state.root_graph(), "Nested", library.name()
+    ).do()
+    assert other_state.serialize(imported) == data
+
+
+@pytest.mark.parametrize("codec", list(CODECS))
+def test_import_compressed_bundled_node(
+    state: State, library: Library, codec: str
+) -> None:
+    node = ImportNode(state, state.root_graph(), "Nested", library.name()).do()
+    data = state.serialize(node)
+    path = ExportNode(state, node, library.name(), codec=codec).do()
+
+    bundle_path = pack(library.path())
+    shutil.rmtree(path.parent)
+
+    node_path = library.find_node("Nested")
+    assert node_path == bundle_path / path.name
+    assert library.nodes() == [node_path]
+
+    other_state = State()
+    imported = ImportNode(
+        other_state, other_state.root_graph(), "Nested", library.name()
+    ).do()
+    assert other_state.serialize(imported) == data
@@ -0,0 +1,127 @@
+# pylint: disable = missing-module-docstring, missing-function-docstring
+import json
+from pathlib import Path
+
+from orodruin.commands import (
+    CreateNode,
+    CreatePort,
+    DeleteNode,
+    ImportNode,
+    RenameNode,
+    SetPort,
+)
+from orodruin.core import Library, PortDirection, State
+from orodruin.core.serialization import incremental, read_index
+
+
+def test_dirty_nodes(state: State) -> None:
+    parent = CreateNode(state, "parent").do()
+    state.clear_dirty()
+
+    child = CreateNode(state, "child", graph=parent.graph()).do()
+    assert {node.uuid() for node in state.dirty_nodes()} == {
+        parent.uuid(),
+        child.uuid(),
+    }
+
+    state.clear_dirty()
+    port = CreatePort(state, child, "input", PortDirection.input, int).do()
+    assert state.dirty_nodes() == [child]
+
+    state.clear_dirty()
+    SetPort(port, 3).do()
+    assert state.dirty_nodes() == [child]
+
+    state.clear_dirty()
+    DeleteNode(state, child).do()
+    assert state.dirty_nodes() == [parent]
+
+
+def test_incremental_save(state: State, library: Library, tmp_path: Path) -> None:
+    root = CreateNode(state, "root").do()
+    node_a = ImportNode(state, root.graph(), "Nested", library.name()).do()
+    node_b = ImportNode(state, root.graph(), "Nested", library.name()).do()
+
+    path = tmp_path / "root.json"
+    writer = incremental.IncrementalWriter(state, root, path)
+
+    assert writer.save() == 1
+    assert not state.dirty_nodes()
+    assert not incremental.delta_path(path).exists()
+
+    SetPort(node_b.port("input"), 4).do()
+    assert writer.save() == 1
+
+    with incremental.delta_path(path).open() as handle:
+        (record,) = [json.loads(line) for line in handle]
+    assert record["path"] == node_b.name()
+
+    CreateNode(state, "extra", graph=root.graph()).do()
+    RenameNode(state, node_a, "renamed").do()
+    DeleteNode(state, node_b).do()
+    assert writer.save() == 1
+    assert writer.save() == 0
+
+    assert incremental.load(path) == state.serialize(root)
+
+    incremental.compact(path)
+    assert not incremental.delta_path(path).exists()
+    with path.open() as handle:
+        assert json.load(handle) == state.serialize(root)
+
+
+def test_incremental_save_instance(
+    state: State, library: Library, tmp_path: Path
+) -> None:
+    root = CreateNode(state, "root").do()
+    node = ImportNode(state, root.graph(), "Nested", library.name()).do()
+    (child,) = node.graph().nodes()
+
+    path = tmp_path / "root.json"
+    writer = incremental.IncrementalWriter(state, root, path)
+    writer.save()
+
+    # Instances are saved without their graph, the instance itself is recorded.
+    SetPort(child.port("input"), 4).do()
+    assert writer.save() == 1
+    assert not state.dirty_nodes()
+
+    with incremental.delta_path(path).open() as handle:
+        (record,) = [json.loads(line) for line in handle]
+    assert record["path"] == node.name()
+    assert incremental.load(path) == state.serialize(root)
+
+
+def test_incremental_save_compaction(state: State, tmp_path: Path) -> None:
+    root = CreateNode(state, "root").do()
+    port = CreatePort(state, root, "input", PortDirection.input, int).do()
+
+    path = tmp_path / "root.json"
+    writer = incremental.IncrementalWriter(state, root, path, compact_threshold=2)
+    writer.save()
+
+    for value in range(1, 4):
+        SetPort(port, value).do()
+        writer.save()
+
+    assert not incremental.delta_path(path).exists()
+    assert incremental.load(path) == state.serialize(root)
+
+
+def test_incremental_save_index(state: State, tmp_path: Path) -> None:
+    root = CreateNode(state, "root").do()
+    port = CreatePort(state, root, "input", PortDirection.input, int).do()
+    other = CreateNode(state, "other").do()
+
+    path = tmp_path / "root.json"
+    writer = incremental.IncrementalWriter(state, root, path)
+    writer.save()
+
+    assert state.dirty_nodes() == [other]
+    assert read_index(path).read_node("/root") == state.serialize(root)
+
+    SetPort(port, 3).do()
+    writer.save()
+    incremental.compact(path)
+
+    assert read_index(path).read_port_value("/root", "input") == 3
@@ -0,0 +1,36 @@
+# pylint: disable = missing-module-docstring, missing-function-docstring
+import copy
+
+import pytest
+
+from orodruin.commands import CreateNode, ImportNode
+from orodruin.core import Library, State
+from orodruin.core.integrity import integrity_errors
+from orodruin.exceptions import IntegrityError
+
+
+def test_trusted_deserialization(state: State, library: Library) -> None:
+    scene = CreateNode(state, "Scene").do()
+    ImportNode(state, scene.graph(), "Nested", library.name()).do()
+    ImportNode(state, scene.graph(), "Nested", library.name()).do()
+    data = state.serialize(scene)
+
+    state = State()
+    loaded = state.deserialize(data, state.root_graph(), trusted=True, verify=True)
+
+    assert state.serialize(loaded) == data
+    assert not integrity_errors(loaded)
+
+
+def test_trusted_deserialization_invalid(state: State) -> None:
+    scene = CreateNode(state, "Scene").do()
+    CreateNode(state, "child", graph=scene.graph()).do()
+    data = state.serialize(scene)
+    data["graph"]["nodes"].append(copy.deepcopy(data["graph"]["nodes"][0]))
+
+    state = State()
+    loaded = state.deserialize(data, state.root_graph())
+    assert not integrity_errors(loaded)
+
+    with pytest.raises(IntegrityError):
+        state.deserialize(data, state.root_graph(), trusted=True, verify=True)
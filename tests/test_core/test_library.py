@@ -1,11 +1,16 @@
 # pylint: disable = missing-module-docstring, missing-function-docstring
+import json
+import os
+import shutil
 from os import PathLike
 from pathlib import Path
 from typing import Generator
 
 import pytest
 
-from orodruin.core import LibraryManager
+from orodruin.commands import ImportNode
+from orodruin.core import Library, LibraryManager, State
+from orodruin.core.bundle import Bundle, is_node_file, pack, unpack
 
 
 @pytest.fixture(autouse=True)
@@ -15,10 +20,17 @@ def unregister_libraries() -> Generator:
         LibraryManager.unregister_library(library.path())
 
 
-def test_register_library() -> None:
+@pytest.fixture(name="library_path")
+def fixture_library_path(tmp_path: Path) -> Path:
+    """Copy the test library to a temporary folder and return its path."""
+    library_path = tmp_path / "TestLibrary"
+    shutil.copytree(Path(__file__).parent.parent / "TestLibrary", library_path)
+    return library_path
+
+
+def test_register_library(library_path: Path) -> None:
     assert len(LibraryManager.libraries()) == 0
 
-    library_path = Path(__file__).parent.parent / "TestLibrary"
     LibraryManager.register_library(library_path)
 
     assert len(LibraryManager.libraries()) == 1
@@ -38,18 +50,16 @@ def test_register_file_as_library() -> None:
         LibraryManager.register_library(library_path)
 
 
-def test_list_libraries() -> None:
+def test_list_libraries(library_path: Path) -> None:
 
-    library_path = Path(__file__).parent.parent / "TestLibrary"
     LibraryManager.register_library(library_path)
 
     assert library_path in [l.path() for l in LibraryManager.libraries()]
 
 
-def test_unregister_library() -> None:
+def test_unregister_library(library_path: Path) -> None:
     assert len(LibraryManager.libraries()) == 0
 
-    library_path = Path(__file__).parent.parent / "TestLibrary"
     LibraryManager.register_library(library_path)
 
     assert len(LibraryManager.libraries()) == 1
@@ -59,10 +69,170 @@ def test_unregister_library() -> None:
     assert len(LibraryManager.libraries()) == 0
 
 
-def test_get_node() -> None:
-    library_path = Path(__file__).parent.parent / "TestLibrary"
+def test_get_node(library_path: Path) -> None:
     LibraryManager.register_library(library_path)
 
     node = LibraryManager.find_node("SimpleNode")
 
     assert isinstance(node, PathLike)
+
+
+def test_libraries_are_cached(library_path: Path) -> None:
+    library = LibraryManager.register_library(library_path)
+
+    assert LibraryManager.libraries()[0] is library
+    assert LibraryManager.find_library(library.name()) is library
+
+
+def test_library_index(library: Library) -> None:
+    assert library.find_node("Nested") == library.path() / "orodruin" / "Nested.json"
+    assert library.find_node("Missing") is None
+
+    with library.index_path().open("r", encoding="utf-8") as handle:
+        index = json.load(handle)
+
+    entry = index["targets"]["orodruin"]["nodes"]["Nested.json"]
+    assert set(entry) == {"mtime", "size", "hash"}
+
+    assert library.index_path().parent.parent == Library.cache_path()
+    assert library.index_path() != Library(library.path().parent / "other").index_path()
+    assert sorted(path.name for path in library.path().iterdir()) == ["orodruin"]
+
+
+def test_library_index_not_writable(
+    library: Library, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # The cache folder can't be created under a file.
+    (tmp_path / "file").write_text("")
+    monkeypatch.setenv(Library.cache_env_var, str(tmp_path / "file" / "cache"))
+
+    assert library.find_node("Nested") == library.path() / "orodruin" / "Nested.json"
+    assert library.find_node("Missing") is None
+    assert not library.index_path().exists()
+
+
+def test_library_index_update(library: Library) -> None:
+    target_path = library.path() / "orodruin"
+    assert library.find_node("Other") is None
+
+    # The directory is modified within the same tick, its mtime may not change.
+    target_mtime = target_path.stat().st_mtime_ns
+    (target_path / "Other.json").write_text("{}")
+    os.utime(target_path, ns=(target_mtime, target_mtime))
+
+    assert library.find_node("Other") == target_path / "Other.json"
+    assert library.update_index() == []
+
+    # Rewritten in place with the same size and modification time.
+    node_path = target_path / "Nested.json"
+    stat = node_path.stat()
+    node_path.write_text(node_path.read_text().replace("child", "other"))
+    os.utime(node_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    assert library.update_index() == ["Nested.json"]
+    assert library.read_node(node_path)["graph"]["nodes"][0]["name"] == "other"
+
+
+def test_library_index_lookup(
+    library: Library, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    target_path = library.path() / "orodruin"
+    node_path = target_path / "Nested.json"
+    assert library.find_node("Nested") == node_path
+
+    def update_index(_: str = "orodruin") -> None:
+        raise AssertionError("The target folder was scanned again.")
+
+    monkeypatch.setattr(library, "update_index", update_index)
+
+    # Rewritten in place too close to the last update to trust its stat,
+    # only its entry is updated as the folder wasn't modified.
+    stat = node_path.stat()
+    node_path.write_text(node_path.read_text().replace("child", "other"))
+    os.utime(node_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    assert library.find_node("Nested") == node_path
+    assert library.find_node("Missing") is None
+    assert library.read_node(node_path)["graph"]["nodes"][0]["name"] == "other"
+    assert not list(library.index_path().parent.glob("*.tmp"))
+
+
+def test_library_index_persisted(library: Library) -> None:
+    library.find_node("Nested")
+
+    reloaded = Library(library.path())
+    reloaded.find_node("Nested")
+
+    assert reloaded.update_index() == []
+
+
+def test_library_side_files(library: Library) -> None:
+    target_path = library.path() / "orodruin"
+    side_files = [
+        "Nested.json.delta",
+        "Nested.json.tmp",
+        "Nested.json.index",
+        "Nested.json.index.tmp",
+        "Nested.json.journal",
+    ]
+    for file_name in side_files:
+        (target_path / file_name).write_text("{}")
+    (target_path / "Other.json.gz").write_bytes(b"")
+
+    assert not any(is_node_file(file_name) for file_name in side_files)
+    assert sorted(path.name for path in library.nodes()) == [
+        "Nested.json",
+        "Other.json.gz",
+    ]
+
+
+def test_read_node_cached(library: Library) -> None:
+    node_path = library.find_node("Nested")
+    assert node_path
+
+    assert library.read_node(node_path) is library.read_node(node_path)
+
+
+def test_bundle_pack_unpack(library: Library) -> None:
+    target_path = library.path() / "orodruin"
+    data = library.read_node(target_path / "Nested.json")
+
+    bundle_path = pack(library.path())
+    assert bundle_path == library.bundle_path("orodruin")
+
+    (target_path / "Nested.json").unlink()
+    target_path.rmdir()
+
+    node_path = library.find_node("Nested")
+    assert node_path == bundle_path / "Nested.json"
+    assert library.nodes() == [node_path]
+    assert library.read_node(node_path) == data
+
+    paths = unpack(library.path())
+    assert paths == [target_path / "Nested.json"]
+    assert library.find_node("Nested") == target_path / "Nested.json"
+
+
+def test_bundle_uncompressed(library: Library) -> None:
+    bundle_path = pack(library.path(), compress=False)
+
+    packed = Bundle(bundle_path)
+    entry = packed.entry("Nested.json")
+
+    assert entry and entry.codec == "none"
+    assert (
+        packed.read("Nested.json")
+        == (library.path() / "orodruin" / "Nested.json").read_bytes()
+    )
+
+    packed.close()
+
+
+def test_bundle_import_node(state: State, library: Library) -> None:
+    target_path = library.path() / "orodruin"
+    pack(library.path())
+    (target_path / "Nested.json").unlink()
+
+    node = ImportNode(state, state.root_graph(), "Nested", library.name()).do()
+
+    assert len(node.graph().nodes()) == 1
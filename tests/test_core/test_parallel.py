@@ -0,0 +1,70 @@
+# pylint: disable = missing-module-docstring, missing-function-docstring
+import json
+from pathlib import Path
+
+from orodruin.core import DependencyResolver, Library, parallel, parse_files
+from orodruin.core.serialization import binary
+
+
+def test_parse_files(tmp_path: Path) -> None:
+    paths = []
+    for index in range(3):
+        path = tmp_path / f"file{index}.json"
+        path.write_text(json.dumps({"index": index}))
+        paths.append(path)
+
+    binary_path = tmp_path / "file.bin"
+    binary_path.write_bytes(binary.dumps({"matrix": [1.0, 2.0]}))
+    paths.append(binary_path)
+
+    results = parse_files(paths, max_workers=2)
+
+    assert list(results) == paths
+    assert [results[path] for path in paths[:3]] == [{"index": i} for i in range(3)]
+    assert results[binary_path] == {"matrix": [1.0, 2.0]}
+
+
+def test_prefetch_processes(library: Library) -> None:
+    data = {
+        "graph": {
+            "nodes": [
+                {"name": "a", "type": "Nested", "library": library.name()},
+                {"name": "b", "type": "Missing", "library": library.name()},
+            ]
+        }
+    }
+
+    resolved = DependencyResolver(max_workers=2, processes=True).prefetch(data)
+
+    node_path = library.find_node("Nested")
+    assert resolved == {(library.name(), "Nested"): node_path}
+    assert node_path is not None and library.is_node_cached(node_path)
+
+
+def test_prefetch_processes_shared_pool(tmp_path: Path) -> None:
+    # pylint: disable = protected-access
+    executor = parallel.shared_process_executor(2)
+
+    assert parallel.shared_process_executor(2) is executor
+    assert parallel.shared_process_executor(1) is not executor
+    assert executor._mp_context.get_start_method() in ("forkserver", "spawn")
+
+    paths = []
+    for index in range(2):
+        path = tmp_path / f"file{index}.json"
+        path.write_text(json.dumps({"index": index}))
+        paths.append(path)
+
+    parse_files(paths, max_workers=2)
+    assert parallel.shared_process_executor(2) is executor
+
+
+def test_cache_node_modified_while_parsed(library: Library) -> None:
+    node_path = library.find_node("Nested")
+    assert node_path is not None
+
+    mtime = library.node_mtime(node_path)
+    library.cache_node(node_path, {"name": "stale"}, mtime - 1)
+
+    assert not library.is_node_cached(node_path)
+    assert library.read_node(node_path) != {"name": "stale"}
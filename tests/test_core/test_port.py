@@ -1,9 +1,12 @@
 # pylint: disable = missing-module-docstring, missing-function-docstring
+from uuid import uuid4
 
 import pytest
 
-from orodruin.core import Port, PortDirection, State
+from orodruin.commands import ConnectPorts, CreateNode, CreatePort, SetPort
+from orodruin.core import Port, PortDirection, PortTypes, State
 from orodruin.core.pathed_object import PathedObject
+from orodruin.core.port.types import Matrix3, Reference, Vector2, Vector3
 
 
 def test_port_issubclass_pathed_object() -> None:
@@ -54,3 +57,81 @@ def test_set_port_wrong_value_type(state: State) -> None:
 
     with pytest.raises(TypeError):
         port.set("string")  # type: ignore
+
+
+def test_port_type_conversions() -> None:
+    assert PortTypes.conversion(int, float).compatible
+    assert PortTypes.conversion(int, float).convert(3) == 3.0
+    assert not PortTypes.conversion(Vector2, Vector3).compatible
+    assert PortTypes.conversion(float, int).convert(2.7) == 2
+    assert PortTypes.conversion(int, bool).convert(0) is False
+    assert PortTypes.conversion(bool, str).convert(True) == "True"
+
+    # Strings aren't parsed, bool("False") would be True.
+    assert not PortTypes.conversion(str, bool).compatible
+    assert not PortTypes.conversion(Matrix3, Reference).compatible
+    assert not PortTypes.conversion(Vector3, bool).compatible
+    assert not PortTypes.conversion(int, Reference).compatible
+
+    reference = Reference(uuid4())
+    copied_reference = PortTypes.conversion(Reference, Reference).convert(reference)
+    assert copied_reference == reference
+    assert copied_reference is not reference
+
+    vector = Vector3([1.0, 2.0, 3.0])
+    copied_vector = PortTypes.conversion(Vector3, Vector3).convert(vector)
+    assert copied_vector.value == vector.value
+    assert copied_vector.value is not vector.value
+
+    PortTypes.register_conversion(Vector2, Vector3, lambda v: Vector3(v.value + [0.0]))
+    try:
+        conversion = PortTypes.conversion(Vector2, Vector3)
+        assert conversion.compatible
+        assert conversion.convert(Vector2([1.0, 2.0])).value == [1.0, 2.0, 0.0]
+    finally:
+        PortTypes.unregister_conversion(Vector2, Vector3)
+
+    assert not PortTypes.conversion(Vector2, Vector3).compatible
+
+    PortTypes.register_conversion(int, float, None)
+    try:
+        assert not PortTypes.conversion(int, float).compatible
+    finally:
+        PortTypes.unregister_conversion(int, float)
+
+    assert PortTypes.conversion(int, float).convert(1) == 1.0
+
+
+def test_port_value_flows_through_connections(state: State) -> None:
+    parent = CreateNode(state, "parent").do()
+    parent_input = CreatePort(state, parent, "input", PortDirection.input, int).do()
+    child = CreateNode(state, "child", graph=parent.graph()).do()
+    child_input = CreatePort(state, child, "input", PortDirection.input, float).do()
+    child_name = CreatePort(state, child, "name", PortDirection.input, str).do()
+
+    ConnectPorts(state, parent.graph(), parent_input, child_input).do()
+    ConnectPorts(state, parent.graph(), parent_input, child_name).do()
+    SetPort(parent_input, 3).do()
+
+    assert child_input.evaluated() == 3.0
+    assert isinstance(child_input.evaluated(), float)
+    assert child_name.evaluated() == "3"
+    assert child_input.get() == 0.0
+
+
+def test_port_value_registered_conversion(state: State) -> None:
+    source = CreateNode(state, "source").do()
+    output = CreatePort(state, source, "output", PortDirection.output, Vector2).do()
+    target = CreateNode(state, "target").do()
+    target_input = CreatePort(state, target, "input", PortDirection.input, Vector3).do()
+    SetPort(output, [1.0, 2.0]).do()
+
+    PortTypes.register_conversion(Vector2, Vector3, lambda v: Vector3(v.value + [0.0]))
+    try:
+        ConnectPorts(state, state.root_graph(), output, target_input).do()
+        assert target_input.evaluated().value == [1.0, 2.0, 0.0]
+    finally:
+        PortTypes.unregister_conversion(Vector2, Vector3)
+
+    with pytest.raises(TypeError):
+        target_input.evaluated()
@@ -0,0 +1,97 @@
+# pylint: disable = missing-module-docstring, missing-function-docstring
+import json
+import threading
+from typing import Any, Dict
+
+from orodruin.commands import ImportNode
+from orodruin.core import DependencyResolver, Library, State
+from orodruin.core.resolver import node_dependencies
+
+
+def _referencing_data(name: str, node_type: str) -> Dict[str, Any]:
+    return {
+        "name": name,
+        "type": name,
+        "library": "NestedLibrary",
+        "metadata": {"serialization_type": "definition"},
+        "ports": [],
+        "graph": {
+            "nodes": [
+                {
+                    "name": "internal",
+                    "type": "internal",
+                    "library": "Internal",
+                    "metadata": {"serialization_type": "definition"},
+                    "ports": [],
+                    "graph": {
+                        "nodes": [
+                            {
+                                "name": "referenced",
+                                "type": node_type,
+                                "library": "NestedLibrary",
+                                "metadata": {"serialization_type": "instance"},
+                                "ports": [],
+                            }
+                        ],
+                        "connections": [],
+                    },
+                }
+            ],
+            "connections": [],
+        },
+    }
+
+
+def _write_node(library: Library, data: Dict[str, Any]) -> None:
+    node_path = library.path() / "orodruin" / f"{data['name']}.json"
+    with node_path.open("w") as handle:
+        json.dump(data, handle)
+
+
+def test_node_dependencies() -> None:
+    data = _referencing_data("Referencing", "Nested")
+    assert node_dependencies(data) == {("NestedLibrary", "Nested")}
+
+
+def test_prefetch(library: Library) -> None:
+    _write_node(library, _referencing_data("Chain2", "Nested"))
+    _write_node(library, _referencing_data("Chain1", "Chain2"))
+    data = _referencing_data("Chain0", "Chain1")
+
+    resolved = DependencyResolver().prefetch(data)
+
+    assert sorted(resolved) == [
+        ("NestedLibrary", "Chain1"),
+        ("NestedLibrary", "Chain2"),
+        ("NestedLibrary", "Nested"),
+    ]
+
+
+def test_prefetch_shared_threads(library: Library) -> None:
+    _write_node(library, _referencing_data("Chain1", "Nested"))
+    data = _referencing_data("Chain0", "Chain1")
+
+    DependencyResolver().prefetch(data)
+
+    # The threads of the shared pool are kept for the next prefetches.
+    assert any(
+        thread.name.startswith("orodruin-resolver") for thread in threading.enumerate()
+    )
+
+
+def test_prefetch_missing_node(library: Library) -> None:
+    data = _referencing_data("Referencing", "Missing")
+
+    assert not DependencyResolver().prefetch(data)
+    assert library.find_node("Missing") is None
+
+
+def test_import_prefetched_node(state: State, library: Library) -> None:
+    _write_node(library, _referencing_data("Referencing", "Nested"))
+
+    node = ImportNode(state, state.root_graph(), "Referencing", library.name()).do()
+
+    internal = node.graph().nodes()[0]
+    referenced = internal.graph().nodes()[0]
+    assert referenced.type() == "Nested"
+    assert len(referenced.graph().nodes()) == 1
@@ -0,0 +1,329 @@
+# pylint: disable = missing-module-docstring, missing-function-docstring
+import io
+import json
+import re
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from orodruin.commands import (
+    ConnectPorts,
+    CreateNode,
+    CreatePort,
+    ExportNode,
+    ImportNode,
+)
+from orodruin.core import Library, PortDirection, State
+from orodruin.core.port.types import Matrix4
+from orodruin.core.serialization import (
+    CrossingConnections,
+    binary,
+    iter_json,
+    read_index,
+    write_indexed,
+    write_json,
+)
+from orodruin.exceptions import NodeDoesNotExistError, SceneIndexError
+
+
+def _legacy_dumps(data: Any) -> str:
+    content = json.dumps(data, indent=2, separators=(",", ": "))
+    return re.sub(r"\n\s+(\]|\-?\d)", r" \1", content)
+
+
+def test_iter_json_matches_legacy_format() -> None:
+    data = {
+        "name": "node",
+        "empty_list": [],
+        "empty_dict": {},
+        "matrix": [1.0, 0.0, -2.5, 1e-05],
+        "mixed": [{"a": [1, 2]}, "text", -1, True, None],
+        "nested": {"list": [[1, 2], [3]], "value": -3},
+    }
+
+    assert "".join(iter_json(data)) == _legacy_dumps(data)
+
+
+def test_lazy_serialization(state: State, library: Library) -> None:
+    node = ImportNode(state, state.root_graph(), "Nested", library.name()).do()
+
+    data = state.serialize(node)
+
+    handle = io.StringIO()
+    write_json(state.serialize(node, lazy=True), handle, chunk_size=16)
+
+    assert handle.getvalue() == _legacy_dumps(data)
+    assert json.loads(handle.getvalue()) == data
+
+
+def test_binary_round_trip() -> None:
+    data = {
+        "name": "node",
+        "values": [None, True, False, 0, -1, 2**40, -(2**40), 1.5, "text"],
+        "matrix": [1.0, 0.0, -2.5, 1e-05],
+        "mixed": [1.0, 2],
+        "nested": {"list": [[1, 2], []], "empty": {}},
+        "graph": {
+            "nodes": [{"name": "a"}, {"name": "b"}],
+            "connections": [
+                {"source": ".input", "target": "a.input"},
+                {"source": "a.output.x", "target": "b.input"},
+                {"source": "missing.output", "target": ".output"},
+            ],
+            "extra": 1,
+        },
+    }
+
+    content = binary.dumps(data)
+
+    assert binary.is_binary(content)
+    assert binary.loads(content) == data
+    assert list(binary.loads(content)["graph"]) == ["nodes", "connections", "extra"]
+
+
+def test_binary_deserialization(state: State, library: Library) -> None:
+    node = ImportNode(state, state.root_graph(), "Nested", library.name()).do()
+    CreatePort(state, node, "matrix", PortDirection.input, Matrix4).do()
+
+    data = state.serialize(node)
+    content = binary.dumps(data)
+
+    assert len(content) < len(json.dumps(data))
+    assert binary.loads(content) == data
+
+    other_state = State()
+    loaded = other_state.deserialize(binary.loads(content), other_state.root_graph())
+    assert other_state.serialize(loaded) == data
+
+
+def test_binary_invalid_content() -> None:
+    with pytest.raises(ValueError):
+        binary.loads(b"{}")
+
+    content = binary.dumps({"matrix": [1.0, 2.0], "name": "node"})
+    with pytest.raises(ValueError):
+        binary.loads(content[:-4])
+
+
+def test_lazy_deserialization(state: State, library: Library) -> None:
+    wrapper = CreateNode(state, "Wrapper").do()
+    ImportNode(state, wrapper.graph(), "Nested", library.name()).do()
+    data = state.serialize(wrapper)
+
+    state = State()
+    node = state.deserialize(data, state.root_graph(), lazy=True)
+    node_count = len(state.nodes())
+
+    assert not node.graph().is_loaded()
+    assert state.serialize(node) == data
+    assert len(state.nodes()) == node_count
+
+    (nested,) = node.graph().nodes()
+
+    assert node.graph().is_loaded()
+    assert not nested.graph().is_loaded()
+    assert [port.name() for port in nested.ports()] == ["input", "output"]
+
+    assert [child.name() for child in nested.graph().nodes()] == ["child"]
+    assert len(nested.graph().connections()) == 2
+    assert state.serialize(node) == data
+
+
+def _partial_scene_data(state: State, library: Library) -> Any:
+    scene = CreateNode(state, "Scene").do()
+    node_a = ImportNode(state, scene.graph(), "Nested", library.name()).do()
+    node_b = ImportNode(state, scene.graph(), "Nested", library.name()).do()
+    node_a.set_name("A")
+    node_b.set_name("B")
+    ConnectPorts(state, scene.graph(), node_a.port("output"), node_b.port("input")).do()
+    return state.serialize(scene)
+
+
+@pytest.mark.parametrize(
+    "crossing_connections", [CrossingConnections.drop, CrossingConnections.stub]
+)
+def test_partial_deserialization(
+    state: State, library: Library, crossing_connections: CrossingConnections
+) -> None:
+    data = _partial_scene_data(state, library)
+
+    state = State()
+    scene = state.deserialize(
+        data,
+        state.root_graph(),
+        paths=["/Scene/B"],
+        crossing_connections=crossing_connections,
+    )
+
+    (node,) = scene.graph().nodes()
+    assert node.name() == "B"
+    assert [child.name() for child in node.graph().nodes()] == ["child"]
+    assert not scene.graph().connections()
+
+    if crossing_connections is CrossingConnections.stub:
+        assert scene.graph().stub_connections() == [
+            {"source": "A.output", "target": "B.input"}
+        ]
+    else:
+        assert not scene.graph().stub_connections()
+
+
+def test_partial_deserialization_missing_path(state: State, library: Library) -> None:
+    data = _partial_scene_data(state, library)
+
+    with pytest.raises(NodeDoesNotExistError):
+        state.deserialize(data, state.root_graph(), paths=["/Other"])
+
+
+def test_partial_deserialization_renamed(state: State, library: Library) -> None:
+    data = _partial_scene_data(state, library)
+
+    # The existing Scene node makes the deserialized one Scene1.
+    scene = state.deserialize(data, state.root_graph(), paths=["/Scene/B/child"])
+
+    assert scene.name() == "Scene1"
+    (node,) = scene.graph().nodes()
+    assert node.name() == "B"
+    assert [child.name() for child in node.graph().nodes()] == ["child"]
+
+
+@pytest.mark.parametrize("binary_format", [False, True])
+def test_indexed_write(
+    state: State, library: Library, tmp_path: Path, binary_format: bool
+) -> None:
+    data = _partial_scene_data(state, library)
+    path = tmp_path / "scene.orodruin"
+
+    write_indexed(data, path, binary_format)
+    scene_index = read_index(path)
+
+    assert scene_index.list_nodes() == [
+        "/Scene",
+        "/Scene/A",
+        "/Scene/A/child",
+        "/Scene/B",
+        "/Scene/B/child",
+    ]
+    assert scene_index.read_node("/Scene") == data
+    assert scene_index.read_node("/Scene/B") == data["graph"]["nodes"][1]
+    assert scene_index.read_port_value("/Scene/B", "input") == 0
+
+
+def test_indexed_write_out_of_date(
+    state: State, library: Library, tmp_path: Path
+) -> None:
+    data = _partial_scene_data(state, library)
+    path = tmp_path / "scene.json"
+
+    write_indexed(data, path)
+    content = path.read_bytes()
+    path.write_bytes(content.replace(b'"A"', b'"C"'))
+
+    read_index(path, verify=False)
+    with pytest.raises(SceneIndexError):
+        read_index(path)
+
+
+def test_export_indexed(state: State, library: Library) -> None:
+    node = ImportNode(state, state.root_graph(), "Nested", library.name()).do()
+    path = ExportNode(state, node, library.name(), node_name="Exported").do()
+
+    assert read_index(path).list_nodes() == ["/Nested", "/Nested/child"]
+    # The side index isn't listed as a node of the library.
+    assert sorted(node_path.name for node_path in library.nodes()) == [
+        "Exported.json",
+        "Nested.json",
+    ]
+
+    ExportNode(state, node, library.name(), node_name="Exported", codec="gzip").do()
+
+    assert not path.exists()
+    with pytest.raises(SceneIndexError):
+        read_index(path)
+
+
+@pytest.mark.parametrize("trusted", [False, True])
+def test_deserialize_connections(
+    state: State, library: Library, monkeypatch: Any, trusted: bool
+) -> None:
+    data = _partial_scene_data(state, library)
+
+    def port_from_path(*_: Any) -> None:
+        raise AssertionError("Connections should be resolved from the name maps.")
+
+    monkeypatch.setattr(
+        "orodruin.core.serialization.deserializer.port_from_path", port_from_path
+    )
+
+    state = State()
+    scene = state.deserialize(data, state.root_graph(), trusted=trusted)
+
+    assert len(scene.graph().connections()) == 1
+    assert state.serialize(scene) == data
+
+
+def _limb(state: State, graph: Any, name: str, value: int) -> None:
+    limb = CreateNode(state, name, "Limb", graph=graph).do()
+    CreatePort(state, limb, "input", PortDirection.input, int).do().set(value)
+    CreatePort(state, limb, "output", PortDirection.output, int).do()
+
+    joint = CreateNode(state, "joint", "Joint", graph=limb.graph()).do()
+    CreatePort(state, joint, "input", PortDirection.input, int).do().set(2)
+    ConnectPorts(state, limb.graph(), limb.port("input"), joint.port("input")).do()
+
+
+def _deduplicated_scene(state: State) -> Any:
+    scene = CreateNode(state, "Scene").do()
+    for index in range(3):
+        _limb(state, scene.graph(), f"limb{index}", index)
+    CreateNode(state, "other", graph=scene.graph()).do()
+    return scene
+
+
+def test_deduplicated_serialization(state: State) -> None:
+    scene = _deduplicated_scene(state)
+    data = state.serialize(scene)
+
+    deduplicated = state.serialize(scene, deduplicate=True)
+
+    (digest,) = deduplicated["definitions"]
+    limbs = deduplicated["graph"]["nodes"][:3]
+    assert [limb["definition"] for limb in limbs] == [digest] * 3
+    assert [limb.get("values") for limb in limbs] == [None, {"input": 1}, {"input": 2}]
+    assert deduplicated["graph"]["nodes"][3] == data["graph"]["nodes"][3]
+
+    definition = deduplicated["definitions"][digest]
+    assert definition["graph"] == data["graph"]["nodes"][0]["graph"]
+    assert len(json.dumps(deduplicated)) < len(json.dumps(data))
+
+    state = State()
+    node = state.deserialize(deduplicated, state.root_graph())
+    assert state.serialize(node) == data
+
+    state = State()
+    node = state.deserialize(deduplicated, state.root_graph(), lazy=True)
+    assert state.serialize(node) == data
+    assert state.serialize(node, deduplicate=True) == deduplicated
+
+
+def test_deduplicated_shared_definitions(state: State) -> None:
+    scene = _deduplicated_scene(state)
+    data = state.serialize(scene)
+    deduplicated = state.serialize(scene, deduplicate=True)
+
+    state = State()
+    scene = state.deserialize(deduplicated, state.root_graph(), share_definitions=True)
+    limbs = scene.graph().nodes()[:3]
+
+    shared_graphs = [limb.graph().shared_graph() for limb in limbs]
+    assert shared_graphs[0] is not None
+    assert all(graph is shared_graphs[0] for graph in shared_graphs)
+    assert [limb.port("input").get() for limb in limbs] == [0, 1, 2]
+    assert state.serialize(scene) == data
+
+    CreateNode(state, "extra", graph=limbs[1].graph()).do()
+
+    assert limbs[1].graph().shared_graph() is None
+    assert len(limbs[1].graph().nodes()) == 2
+    assert len(limbs[0].graph().nodes()) == 1
@@ -0,0 +1,152 @@
+# pylint: disable = missing-module-docstring, missing-function-docstring
+from typing import List
+
+from orodruin.commands import (
+    ConnectManyPorts,
+    ConnectPorts,
+    CreateNode,
+    CreatePort,
+    DeleteNodes,
+    ImportNode,
+)
+from orodruin.core import (
+    Library,
+    Node,
+    Port,
+    PortDirection,
+    State,
+    ancestor_nodes,
+    descendant_nodes,
+    descendant_ports,
+    downstream_ports,
+    upstream_ports,
+    value_connections,
+)
+from orodruin.core.utils import get_most_upstream_port
+
+
+def _nested_nodes(state: State, depth: int) -> List[Node]:
+    """Create nodes nested in each other, each input connected to its child's."""
+    nodes: List[Node] = []
+    graph = state.root_graph()
+    parent_input = None
+
+    with state.batch():
+        for _ in range(depth):
+            node = state.create_node("node", parent_graph_id=graph.uuid())
+            graph.register_node(node)
+            port = state.create_port("input", PortDirection.input, int, node, graph)
+            graph.register_port(port)
+            node.register_port(port)
+
+            if parent_input is not None:
+                connection = state.create_connection(graph, parent_input, port)
+                graph.register_connection(connection)
+                parent_input.register_downstream_connection(connection)
+                port.register_upstream_connection(connection)
+
+            nodes.append(node)
+            graph = node.graph()
+            parent_input = port
+
+    return nodes
+
+
+def test_walkers(state: State) -> None:
+    parent = CreateNode(state, "parent").do()
+    child = CreateNode(state, "child", graph=parent.graph()).do()
+    grand_child = CreateNode(state, "grand_child", graph=child.graph()).do()
+    sibling = CreateNode(state, "sibling", graph=parent.graph()).do()
+
+    assert [node.uuid() for node in descendant_nodes(parent)] == [
+        child.uuid(),
+        grand_child.uuid(),
+        sibling.uuid(),
+    ]
+    assert [node.uuid() for node in ancestor_nodes(grand_child)] == [
+        child.uuid(),
+        parent.uuid(),
+    ]
+
+    port = CreatePort(state, parent, "port", PortDirection.input, int).do()
+    port_a = CreatePort(state, parent, "a", PortDirection.input, int, port).do()
+    port_b = CreatePort(state, parent, "b", PortDirection.input, int, port_a).do()
+    port_c = CreatePort(state, parent, "c", PortDirection.input, int, port).do()
+
+    assert [child_port.uuid() for child_port in descendant_ports(port)] == [
+        port_a.uuid(),
+        port_b.uuid(),
+        port_c.uuid(),
+    ]
+
+
+def test_deep_chain(state: State) -> None:
+    nodes = [CreateNode(state, name).do() for name in ("a", "b")]
+    graph = state.root_graph()
+    ports: List[Port] = []
+
+    with state.batch():
+        for index in range(100000):
+            node = nodes[index % 2]
+            port = state.create_port(
+                f"port{index}", PortDirection.input, int, node, graph
+            )
+            graph.register_port(port)
+            node.register_port(port)
+            ports.append(port)
+
+    ConnectManyPorts(state, graph, list(zip(ports, ports[1:])), trusted=True).do()
+
+    assert get_most_upstream_port(ports[-1]).uuid() == ports[0].uuid()
+    assert sum(1 for _ in upstream_ports([ports[-1]])) == 100000
+    assert sum(1 for _ in downstream_ports([ports[0]])) == 100000
+
+
+def test_walk_shared_graphs(state: State, library: Library) -> None:
+    source = CreateNode(state, "source").do()
+    CreatePort(state, source, "output", PortDirection.output, int).do()
+    graph = state.root_graph()
+    nodes = [
+        ImportNode(state, graph, "Nested", library.name(), shared=True).do()
+        for _ in range(2)
+    ]
+    for node in nodes:
+        ConnectPorts(state, graph, source.port("output"), node.port("input")).do()
+    (child,) = nodes[0].graph().nodes()
+
+    assert list(downstream_ports([source.port("output")])) == [
+        source.port("output"),
+        nodes[0].port("input"),
+        child.port("input"),
+        nodes[1].port("input"),
+    ]
+    assert get_most_upstream_port(nodes[1].port("output")) is child.port("output")
+    assert [
+        connection.source() for connection in value_connections(nodes[1].port("output"))
+    ] == [child.port("output")]
+    assert list(downstream_ports([nodes[0].port("input")], load=False)) == [
+        nodes[0].port("input")
+    ]
+    assert all(node.graph().shared_graph() for node in nodes)
+
+
+def test_deep_hierarchy(state: State) -> None:
+    nodes = _nested_nodes(state, 2000)
+    top, bottom = nodes[0], nodes[-1]
+
+    assert len(bottom.path().parts) == 2001
+    assert sum(1 for _ in ancestor_nodes(bottom)) == 1999
+    assert sum(1 for _ in descendant_nodes(top)) == 1999
+
+    data = state.serialize(top)
+    copy = state.deserialize(data, state.root_graph())
+
+    assert sum(1 for _ in descendant_nodes(copy)) == 1999
+    assert len(state.connections()) == 2 * 1999
+
+    command = DeleteNodes(state, [top])
+    command.do()
+    assert len(state.nodes()) == 2000
+
+    command.undo()
+    assert len(state.nodes()) == 4000
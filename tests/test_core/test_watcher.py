@@ -0,0 +1,134 @@
+# pylint: disable = missing-module-docstring, missing-function-docstring
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from orodruin.commands import ImportNode
+from orodruin.core import Library, LibraryChange, LibraryWatcher, State
+from orodruin.core.bundle import pack, write_bundle
+
+
+def _touch_directory(path: Path) -> None:
+    """Make sure a directory modification is seen on coarse file systems."""
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+
+
+def test_poll_without_changes(library: Library) -> None:
+    watcher = LibraryWatcher()
+    library.find_node("Nested")
+
+    assert watcher.poll() == []
+
+
+def test_poll_changes(library: Library) -> None:
+    watcher = LibraryWatcher()
+    changes: List[LibraryChange] = []
+    watcher.library_changed.subscribe(changes.append)
+
+    node_path = library.find_node("Nested")
+    assert node_path
+    data = library.read_node(node_path)
+
+    target_path = library.path() / "orodruin"
+    (target_path / "Other.json").write_text("{}")
+    node_path.write_text('{"name": "Republished"}')
+
+    assert watcher.poll() == changes
+    assert len(changes) == 1
+    assert changes[0].library is library
+    assert changes[0].target_name == "orodruin"
+    assert sorted(changes[0].file_names) == ["Nested.json", "Other.json"]
+
+    assert library.read_node(node_path) is not data
+    assert watcher.poll() == []
+
+
+def test_poll_bundle_changes(library: Library) -> None:
+    watcher = LibraryWatcher()
+    bundle_path = pack(library.path())
+    shutil.rmtree(library.path() / "orodruin")
+
+    node_path = library.find_node("Nested")
+    assert node_path == bundle_path / "Nested.json"
+    data = library.read_node(node_path)
+
+    write_bundle(
+        bundle_path,
+        {"Nested.json": b'{"name": "Republished"}', "Other.json": b"{}"},
+    )
+    _touch_directory(bundle_path)
+
+    (change,) = watcher.poll()
+    assert change.target_name == "orodruin"
+    assert sorted(change.file_names) == ["Nested.json", "Other.json"]
+    assert library.read_node(node_path) is not data
+    assert watcher.poll() == []
+
+
+def test_poll_drops_prototypes(state: State, library: Library) -> None:
+    watcher = LibraryWatcher()
+    watcher.watch_state(state)
+
+    node = ImportNode(
+        state, state.root_graph(), "Nested", library.name(), shared=True
+    ).do()
+    node_path = library.find_node("Nested")
+    assert node_path
+    stat = node_path.stat()
+    key = f"{node_path}:{stat.st_mtime_ns}:{stat.st_size}"
+    assert state.prototype(key) is not None
+
+    node_path.write_text(f"{node_path.read_text()}\n")
+    watcher.poll()
+
+    assert state.prototype(key) is None
+    assert node.graph().shared_graph() is not None
+
+
+def test_dispatch_background_changes(
+    state: State, library: Library, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    watcher = LibraryWatcher(interval=0.01)
+    watcher.watch_state(state)
+    changes: List[LibraryChange] = []
+    watcher.library_changed.subscribe(changes.append)
+    dropped: List[str] = []
+    monkeypatch.setattr(state, "drop_prototypes", dropped.append)
+
+    node_path = library.find_node("Nested")
+    assert node_path
+
+    watcher.start()
+    try:
+        node_path.write_text('{"name": "Republished"}')
+
+        dispatched: List[LibraryChange] = []
+        deadline = time.monotonic() + 5
+        while not dispatched and time.monotonic() < deadline:
+            # Nothing is applied from the background thread.
+            assert not changes
+            assert not dropped
+            time.sleep(0.01)
+            dispatched = watcher.dispatch()
+    finally:
+        watcher.stop()
+
+    assert dispatched == changes
+    assert changes[0].file_names == ["Nested.json"]
+    assert f"{node_path}:" in dropped
+    assert watcher.dispatch() == []
+
+
+def test_start_stop(library: Library) -> None:
+    watcher = LibraryWatcher(interval=0.01)
+
+    watcher.start()
+    assert watcher.is_running()
+
+    watcher.stop()
+    assert not watcher.is_running()